@@ -0,0 +1,267 @@
+"""
+Batch processing of many inspection/thermal report pairs.
+
+Usage:
+    python -m app.batch data/batch_inputs --output-dir data/outputs/batch --workers 4
+    python -m app.batch manifest.json
+
+Input is either a manifest (JSON list or CSV with id, inspection, thermal
+columns) or a directory. In a directory, each sub-directory holding one
+inspection*.pdf and one thermal*.pdf is a job, as is each
+<id>_inspection.pdf / <id>_thermal.pdf pair at the top level.
+
+Completed jobs are appended to batch_state.jsonl in the output directory, so
+an interrupted run can be restarted and will skip jobs that already finished.
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from app.extraction.providers import OllamaProvider
+from app.pipeline import run_ddr_pipeline
+from app.processing.document_cache import DocumentCache
+from app.utils.cache_manager import CacheManager
+
+STATE_FILE = "batch_state.jsonl"
+
+
+def discover_jobs(source: str) -> list:
+    """Return a list of {id, inspection, thermal} jobs from a manifest or directory."""
+    path = Path(source)
+
+    if path.is_file():
+        if path.suffix.lower() == ".json":
+            with open(path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        elif path.suffix.lower() == ".csv":
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                entries = list(csv.DictReader(f))
+        else:
+            raise ValueError(f"Unsupported manifest format: {path.suffix}")
+
+        base = path.parent
+        return [
+            {
+                "id": str(entry.get("id") or Path(entry["inspection"]).stem),
+                "inspection": str(base / entry["inspection"]),
+                "thermal": str(base / entry["thermal"])
+            }
+            for entry in entries
+        ]
+
+    if not path.is_dir():
+        raise FileNotFoundError(f"Batch input not found: {source}")
+
+    jobs = []
+
+    # One sub-directory per property
+    for sub in sorted(p for p in path.iterdir() if p.is_dir()):
+        inspection = sorted(sub.glob("inspection*.pdf"))
+        thermal = sorted(sub.glob("thermal*.pdf"))
+        if inspection and thermal:
+            jobs.append({"id": sub.name, "inspection": str(inspection[0]), "thermal": str(thermal[0])})
+
+    # Flat <id>_inspection.pdf / <id>_thermal.pdf pairs
+    for inspection in sorted(path.glob("*_inspection.pdf")):
+        job_id = inspection.name[:-len("_inspection.pdf")]
+        thermal = path / f"{job_id}_thermal.pdf"
+        if thermal.exists():
+            jobs.append({"id": job_id, "inspection": str(inspection), "thermal": str(thermal)})
+
+    return jobs
+
+
+def load_completed(output_dir: Path) -> set:
+    """Return ids of jobs recorded as done whose output is still on disk."""
+    state_path = output_dir / STATE_FILE
+    completed = set()
+
+    if not state_path.exists():
+        return completed
+
+    with open(state_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # partial line from a crash mid-write
+            if record.get("status") == "done" and Path(record.get("output", "")).exists():
+                completed.add(record["id"])
+
+    return completed
+
+
+def run_job(job: dict, output_dir: str, render_pdf: bool = False) -> dict:
+    """Process one report pair in a worker process and return its state record."""
+    cache_before = CacheManager.stats()
+    documents_before = DocumentCache.stats()
+    prompts_before = OllamaProvider.stats()
+    start = time.perf_counter()
+    record = {"id": job["id"]}
+
+    try:
+        final_markdown, timings = run_ddr_pipeline(job["inspection"], job["thermal"])
+
+        job_dir = Path(output_dir) / job["id"]
+        job_dir.mkdir(parents=True, exist_ok=True)
+        output_path = job_dir / "generated_ddr.md"
+
+        # Write then rename so a crash never leaves a truncated DDR behind
+        tmp_path = output_path.with_suffix(".md.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(final_markdown)
+        os.replace(tmp_path, output_path)
+
+        if render_pdf:
+            from app.reporting.pdf_renderer import PDFRenderer
+            PDFRenderer.render(final_markdown, str(job_dir / "generated_ddr.pdf"))
+
+        record.update(status="done", output=str(output_path), timings=timings)
+
+    except Exception as e:
+        record.update(status="failed", error=str(e))
+
+    cache_after = CacheManager.stats()
+    documents_after = DocumentCache.stats()
+    record["cache"] = {
+        "hits": cache_after["hits"] - cache_before["hits"],
+        "misses": cache_after["misses"] - cache_before["misses"]
+    }
+    record["document_cache"] = {
+        "hits": documents_after["hits"] - documents_before["hits"],
+        "misses": documents_after["misses"] - documents_before["misses"]
+    }
+    prompts_after = OllamaProvider.stats()
+    record["prompt_eval"] = {
+        key: prompts_after[key] - prompts_before[key]
+        for key in ("calls", "prompt_tokens", "prompt_eval_seconds", "cold_loads", "load_seconds")
+    }
+    record["elapsed"] = time.perf_counter() - start
+
+    return record
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(records: list, elapsed: float) -> str:
+    """Build the throughput summary printed at the end of a batch run."""
+    done = [r for r in records if r["status"] == "done"]
+    failed = [r for r in records if r["status"] == "failed"]
+
+    hits = sum(r["cache"]["hits"] for r in records)
+    misses = sum(r["cache"]["misses"] for r in records)
+    lookups = hits + misses
+
+    doc_hits = sum(r["document_cache"]["hits"] for r in records)
+    doc_lookups = doc_hits + sum(r["document_cache"]["misses"] for r in records)
+
+    lines = [
+        "===== BATCH SUMMARY =====",
+        f"Completed: {len(done)}  Failed: {len(failed)}  Wall time: {elapsed:.1f}s",
+        f"Throughput: {len(done) / elapsed * 60:.2f} reports/min" if elapsed > 0 else "Throughput: n/a",
+        f"Cache hit rate: {hits / lookups:.1%} ({hits}/{lookups})" if lookups else "Cache hit rate: n/a",
+        f"Document cache hit rate: {doc_hits / doc_lookups:.1%} ({doc_hits}/{doc_lookups})"
+        if doc_lookups else "Document cache hit rate: n/a",
+    ]
+
+    # Ollama prompt evaluation (records written before it was tracked have none)
+    prompt_eval = [r["prompt_eval"] for r in records if r.get("prompt_eval")]
+    calls = sum(p["calls"] for p in prompt_eval)
+    if calls:
+        lines.append(
+            f"Ollama prompt eval: {sum(p['prompt_eval_seconds'] for p in prompt_eval):.1f}s for "
+            f"{sum(p['prompt_tokens'] for p in prompt_eval)} tokens evaluated over {calls} calls "
+            f"({sum(p['prompt_tokens'] for p in prompt_eval) / calls:.0f}/call); "
+            f"{sum(p['cold_loads'] for p in prompt_eval)} cold model loads "
+            f"({sum(p.get('load_seconds', 0) for p in prompt_eval):.1f}s loading)"
+        )
+
+    stage_times = {}
+    for record in done:
+        for stage, seconds in record["timings"].items():
+            stage_times.setdefault(stage, []).append(seconds)
+
+    if stage_times:
+        width = max(len(stage) for stage in stage_times)
+        lines.append("")
+        lines.append(f"  {'stage'.ljust(width)}       p50       p95")
+        for stage, values in stage_times.items():
+            lines.append(
+                f"  {stage.ljust(width)}  {percentile(values, 50):8.3f}s {percentile(values, 95):8.3f}s"
+            )
+
+    for record in failed:
+        lines.append(f"✗ {record['id']}: {record['error']}")
+
+    return "\n".join(lines)
+
+
+def run_batch(source: str, output_dir: str, workers: int = 2, resume: bool = True,
+              render_pdf: bool = False) -> list:
+    """Process every job from source on a bounded process pool."""
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    jobs = discover_jobs(source)
+    completed = load_completed(output_path) if resume else set()
+    pending = [job for job in jobs if job["id"] not in completed]
+
+    print(f"Found {len(jobs)} jobs, {len(completed)} already complete, {len(pending)} to run.")
+
+    records = []
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, \
+            open(output_path / STATE_FILE, "a", encoding="utf-8") as state:
+        futures = {
+            pool.submit(run_job, job, output_dir, render_pdf): job["id"]
+            for job in pending
+        }
+
+        for future in as_completed(futures):
+            record = future.result()
+            records.append(record)
+
+            # One line per finished job; flushed so a crash loses nothing
+            state.write(json.dumps(record) + "\n")
+            state.flush()
+
+            mark = "✓" if record["status"] == "done" else "✗"
+            print(f"{mark} [{len(records)}/{len(pending)}] {record['id']} ({record['elapsed']:.1f}s)")
+
+    if records:
+        print("\n" + summarize(records, time.perf_counter() - start))
+
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate DDRs for a batch of report pairs.")
+    parser.add_argument("source", help="Directory of report pairs or a JSON/CSV manifest")
+    parser.add_argument("--output-dir", default="data/outputs/batch", help="Where DDRs are written")
+    parser.add_argument("--workers", type=int, default=2, help="Number of worker processes")
+    parser.add_argument("--no-resume", action="store_true", help="Re-run jobs that already completed")
+    parser.add_argument("--pdf", action="store_true", help="Also render a PDF for each DDR")
+    args = parser.parse_args()
+
+    run_batch(
+        args.source,
+        args.output_dir,
+        workers=args.workers,
+        resume=not args.no_resume,
+        render_pdf=args.pdf
+    )
+
+
+if __name__ == "__main__":
+    main()
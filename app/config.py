@@ -17,21 +17,142 @@ class Config:
     GENERATION_TEMPERATURE = 0.0  
 
     MAX_OUTPUT_TOKENS = 8192
+
+    # PDF parsing
+    PDF_PARSE_WORKERS = None  # Processes used to extract pages of large PDFs (None = CPU count, max 4)
+    PDF_PARALLEL_MIN_PAGES = 200  # Smaller documents are parsed in-process while the page pool is not started (starting it costs ~0.6s)
+    PDF_PARALLEL_MIN_PAGES_WARM = 120  # Same once the pool is running (~0.7ms/page in-process; the pool adds ~40ms + 0.2ms/page)
+
+    # Inspection parsing: "structured" reads the form layout (areas and findings)
+    # with PyMuPDF and falls back to "text" (cleaned, segmented page text) when
+    # no areas are found
+    INSPECTION_PARSE_MODE = "structured"
+    INSPECTION_STRUCTURED_MIN_CONFIDENCE = 1.0  # Below this the LLM extracts from the parsed areas
+
+    # Lines of the inspection report kept for extraction (case-insensitive substrings)
+    SEGMENT_KEYWORDS = [
+        "impacted area",
+        "negative side",
+        "positive side",
+        "summary",
+        "observation",
+        "damp",
+        "leakage",
+        "plumbing"
+    ]
+
+    # Area names treated as equivalent when linking thermal images to areas
+    AREA_SYNONYMS = {
+        "hall": ["living room", "lounge"],
+        "bathroom": ["washroom", "toilet", "wc"],
+        "bedroom": ["bed room"],
+        "kitchen": ["pantry"],
+        "parking": ["garage"],
+    }
+
+    # Conflict detection rules (JSON, or YAML with PyYAML); None = app/intelligence/conflict_rules.json
+    CONFLICT_RULES_PATH = None
+
+    # Thermal extraction: read known report templates without the LLM
+    THERMAL_FAST_PATH = True
+    THERMAL_FAST_PATH_MIN_CONFIDENCE = 0.9  # Below this the LLM extracts the readings instead
+
+    # Thermal analytics (hot/cold spread per image, °C)
+    THERMAL_Z_THRESHOLD = 2.0  # Survey z-score at or above which an image is an outlier
+    THERMAL_IQR_FACTOR = 1.5  # Images above Q3 + factor * IQR are outliers
+    THERMAL_SEVERE_DELTA = 8.0  # Spread treated as maximally severe in the area signal
+
+    # Near-duplicate finding detection (Jaccard similarity of character 3-grams,
+    # area name left out). Only exact duplicates are removed; findings at or
+    # above this are reported together in recurring_findings
+    DEDUP_SIMILARITY_THRESHOLD = 0.85
+
+    # Chunked extraction for large reports (replaces the old 20k-char truncation)
+    CHARS_PER_TOKEN = 4  # Rough estimate used for prompt budgeting
+    EXTRACTION_CHUNK_TOKENS = 2000  # Token budget for report text in each extraction prompt
+    EXTRACTION_CHUNK_TARGET = 1.0  # Mean spacing of hash breaks as a share of the budget (smaller = more, steadier windows)
+    EXTRACTION_MAX_WORKERS = 4  # Chunks extracted concurrently
     
+    # DDR generation prompt
+    DDR_PROMPT_FORMAT = "json"  # "json" (minified) or "table" (one line per area)
+    DDR_PROMPT_TOKEN_BUDGET = 6000  # Over this, lowest-severity areas are listed by name only
+    DDR_GENERATION_MODE = "single"  # "single" (one call) or "fanout" (per-area calls + summary call)
+    DDR_AREA_MAX_WORKERS = 4  # Per-area calls run concurrently in fanout mode
+
     USE_MOCK = False
     
     # Caching settings to avoid redundant API calls
     ENABLE_CACHE = True  # Enabled to speed up Ollama responses
     CACHE_DIR = "data/cache"
+    CACHE_BACKEND = "file"  # "file" (one JSON per entry), "sqlite" (single WAL file) or "memory"
+    CACHE_SQLITE_PATH = None  # Defaults to <CACHE_DIR>/cache.sqlite3
+    CACHE_MEMORY_ENTRIES = 256  # In-memory LRU tier in front of the backend (0 disables)
+    CACHE_MAX_ENTRIES = None  # Evict least recently hit entries beyond this count
+    CACHE_MAX_BYTES = None  # Evict least recently hit entries beyond this total size
+    CACHE_TTL_SECONDS = None  # Entries older than this are treated as misses
+    ENABLE_DOCUMENT_CACHE = True  # Reuse parsed/cleaned text for identical PDF uploads
+    LLM_SINGLE_FLIGHT = True  # Identical concurrent prompts share one LLM call (needs ENABLE_CACHE)
+    LLM_LEASE_SECONDS = 360  # Cross-process claim on a prompt; others wait this long at most
+    LLM_LEASE_POLL_INTERVAL = 0.5  # Seconds between cache checks while another process generates
+
+    # Job queue behind the Streamlit UI (see app/jobs.py)
+    JOB_QUEUE_PATH = "data/jobs/jobs.sqlite3"
+    JOB_SPOOL_DIR = "data/jobs/spool"  # Uploaded PDFs of unfinished jobs
+    JOB_WORKERS = 2  # Worker processes the UI starts (0 = run `python -m app.jobs worker` separately)
+    JOB_QUEUE_MAX_PENDING = 20  # New submissions are rejected while this many jobs are waiting
+    JOB_BACKEND_CONCURRENCY = {"ollama": 1}  # Jobs running at once per LLM backend, across all workers
+    JOB_DEFAULT_BACKEND_CONCURRENCY = 2  # Cap for backends not listed above
+    JOB_POLL_INTERVAL = 0.5  # Seconds between queue polls (workers and UI)
+    JOB_HEARTBEAT_SECONDS = 10
+    JOB_STALE_SECONDS = 120  # Running jobs without a heartbeat for this long are requeued
+    JOB_MAX_ATTEMPTS = 2
+    JOB_UI_TIMEOUT = 900  # Seconds a UI session follows a job before reporting it as stuck
+
+    # Per-stage tracing (wall/CPU time, sizes, cache hits)
+    TRACING_ENABLED = os.getenv("DDR_TRACING", "").lower() in ("1", "true", "yes")
+    TRACING_EXPORTER = "jsonl"  # "jsonl" (TRACING_PATH), "memory" or "otel" (needs opentelemetry-api)
+    TRACING_PATH = "data/traces/spans.jsonl"
     
     # Retry logic for handling rate limits(for gemini)
     MAX_RETRIES = 3
     INITIAL_RETRY_DELAY = 1.0  
     MAX_RETRY_DELAY = 60.0  
 
-    LLM_PROVIDER = "ollama" 
+    # Proactive Gemini rate limiting, shared by all threads and processes
+    GEMINI_RPM = 15  # Requests per minute allowed by the API key's quota
+    GEMINI_TPM = 1_000_000  # Tokens per minute (prompt + output); None = unlimited
+    RATE_LIMIT_STATE_PATH = "data/cache/rate_limits.sqlite3"  # None = per-process buckets
+    RATE_LIMIT_BURST = 0.1  # Share of a minute's quota that may be spent at once (the rest is paced)
+    RATE_LIMIT_MIN_FACTOR = 0.1  # Lowest share of the quota the limiter backs off to after 429s
+    RATE_LIMIT_RECOVERY = 0.05  # Share of the quota restored after each successful call
+    RATE_LIMIT_JITTER = 0.2  # Random extra wait (fraction) so blocked callers do not retry together
+
+    LLM_PROVIDER = "ollama"  # "ollama", "router" (several Ollama hosts), "gemini" or "fake" (deterministic, offline)
     
     # Ollama configuration (local LLM server)
     OLLAMA_BASE_URL = "http://localhost:11434"
     OLLAMA_MODEL = "llama3.2"  # 3.2B model
     OLLAMA_TIMEOUT = 300  # Timeout in seconds for Ollama requests
+
+    # Connection pooling / async transport for Ollama
+    OLLAMA_MAX_CONCURRENCY_PER_HOST = 4  # In-flight requests allowed per Ollama host
+    OLLAMA_REQUEST_DEADLINE = None  # Per-request deadline in seconds (None = OLLAMA_TIMEOUT)
+    OLLAMA_KEEP_ALIVE = "30m"  # How long Ollama keeps the model (and its prompt cache) loaded after a call; -1 = forever, None = server default
+
+    # Router over several Ollama hosts serving OLLAMA_MODEL (LLM_PROVIDER = "router")
+    ROUTER_BACKENDS = []  # Base URLs, e.g. ["http://10.0.0.5:11434", "http://10.0.0.6:11434"] (empty = OLLAMA_BASE_URL)
+    ROUTER_POLICY = "least_outstanding"  # "least_outstanding" or "ewma" (latency EWMA x outstanding requests)
+    ROUTER_EWMA_ALPHA = 0.3  # Weight of the newest latency in the EWMA
+    ROUTER_FAILURE_THRESHOLD = 3  # Consecutive failures before a backend is ejected
+    ROUTER_OPEN_SECONDS = 30  # Ejected backends get one trial request after this long
+    ROUTER_HEALTH_INTERVAL = 15  # Seconds between background health checks (0 disables)
+    ROUTER_HEALTH_TIMEOUT = 2.0
+    ROUTER_HEDGE = True  # Send a second copy to another backend once a call runs past the p95
+    ROUTER_HEDGE_BUDGET = 0.1  # At most this share of calls is hedged
+    ROUTER_HEDGE_MIN_DELAY = 1.0  # Never hedge calls faster than this many seconds
+    ROUTER_HEDGE_MIN_SAMPLES = 20  # Latencies needed (per prompt size) before hedging starts
+
+    # Deterministic fake provider (benchmarks / load tests)
+    FAKE_LLM_LATENCY = 0.0  # Fixed seconds per call
+    FAKE_LLM_SECONDS_PER_CHAR = 0.0  # Simulated generation cost per output character
+    FAKE_LLM_OUTPUT_CHARS = 0  # Extra filler characters added to each response
@@ -0,0 +1,115 @@
+import hashlib
+import re
+from app.config import Config
+
+
+class TextChunker:
+    """
+    Splits segmented report text into token-budgeted windows.
+
+    Windows break on area boundaries ("Impacted Area ..." lines) so each area's
+    findings stay together in one prompt. A single area larger than the budget
+    is split on line boundaries.
+
+    Where to break is content-defined: a window ends after a block whose hash
+    falls below a threshold proportional to the block's size, so breaks land
+    on average every EXTRACTION_CHUNK_TARGET of the budget, or earlier when
+    the next block would not fit. A break chosen by hash depends only on that
+    block, so an edit changes the windows around it and later windows fall
+    back onto the same breaks (and their cached LLM responses) at the next
+    hash break instead of all shifting.
+    """
+
+    AREA_BOUNDARY = re.compile(r"^\s*impacted area\b", re.IGNORECASE)
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        #rough token estimate; good enough for budgeting prompt windows
+        return len(text) // Config.CHARS_PER_TOKEN + 1
+
+    @staticmethod
+    def split(text: str, max_tokens: int = None) -> list:
+        #returns list of text windows, each within the token budget
+        max_tokens = max_tokens or Config.EXTRACTION_CHUNK_TOKENS
+
+        if TextChunker.estimate_tokens(text) <= max_tokens:
+            return [text]
+
+        chunks = []
+        current = []
+        current_tokens = 0
+
+        target_tokens = max(1, max_tokens * Config.EXTRACTION_CHUNK_TARGET)
+
+        for block in TextChunker._area_blocks(text):
+            for piece in TextChunker._fit_block(block, max_tokens):
+                piece_tokens = TextChunker.estimate_tokens(piece)
+
+                if current and current_tokens + piece_tokens > max_tokens:
+                    chunks.append("\n".join(current))
+                    current = []
+                    current_tokens = 0
+
+                current.append(piece)
+                current_tokens += piece_tokens
+
+                if TextChunker._is_break(piece, piece_tokens / target_tokens):
+                    chunks.append("\n".join(current))
+                    current = []
+                    current_tokens = 0
+
+        if current:
+            chunks.append("\n".join(current))
+
+        return chunks
+
+    @staticmethod
+    def _is_break(piece: str, probability: float) -> bool:
+        #true for a stable pseudo-random share of pieces; a bigger piece is more
+        #likely to end a window, so breaks come every target_tokens on average
+        digest = hashlib.blake2b(piece.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big") < probability * 2 ** 64
+
+    @staticmethod
+    def _area_blocks(text: str) -> list:
+        #groups lines into blocks that each start at an area boundary
+        blocks = []
+        current = []
+
+        for line in text.splitlines():
+            if current and TextChunker.AREA_BOUNDARY.match(line):
+                blocks.append("\n".join(current))
+                current = []
+            current.append(line)
+
+        if current:
+            blocks.append("\n".join(current))
+
+        return blocks
+
+    @staticmethod
+    def _fit_block(block: str, max_tokens: int) -> list:
+        #splits an oversized block on line boundaries
+        if TextChunker.estimate_tokens(block) <= max_tokens:
+            return [block]
+
+        pieces = []
+        current = []
+        current_chars = 0
+        max_chars = max_tokens * Config.CHARS_PER_TOKEN
+
+        for line in block.splitlines():
+            # Very long lines are sliced rather than dropped
+            for start in range(0, max(len(line), 1), max_chars):
+                segment = line[start:start + max_chars]
+                if current and current_chars + len(segment) + 1 > max_chars:
+                    pieces.append("\n".join(current))
+                    current = []
+                    current_chars = 0
+                current.append(segment)
+                current_chars += len(segment) + 1
+
+        if current:
+            pieces.append("\n".join(current))
+
+        return pieces
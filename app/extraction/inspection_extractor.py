@@ -1,21 +1,21 @@
-import json
-import re
+import asyncio
+import contextvars
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+from app.extraction.chunker import TextChunker
 from app.extraction.llm_client import LLMClient
 from app.config import Config
+from app.processing.layout_parser import LayoutParser
+from app.utils.json_stream import IncrementalJSONParser
+from app.utils.tracing import Tracer, traced
 
 
 class InspectionExtractor:
 #extracts structured data from inspection report
 
-    def __init__(self):
-        self.client = LLMClient(Config.MODEL_EXTRACTION)
-
-    def extract(self, inspection_text: str) -> dict:
-        #returns structured data from inspection report
-        MAX_CHARS = 20000  # safe limit
-
-        inspection_text = inspection_text[:MAX_CHARS]
-        prompt = f"""
+    # Sent as the system prompt: identical for every call, so Ollama can reuse it as a cached prefix
+    SYSTEM_PROMPT = """
 You are extracting structured data from an Inspection Report.
 
 CRITICAL RULES:
@@ -29,68 +29,183 @@ CRITICAL RULES:
 
 Return this EXACT JSON structure:
 
-{{
+{
   "areas": [
-    {{
+    {
       "area_name": "string",
       "negative_findings": ["string"],
       "positive_findings": ["string"]
-    }}
+    }
   ],
   "general_observations": ["string"]
-}}
+}
+"""
+
+    def __init__(self):
+        self.client = LLMClient(Config.MODEL_EXTRACTION)
 
+    @traced("extract.inspection")
+    def extract(self, inspection_text: str, on_area: Optional[Callable] = None) -> dict:
+        #returns structured data from inspection report
+        #on_area(area) is called for each areas[] entry as soon as it is complete
+        chunks = TextChunker.split(inspection_text)
+        Tracer.set_attribute("extract.chunks", len(chunks))
+
+        if len(chunks) == 1:
+            return self._extract_chunk(chunks[0], on_area)
+
+        # Map: extract each window in parallel. Areas are relayed through a
+        # queue so on_area always runs on the caller's thread.
+        events = queue.Queue()
+        workers = min(Config.EXTRACTION_MAX_WORKERS, len(chunks))
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Each chunk runs in a copy of this context so its spans nest under ours
+            futures = [
+                pool.submit(contextvars.copy_context().run, self._extract_chunk, chunk, events.put)
+                for chunk in chunks
+            ]
+
+            while not all(f.done() for f in futures) or not events.empty():
+                try:
+                    area = events.get(timeout=0.05)
+                except queue.Empty:
+                    continue
+                if on_area:
+                    on_area(area)
+
+            partials = [f.result() for f in futures]
+
+        # Reduce: merge in chunk order so the result is deterministic
+        return self._merge(partials)
+
+    @traced("extract.inspection")
+    def extract_structured(self, parsed: dict, on_area: Optional[Callable] = None) -> dict:
+        #uses LayoutParser areas directly when they are trustworthy; otherwise
+        #the LLM extracts from the parsed areas' text instead of the whole report
+        confidence = parsed.get("confidence", 0.0)
+        trusted = confidence >= Config.INSPECTION_STRUCTURED_MIN_CONFIDENCE
+        Tracer.set_attribute("extract.structured", trusted)
+        Tracer.set_attribute("extract.confidence", round(confidence, 3))
+
+        if not trusted:
+            print(f"⚠ Structured inspection confidence {confidence:.2f} is below "
+                  f"{Config.INSPECTION_STRUCTURED_MIN_CONFIDENCE}, using the LLM")
+            return self.extract(LayoutParser.to_text(parsed), on_area=on_area)
+
+        result = self._merge([parsed])
+        print(f"✓ Inspection layout parsed: {len(result['areas'])} areas (confidence {confidence:.2f})")
+        if on_area:
+            for area in result["areas"]:
+                on_area(area)
+        return result
+
+    @traced("extract.inspection")
+    async def aextract(self, inspection_text: str) -> dict:
+        #awaitable counterpart of extract()
+        chunks = TextChunker.split(inspection_text)
+
+        responses = await asyncio.gather(*[
+            self.client.agenerate(
+                prompt=self._build_prompt(chunk),
+                temperature=Config.EXTRACTION_TEMPERATURE,
+                system=self.SYSTEM_PROMPT
+            )
+            for chunk in chunks
+        ])
+
+        return self._merge([self._parse_json(response) for response in responses])
+
+    @traced("extract.inspection.chunk")
+    def _extract_chunk(self, chunk_text: str, on_area: Optional[Callable] = None) -> dict:
+        #streams one window through the LLM; each window is cached separately
+        parser = IncrementalJSONParser("areas")
+
+        for chunk in self.client.stream(
+            prompt=self._build_prompt(chunk_text),
+            temperature=Config.EXTRACTION_TEMPERATURE,
+            system=self.SYSTEM_PROMPT
+        ):
+            for area in parser.feed(chunk):
+                area = self._coerce_area(area)
+                if on_area and area is not None:
+                    on_area(area)
+
+        return self._finish(parser)
+
+    @staticmethod
+    def _merge(partials: list) -> dict:
+        #merges per-window results, deduplicating areas by name in first-seen order
+        areas = {}
+        observations = []
+
+        for partial in partials:
+            entries = partial.get("areas")
+            for area in entries if isinstance(entries, list) else []:
+                area = InspectionExtractor._coerce_area(area)
+                if area is None:
+                    continue
+                name = str(area.get("area_name") or "Unknown Area")
+                key = " ".join(name.lower().split())
+
+                merged = areas.setdefault(key, {
+                    "area_name": name,
+                    "negative_findings": [],
+                    "positive_findings": []
+                })
+
+                for field in ("negative_findings", "positive_findings"):
+                    findings = area.get(field) or []
+                    if isinstance(findings, str):
+                        findings = [findings]
+                    for finding in findings:
+                        if finding not in merged[field]:
+                            merged[field].append(finding)
+
+            general = partial.get("general_observations") or []
+            if isinstance(general, str):
+                general = [general]
+            for observation in general:
+                if observation not in observations:
+                    observations.append(observation)
+
+        return {
+            "areas": list(areas.values()),
+            "general_observations": observations
+        }
+
+    @staticmethod
+    def _coerce_area(area) -> Optional[dict]:
+        #LLM output may list an area as a bare name, or as null; other non-objects are dropped
+        if isinstance(area, dict):
+            return area
+        if isinstance(area, str) and area.strip():
+            return {"area_name": area.strip()}
+        return None
+
+    def _build_prompt(self, inspection_text: str) -> str:
+        #only the report text varies; the instructions go in SYSTEM_PROMPT
+        return f"""
 Inspection Report:
 {inspection_text}
 
 Return only the JSON object, nothing else:
 """
 
-        response_text = self.client.generate(
-            prompt=prompt,
-            temperature=Config.EXTRACTION_TEMPERATURE
-        )
-
-        return self._parse_json(response_text)
-
     def _parse_json(self, response_text: str) -> dict:
         #returns parsed json from response text
+        parser = IncrementalJSONParser("areas")
+        parser.feed(response_text)
+        return self._finish(parser)
+
+    def _finish(self, parser: IncrementalJSONParser) -> dict:
+        #keeps every area completed before any truncation in the response
+        result = parser.close()
+
+        if not result:
+            print("\nParsing Error: No JSON object found in response.")
 
-        try:
-            # Remove markdown wrappers if present
-            response_text = response_text.strip()
-
-            if response_text.startswith("```"):
-                # Extract content between ``` markers
-                parts = response_text.split("```")
-                if len(parts) >= 3:
-                    response_text = parts[1]
-                    # Remove language identifier (json, JSON, etc.)
-                    if response_text.startswith("json"):
-                        response_text = response_text[4:].strip()
-                    elif response_text.startswith("JSON"):
-                        response_text = response_text[4:].strip()
-
-            # Extract first JSON object
-            match = re.search(r"\{.*\}", response_text, re.DOTALL)
-            if not match:
-                raise ValueError("No JSON object found in response.")
-
-            json_text = match.group()
-
-            
-            json_text = re.sub(r",\s*([}\]])", r"\1", json_text)
-            
-            
-            json_text = json_text[:json_text.rfind("}") + 1]
-
-            return json.loads(json_text)
-
-        except Exception as e:
-            
-            print(f"\nParsing Error: {str(e)}")
-            
-            return {
-                "areas": [],
-                "general_observations": []
-            }
+        return {
+            "areas": result.get("areas") or [],
+            "general_observations": result.get("general_observations") or []
+        }
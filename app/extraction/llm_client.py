@@ -1,10 +1,24 @@
+import asyncio
+import time
+from typing import Optional
 from app.config import Config
 from app.utils.cache_manager import CacheManager
-from app.extraction.providers import GeminiProvider, OllamaProvider
+from app.utils.single_flight import SingleFlight
+from app.utils.tracing import Tracer
+from app.extraction.providers import BaseLLMProvider, FakeLLMProvider, GeminiProvider, OllamaProvider, RouterProvider
 
 
 class LLMClient:
-    """Unified LLM client with caching, retry logic, and multi-provider support."""
+    """Unified LLM client with caching, retry logic, and multi-provider support.
+
+    Cache misses are single-flight: concurrent calls with the same cache key
+    share one provider call, within a process through a shared Future and
+    across processes through a lease in the cache backend (the other
+    processes wait for the holder's cached response).
+    """
+
+    # Shared by every client in the process so all of them coalesce
+    _flights = SingleFlight()
 
     def __init__(self, model_name: str):
         self.model_name = model_name
@@ -24,45 +38,265 @@ class LLMClient:
             return GeminiProvider(self.model_name)
         elif provider_type == "ollama":
             return OllamaProvider()
+        elif provider_type == "router":
+            return RouterProvider()
+        elif provider_type == "fake":
+            return FakeLLMProvider()
         else:
             raise ValueError(
                 f"Unknown LLM provider: {provider_type}. "
-                f"Supported: 'gemini', 'ollama'"
+                f"Supported: 'gemini', 'ollama', 'router', 'fake'"
             )
 
-    def generate(self, prompt: str, temperature: float) -> str:
-        """Generate text with caching and retry support."""
-        # Mock mode
-        if Config.USE_MOCK:
-            return self._mock_response(prompt)
-        
-        # Check cache first
-        if self.cache:
-            cached_response = self.cache.get(
+    def generate(self, prompt: str, temperature: float, system: Optional[str] = None) -> str:
+        """Generate text with caching and retry support.
+
+        system is a fixed instruction block shared by many calls; providers
+        that support it send it separately so it can be reused as a prefix.
+        """
+        with Tracer.span("llm.generate", **self._span_attributes(prompt, temperature, system)) as span:
+            # Mock mode
+            if Config.USE_MOCK:
+                response = self._mock_response(BaseLLMProvider.join_system(system, prompt))
+                span.set("llm.response_chars", len(response))
+                return response
+
+            # Check cache first
+            cached_response = self._cache_get(prompt, temperature, system)
+            span.set("cache.hit", bool(cached_response))
+            if cached_response:
+                span.set("llm.response_chars", len(cached_response))
+                return cached_response
+
+            # Generate new response (once, however many callers are waiting for it)
+            response, shared = self._generate_once(prompt, temperature, system, lambda: self.provider.generate(
                 prompt=prompt,
-                model=self.provider.get_model_name(),
-                temperature=temperature
-            )
+                temperature=temperature,
+                max_tokens=Config.MAX_OUTPUT_TOKENS,
+                system=system
+            ))
+            span.set("llm.response_chars", len(response))
+            span.set("llm.coalesced", shared)
+
+            return response
+
+    def stream(self, prompt: str, temperature: float, system: Optional[str] = None):
+        """Yield the response in chunks as the provider produces them.
+
+        Cache hits (and mock mode) yield the stored response in one chunk; a
+        fresh response is cached once the stream has been fully consumed.
+        """
+        # Not activated: the consumer's own spans run between our yields
+        with Tracer.span("llm.stream", activate=False,
+                         **self._span_attributes(prompt, temperature, system)) as span:
+            if Config.USE_MOCK:
+                response = self._mock_response(BaseLLMProvider.join_system(system, prompt))
+                span.set("llm.response_chars", len(response))
+                yield response
+                return
+
+            cached_response = self._cache_get(prompt, temperature, system)
+            span.set("cache.hit", bool(cached_response))
+            if cached_response:
+                span.set("llm.response_chars", len(cached_response))
+                yield cached_response
+                return
+
+            key = self._flight_key(prompt, temperature, system)
+            future, leader = self._flights.join(key) if key else (None, True)
+
+            # Another caller is already generating this response: wait for it
+            if not leader:
+                response = future.result()
+                span.set("llm.coalesced", True)
+                span.set("llm.response_chars", len(response))
+                yield response
+                return
+
+            try:
+                state, response = self._await_peer(key) if key else ("lease", None)
+                if state == "cached":
+                    yield response
+                else:
+                    chunks = []
+                    try:
+                        for chunk in self.provider.stream(
+                            prompt=prompt,
+                            temperature=temperature,
+                            max_tokens=Config.MAX_OUTPUT_TOKENS,
+                            system=system
+                        ):
+                            chunks.append(chunk)
+                            yield chunk
+
+                        response = "".join(chunks)
+                        span.set("llm.chunks", len(chunks))
+                        self._cache_set(prompt, temperature, response, system)
+                    finally:
+                        # Released only after caching, so waiters find the response
+                        if key and state == "lease":
+                            self.cache.release_lease(key)
+            except GeneratorExit:
+                # The consumer stopped early; waiters must not see a partial response
+                if future:
+                    self._flights.finish(key, future, error=RuntimeError("Shared LLM stream was abandoned"))
+                raise
+            except BaseException as e:
+                if future:
+                    self._flights.finish(key, future, error=e)
+                raise
+
+            if future:
+                self._flights.finish(key, future, result=response)
+            span.set("llm.coalesced", state == "cached")
+            span.set("llm.response_chars", len(response))
+
+    async def agenerate(self, prompt: str, temperature: float, deadline: float = None,
+                        system: Optional[str] = None) -> str:
+        """Awaitable counterpart of generate() using the provider's async transport."""
+        with Tracer.span("llm.agenerate", **self._span_attributes(prompt, temperature, system)) as span:
+            if Config.USE_MOCK:
+                response = self._mock_response(BaseLLMProvider.join_system(system, prompt))
+                span.set("llm.response_chars", len(response))
+                return response
+
+            cached_response = self._cache_get(prompt, temperature, system)
+            span.set("cache.hit", bool(cached_response))
             if cached_response:
+                span.set("llm.response_chars", len(cached_response))
                 return cached_response
-        
-        # Generate new response
-        response = self.provider.generate(
+
+            key = self._flight_key(prompt, temperature, system)
+            future, leader = self._flights.join(key) if key else (None, True)
+
+            if not leader:
+                response = await asyncio.wrap_future(future)
+                span.set("llm.coalesced", True)
+                span.set("llm.response_chars", len(response))
+                return response
+
+            try:
+                state, response = await self._aawait_peer(key) if key else ("lease", None)
+                if state != "cached":
+                    try:
+                        response = await self.provider.agenerate(
+                            prompt=prompt,
+                            temperature=temperature,
+                            max_tokens=Config.MAX_OUTPUT_TOKENS,
+                            deadline=deadline,
+                            system=system
+                        )
+                        self._cache_set(prompt, temperature, response, system)
+                    finally:
+                        if key and state == "lease":
+                            self.cache.release_lease(key)
+            except BaseException as e:
+                if future:
+                    self._flights.finish(key, future, error=e)
+                raise
+
+            if future:
+                self._flights.finish(key, future, result=response)
+            span.set("llm.coalesced", state == "cached")
+            span.set("llm.response_chars", len(response))
+
+            return response
+
+    def _flight_key(self, prompt: str, temperature: float, system: Optional[str] = None) -> Optional[str]:
+        #cache key used to coalesce identical calls; None when single-flight is off
+        if not (self.cache and Config.LLM_SINGLE_FLIGHT):
+            return None
+        return self.cache.cache_key(prompt, self.provider.get_model_name(), temperature, system)
+
+    def _generate_once(self, prompt: str, temperature: float, system: Optional[str], call) -> tuple:
+        #(response, shared): runs call() once per cache key across threads and processes
+        key = self._flight_key(prompt, temperature, system)
+        if key is None:
+            response = call()
+            self._cache_set(prompt, temperature, response, system)
+            return response, False
+
+        def lead():
+            state, response = self._await_peer(key)
+            if state == "cached":
+                return response, True
+            try:
+                response = call()
+                self._cache_set(prompt, temperature, response, system)
+            finally:
+                # Released only after caching, so waiters find the response
+                if state == "lease":
+                    self.cache.release_lease(key)
+            return response, False
+
+        (response, from_peer), shared = self._flights.do(key, lead)
+        return response, shared or from_peer
+
+    def _peer_state(self, key: str) -> tuple:
+        #("lease", None) if this process may generate, ("cached", response) if
+        #another process already did, ("wait", None) while another one is
+        if self.cache.acquire_lease(key):
+            # The holder may have finished between our cache miss and the lease
+            response = self.cache.peek(key)
+            if response is not None:
+                self.cache.release_lease(key)
+                return "cached", response
+            return "lease", None
+
+        response = self.cache.peek(key)
+        return ("cached", response) if response is not None else ("wait", None)
+
+    def _await_peer(self, key: str) -> tuple:
+        #waits while another process holds the lease; after LLM_LEASE_SECONDS
+        #this process generates anyway ("timeout")
+        give_up = time.monotonic() + Config.LLM_LEASE_SECONDS
+        while True:
+            state, response = self._peer_state(key)
+            if state != "wait":
+                return state, response
+            if time.monotonic() > give_up:
+                return "timeout", None
+            time.sleep(Config.LLM_LEASE_POLL_INTERVAL)
+
+    async def _aawait_peer(self, key: str) -> tuple:
+        give_up = time.monotonic() + Config.LLM_LEASE_SECONDS
+        while True:
+            state, response = self._peer_state(key)
+            if state != "wait":
+                return state, response
+            if time.monotonic() > give_up:
+                return "timeout", None
+            await asyncio.sleep(Config.LLM_LEASE_POLL_INTERVAL)
+
+    def _span_attributes(self, prompt: str, temperature: float, system: Optional[str] = None) -> dict:
+        if not Tracer.enabled():
+            return {}
+        return {
+            "llm.model": "mock" if self.provider is None else self.provider.get_model_name(),
+            "llm.temperature": temperature,
+            "llm.prompt_chars": len(prompt),
+            "llm.system_chars": len(system or "")
+        }
+
+    def _cache_get(self, prompt: str, temperature: float, system: Optional[str] = None):
+        if not self.cache:
+            return None
+        return self.cache.get(
             prompt=prompt,
+            model=self.provider.get_model_name(),
             temperature=temperature,
-            max_tokens=Config.MAX_OUTPUT_TOKENS
+            system=system
         )
-        
-        # Cache the response
+
+    def _cache_set(self, prompt: str, temperature: float, response: str, system: Optional[str] = None):
         if self.cache:
             self.cache.set(
                 prompt=prompt,
                 model=self.provider.get_model_name(),
                 temperature=temperature,
-                response=response
+                response=response,
+                system=system
             )
-        
-        return response
 
     def _mock_response(self, prompt: str):
         """
@@ -97,6 +331,17 @@ class LLMClient:
 }
             """
 
+        # DDR Builder, per-area call (fanout mode)
+        if '"severity_reason"' in prompt:
+            return """
+{
+  "observations": "- Dampness observed at skirting level",
+  "root_cause": "Possible water ingress at skirting level.",
+  "severity": "Moderate",
+  "severity_reason": "Visible dampness without structural damage."
+}
+            """
+
         # DDR Builder
         if '"property_summary"' in prompt:
             return """
@@ -3,11 +3,16 @@ LLM Provider implementations.
 """
 
 from app.extraction.providers.base_provider import BaseLLMProvider
+from app.extraction.providers.fake_provider import FakeLLMProvider
 from app.extraction.providers.gemini_provider import GeminiProvider
-from app.extraction.providers.ollama_provider import OllamaProvider
+from app.extraction.providers.ollama_provider import OllamaProvider, OllamaServerError
+from app.extraction.providers.router_provider import RouterProvider
 
 __all__ = [
     "BaseLLMProvider",
+    "FakeLLMProvider",
     "GeminiProvider",
-    "OllamaProvider"
+    "OllamaProvider",
+    "OllamaServerError",
+    "RouterProvider"
 ]
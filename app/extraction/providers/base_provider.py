@@ -1,4 +1,6 @@
+import asyncio
 from abc import ABC, abstractmethod
+from typing import Iterator
 
 
 class BaseLLMProvider(ABC):
@@ -6,10 +8,35 @@ class BaseLLMProvider(ABC):
     
 
     @abstractmethod
-    def generate(self, prompt: str, temperature: float, max_tokens: int) -> str:
-        #generate text from the LLM
+    def generate(self, prompt: str, temperature: float, max_tokens: int, system: str = None) -> str:
+        #generate text from the LLM; system is a fixed instruction block sent
+        #ahead of the prompt (the same for many calls)
         pass
 
+    async def agenerate(self, prompt: str, temperature: float, max_tokens: int,
+                        deadline: float = None, system: str = None) -> str:
+        #awaitable generate; providers without a native async transport run
+        #the blocking call on the default executor
+        call = asyncio.to_thread(self.generate, prompt, temperature, max_tokens, system)
+        if deadline is None:
+            return await call
+        return await asyncio.wait_for(call, timeout=deadline)
+
+    def stream(self, prompt: str, temperature: float, max_tokens: int,
+               system: str = None) -> Iterator[str]:
+        #yield the completion as text chunks; providers without a streaming
+        #transport yield the whole response once
+        yield self.generate(prompt, temperature, max_tokens, system)
+
+    def preload(self):
+        #load the model ahead of the first call; no-op for remote APIs
+        pass
+
+    @staticmethod
+    def join_system(system: str, prompt: str) -> str:
+        #one prompt text for providers without a separate system prompt
+        return f"{system}\n{prompt}" if system else prompt
+
     @abstractmethod
     def get_model_name(self) -> str:
         #get the model name for caching purposes
@@ -1,33 +1,141 @@
+import asyncio
 import google.generativeai as genai
 from app.config import Config
 from app.extraction.providers.base_provider import BaseLLMProvider
-from app.utils.retry_handler import retry_with_exponential_backoff
+from app.utils.rate_limiter import RateLimiter
+from app.utils.retry_handler import rate_limit_info
 
 
 class GeminiProvider(BaseLLMProvider):
-    """Google Gemini API provider."""
+    """
+    Google Gemini API provider.
+
+    Every call first takes a request and its estimated tokens from a
+    RateLimiter shared by all threads and processes, so the free-tier quota
+    (Config.GEMINI_RPM / GEMINI_TPM) is respected before the API has to
+    refuse a call. A 429 still slows the limiter down and the call is retried
+    up to Config.MAX_RETRIES times.
+    """
 
     def __init__(self, model_name: str):
         self.model_name = model_name
         genai.configure(api_key=Config.GEMINI_API_KEY)
         self.model = genai.GenerativeModel(model_name)
+        self.limiter = RateLimiter.shared(f"gemini:{model_name}", Config.GEMINI_RPM, Config.GEMINI_TPM)
+
+    @staticmethod
+    def _generation_config(temperature: float, max_tokens: int) -> dict:
+        return {
+            "temperature": temperature,
+            "max_output_tokens": max_tokens,
+            "top_p": 0.8
+        }
+
+    @staticmethod
+    def _estimate_tokens(prompt: str, max_tokens: int) -> int:
+        #reserve the prompt and the whole output budget; on_success() refunds the rest
+        return len(prompt) // Config.CHARS_PER_TOKEN + max_tokens
+
+    def _settle(self, reserved: int, response, estimated: int = None):
+        #estimated stands in when the response carries no usage (e.g. a broken stream)
+        usage = getattr(response, "usage_metadata", None)
+        self.limiter.on_success(reserved, getattr(usage, "total_token_count", None) or estimated)
+
+    def _should_retry(self, error: Exception, attempt: int) -> bool:
+        is_rate_limit, retry_after = rate_limit_info(error)
+        if not is_rate_limit or attempt == Config.MAX_RETRIES:
+            return False
+        wait_time = self.limiter.on_throttle(retry_after)
+        print(f"⚠ Rate limit hit. Retrying in {wait_time:.1f}s (attempt {attempt + 1}/{Config.MAX_RETRIES})...")
+        return True
+
+    def generate(self, prompt: str, temperature: float, max_tokens: int, system: str = None) -> str:
+        """Generate content using Gemini API with rate limiting and retry logic."""
+        prompt = self.join_system(system, prompt)
+        reserved = self._estimate_tokens(prompt, max_tokens)
+
+        for attempt in range(Config.MAX_RETRIES + 1):
+            self.limiter.acquire(reserved)
+            try:
+                response = self.model.generate_content(
+                    prompt,
+                    generation_config=self._generation_config(temperature, max_tokens)
+                )
+            except Exception as e:
+                if not self._should_retry(e, attempt):
+                    raise
+                continue
+
+            self._settle(reserved, response)
+            return response.text
+
+        raise Exception(f"Max retries ({Config.MAX_RETRIES}) exceeded")
+
+    async def agenerate(self, prompt: str, temperature: float, max_tokens: int,
+                        deadline: float = None, system: str = None) -> str:
+        """Native async generate; waiting for quota never blocks the event loop."""
+        call = self._agenerate(self.join_system(system, prompt), temperature, max_tokens)
+        if deadline is None:
+            return await call
+        return await asyncio.wait_for(call, timeout=deadline)
+
+    async def _agenerate(self, prompt: str, temperature: float, max_tokens: int) -> str:
+        reserved = self._estimate_tokens(prompt, max_tokens)
+
+        for attempt in range(Config.MAX_RETRIES + 1):
+            await self.limiter.aacquire(reserved)
+            try:
+                response = await self.model.generate_content_async(
+                    prompt,
+                    generation_config=self._generation_config(temperature, max_tokens)
+                )
+            except Exception as e:
+                if not self._should_retry(e, attempt):
+                    raise
+                continue
+
+            self._settle(reserved, response)
+            return response.text
+
+        raise Exception(f"Max retries ({Config.MAX_RETRIES}) exceeded")
+
+    def stream(self, prompt: str, temperature: float, max_tokens: int, system: str = None):
+        """Yield content chunks as Gemini streams them."""
+        prompt = self.join_system(system, prompt)
+        reserved = self._estimate_tokens(prompt, max_tokens)
+
+        for attempt in range(Config.MAX_RETRIES + 1):
+            self.limiter.acquire(reserved)
+            try:
+                response = self.model.generate_content(
+                    prompt,
+                    generation_config=self._generation_config(temperature, max_tokens),
+                    stream=True
+                )
+                iterator = iter(response)
+                first = next(iterator, None)
+            except Exception as e:
+                # Only a failure before the first chunk can be retried safely
+                if not self._should_retry(e, attempt):
+                    raise
+                continue
+
+            # Settled even if the stream breaks or is closed early, so the unused
+            # part of the reservation is refunded
+            produced = 0
+            try:
+                if first is not None and first.text:
+                    produced += len(first.text)
+                    yield first.text
+                for chunk in iterator:
+                    if chunk.text:
+                        produced += len(chunk.text)
+                        yield chunk.text
+            finally:
+                self._settle(reserved, response, (len(prompt) + produced) // Config.CHARS_PER_TOKEN)
+            return
 
-    @retry_with_exponential_backoff(
-        max_retries=Config.MAX_RETRIES,
-        initial_delay=Config.INITIAL_RETRY_DELAY,
-        max_delay=Config.MAX_RETRY_DELAY
-    )
-    def generate(self, prompt: str, temperature: float, max_tokens: int) -> str:
-        """Generate content using Gemini API with retry logic."""
-        response = self.model.generate_content(
-            prompt,
-            generation_config={
-                "temperature": temperature,
-                "max_output_tokens": max_tokens,
-                "top_p": 0.8
-            }
-        )
-        return response.text
+        raise Exception(f"Max retries ({Config.MAX_RETRIES}) exceeded")
 
     def get_model_name(self) -> str:
         return self.model_name
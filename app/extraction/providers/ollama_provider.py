@@ -1,55 +1,310 @@
+import asyncio
+import contextvars
+import json
+import queue
+import threading
+import time
+import weakref
 import requests
+from requests.adapters import HTTPAdapter
 from app.config import Config
 from app.extraction.providers.base_provider import BaseLLMProvider
+from app.utils.tracing import Tracer
+
+# A load_duration above this means the model was not resident
+_COLD_LOAD_SECONDS = 1.0
+
+
+class OllamaServerError(RuntimeError):
+    """Ollama answered with HTTP 5xx (runner crashed, out of memory, overloaded); another host may succeed."""
 
 
 class OllamaProvider(BaseLLMProvider):
-    """Ollama local LLM provider (no rate limits, free)."""
+    """
+    Ollama local LLM provider (no rate limits, free).
+
+    Fixed instructions are sent as the request's system prompt, so every
+    extraction call starts with the same tokens. While the model stays
+    loaded (Config.OLLAMA_KEEP_ALIVE), Ollama's runner reuses the KV cache
+    for that prefix and only evaluates the report text. The counts and
+    timings Ollama returns (prompt_eval_count, prompt_eval_duration,
+    load_duration) are added up in stats() and on the current span as
+    reported; a drop in prompt tokens per call between runs shows the reuse.
+    """
+
+    # Shared per-host transport state so every provider instance reuses the
+    # same keep-alive connections and respects one concurrency limit per host
+    _sync_pools = {}
+    _sync_lock = threading.Lock()
+    _async_pools = weakref.WeakKeyDictionary()
+
+    # Process-wide prompt evaluation counters
+    _usage = {
+        "calls": 0,
+        "prompt_tokens": 0,
+        "prompt_eval_seconds": 0.0,
+        "cold_loads": 0,
+        "load_seconds": 0.0
+    }
+    _usage_lock = threading.Lock()
 
-    def __init__(self, model_name: str = None):
+    def __init__(self, model_name: str = None, base_url: str = None):
         self.model_name = model_name or Config.OLLAMA_MODEL
-        self.base_url = Config.OLLAMA_BASE_URL
+        self.base_url = base_url or Config.OLLAMA_BASE_URL
+        self.timeout = getattr(Config, 'OLLAMA_TIMEOUT', 300)  # Default to 300 if not set
+        self.max_concurrency = getattr(Config, 'OLLAMA_MAX_CONCURRENCY_PER_HOST', 4)
 
-    def generate(self, prompt: str, temperature: float, max_tokens: int) -> str:
-        """Generate content using Ollama API."""
-        url = f"{self.base_url}/api/generate"
-        timeout = getattr(Config, 'OLLAMA_TIMEOUT', 300)  # Default to 300 if not set
-        
+    def _build_payload(self, prompt: str, temperature: float, max_tokens: int,
+                       stream: bool = False, system: str = None) -> dict:
         payload = {
             "model": self.model_name,
             "prompt": prompt,
-            "stream": False,
+            "stream": stream,
             "options": {
                 "temperature": temperature,
                 "num_predict": max_tokens
             }
         }
+        if system:
+            payload["system"] = system
+        if Config.OLLAMA_KEEP_ALIVE is not None:
+            payload["keep_alive"] = Config.OLLAMA_KEEP_ALIVE
+        return payload
+
+    def _record_usage(self, data: dict):
+        #adds the timings of a finished /api/generate call to the counters and the span
+        evaluated = data.get("prompt_eval_count") or 0
+        eval_seconds = (data.get("prompt_eval_duration") or 0) / 1e9
+        load_seconds = (data.get("load_duration") or 0) / 1e9
+
+        with self._usage_lock:
+            usage = self._usage
+            usage["calls"] += 1
+            usage["prompt_tokens"] += evaluated
+            usage["prompt_eval_seconds"] += eval_seconds
+            usage["load_seconds"] += load_seconds
+            if load_seconds > _COLD_LOAD_SECONDS:
+                usage["cold_loads"] += 1
+
+        Tracer.set_attribute("llm.prompt_eval_tokens", evaluated)
+        Tracer.set_attribute("llm.prompt_eval_ms", round(eval_seconds * 1000, 1))
+        Tracer.set_attribute("llm.load_ms", round(load_seconds * 1000, 1))
+
+    @classmethod
+    def stats(cls) -> dict:
+        """Return process-wide prompt evaluation totals as reported by Ollama."""
+        with cls._usage_lock:
+            usage = dict(cls._usage)
+        usage["prompt_eval_seconds"] = round(usage["prompt_eval_seconds"], 3)
+        usage["load_seconds"] = round(usage["load_seconds"], 3)
+        return usage
+
+    def preload(self):
+        """Load the model (and keep it loaded for OLLAMA_KEEP_ALIVE) before the first job."""
+        payload = {"model": self.model_name}
+        if Config.OLLAMA_KEEP_ALIVE is not None:
+            payload["keep_alive"] = Config.OLLAMA_KEEP_ALIVE
+        session, _ = self._sync_pool()
 
         try:
-            response = requests.post(url, json=payload, timeout=timeout)
+            started = time.perf_counter()
+            response = session.post(f"{self.base_url}/api/generate", json=payload, timeout=self.timeout)
             response.raise_for_status()
-            return response.json()["response"]
-            
-        except requests.exceptions.Timeout:
-            raise TimeoutError(
-                f"Ollama request timed out after {timeout} seconds. The model '{self.model_name}' may be too slow.\n"
-                f"Suggestions:\n"
-                f"  1. Try a smaller/faster model: ollama pull llama3.2:1b\n"
-                f"  2. Reduce the prompt length\n"
-                f"  3. Use a GPU-accelerated setup\n"
-                f"  4. Switch to Gemini provider in config.py\n"
-                f"  5. Increase OLLAMA_TIMEOUT in config.py"
-            )
-        except requests.exceptions.ConnectionError:
-            raise ConnectionError(
-                f"Could not connect to Ollama at {self.base_url}. \n"
-                f"Make sure Ollama is running and the model '{self.model_name}' is installed.\n"
-                f"Install: https://ollama.ai\n"
-                f"Run: ollama pull {self.model_name}"
+            print(f"✓ Ollama model '{self.model_name}' loaded on {self.base_url} "
+                  f"({time.perf_counter() - started:.1f}s)")
+        except Exception as e:
+            print(f"⚠ Could not preload Ollama model '{self.model_name}' on {self.base_url}: {e}")
+
+    def _sync_pool(self) -> tuple:
+        """Return the (session, semaphore) pair shared by all callers of this host."""
+        with self._sync_lock:
+            pool = self._sync_pools.get(self.base_url)
+            if pool is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                pool = (session, threading.BoundedSemaphore(self.max_concurrency))
+                self._sync_pools[self.base_url] = pool
+            return pool
+
+    def _async_pool(self) -> tuple:
+        """Return the (ClientSession, Semaphore) pair for this host on the running loop."""
+        import aiohttp
+
+        loop = asyncio.get_running_loop()
+        pools = self._async_pools.setdefault(loop, {})
+        pool = pools.get(self.base_url)
+        if pool is None or pool[0].closed:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=self.max_concurrency,
+                keepalive_timeout=60
             )
+            pool = (aiohttp.ClientSession(connector=connector),
+                    asyncio.Semaphore(self.max_concurrency))
+            pools[self.base_url] = pool
+        return pool
+
+    def generate(self, prompt: str, temperature: float, max_tokens: int, system: str = None) -> str:
+        """Generate content using Ollama API."""
+        url = f"{self.base_url}/api/generate"
+        timeout = Config.OLLAMA_REQUEST_DEADLINE or self.timeout
+        payload = self._build_payload(prompt, temperature, max_tokens, system=system)
+        session, semaphore = self._sync_pool()
+
+        try:
+            # Time spent waiting for a free slot counts against the deadline
+            started = time.monotonic()
+            if not semaphore.acquire(timeout=timeout):
+                raise self._timeout_error(timeout)
+            try:
+                response = session.post(url, json=payload, timeout=self._remaining(timeout, started))
+            finally:
+                semaphore.release()
+            if response.status_code >= 500:
+                raise self._server_error(response.status_code, response.text)
+            response.raise_for_status()
+            data = response.json()
+            self._record_usage(data)
+            return data["response"]
+
+        except Exception as e:
+            raise self._api_error(e, timeout)
+
+    def stream(self, prompt: str, temperature: float, max_tokens: int, system: str = None):
+        """Yield response tokens as Ollama produces them (newline-delimited JSON)."""
+        url = f"{self.base_url}/api/generate"
+        timeout = Config.OLLAMA_REQUEST_DEADLINE or self.timeout
+        payload = self._build_payload(prompt, temperature, max_tokens, stream=True, system=system)
+        session, semaphore = self._sync_pool()
+        chunks = queue.Queue()
+        abandoned = threading.Event()
+
+        def read(started: float):
+            # Runs on its own thread and holds the host slot only while Ollama
+            # is generating; a slow consumer reads from the queue instead
+            try:
+                try:
+                    # The timeout bounds the wait between chunks, not the whole stream
+                    with session.post(url, json=payload, timeout=self._remaining(timeout, started),
+                                      stream=True) as response:
+                        if response.status_code >= 500:
+                            raise self._server_error(response.status_code, response.text)
+                        response.raise_for_status()
+                        for line in response.iter_lines():
+                            if abandoned.is_set():
+                                return
+                            if not line:
+                                continue
+                            data = json.loads(line)
+                            if data.get("error"):
+                                raise RuntimeError(data["error"])
+                            if data.get("response"):
+                                chunks.put(("chunk", data["response"]))
+                            if data.get("done"):
+                                self._record_usage(data)
+                                break
+                finally:
+                    semaphore.release()
+                chunks.put(("done", None))
+            except Exception as e:
+                chunks.put(("error", e))
+
+        started = time.monotonic()
+        if not semaphore.acquire(timeout=timeout):
+            raise self._timeout_error(timeout)
+        # The copied context keeps the usage attributes on the caller's span
+        threading.Thread(target=contextvars.copy_context().run, args=(read, started), daemon=True).start()
+
+        try:
+            while True:
+                kind, value = chunks.get()
+                if kind == "chunk":
+                    yield value
+                elif kind == "error":
+                    raise self._api_error(value, timeout)
+                else:
+                    return
+        finally:
+            abandoned.set()
+
+    @staticmethod
+    def _remaining(timeout: float, started: float) -> float:
+        #what is left of timeout after waiting since started (monotonic)
+        return max(0.1, timeout - (time.monotonic() - started))
+
+    def _api_error(self, error: Exception, timeout: float) -> Exception:
+        #the exception a failed sync call raises to the caller
+        if isinstance(error, (TimeoutError, ConnectionError, OllamaServerError)):
+            return error
+        if isinstance(error, requests.exceptions.Timeout):
+            return self._timeout_error(timeout)
+        if isinstance(error, requests.exceptions.ConnectionError):
+            return self._connection_error()
+        return RuntimeError(f"Ollama API error: {str(error)}")
+
+    async def agenerate(self, prompt: str, temperature: float, max_tokens: int,
+                        deadline: float = None, system: str = None) -> str:
+        """Generate content using a pooled, keep-alive aiohttp session."""
+        import aiohttp
+
+        url = f"{self.base_url}/api/generate"
+        deadline = deadline or Config.OLLAMA_REQUEST_DEADLINE or self.timeout
+        payload = self._build_payload(prompt, temperature, max_tokens, system=system)
+        session, semaphore = self._async_pool()
+
+        async def _call():
+            # Time spent waiting for a free slot counts against the deadline
+            async with semaphore:
+                async with session.post(url, json=payload) as response:
+                    if response.status >= 500:
+                        raise self._server_error(response.status, await response.text())
+                    response.raise_for_status()
+                    data = await response.json(content_type=None)
+                    self._record_usage(data)
+                    return data["response"]
+
+        try:
+            return await asyncio.wait_for(_call(), timeout=deadline)
+
+        except asyncio.TimeoutError:
+            raise self._timeout_error(deadline)
+        except aiohttp.ClientConnectionError:
+            raise self._connection_error()
+        except OllamaServerError:
+            raise
         except Exception as e:
             raise RuntimeError(f"Ollama API error: {str(e)}")
 
+    @classmethod
+    async def aclose(cls):
+        """Close the pooled async sessions opened on the running loop."""
+        pools = cls._async_pools.pop(asyncio.get_running_loop(), {})
+        for session, _ in pools.values():
+            await session.close()
+
+    def _timeout_error(self, timeout: float) -> TimeoutError:
+        return TimeoutError(
+            f"Ollama request timed out after {timeout} seconds. The model '{self.model_name}' may be too slow.\n"
+            f"Suggestions:\n"
+            f"  1. Try a smaller/faster model: ollama pull llama3.2:1b\n"
+            f"  2. Reduce the prompt length\n"
+            f"  3. Use a GPU-accelerated setup\n"
+            f"  4. Switch to Gemini provider in config.py\n"
+            f"  5. Increase OLLAMA_TIMEOUT in config.py"
+        )
+
+    def _server_error(self, status: int, body: str) -> OllamaServerError:
+        return OllamaServerError(f"Ollama at {self.base_url} returned HTTP {status}: {body[:200]}")
+
+    def _connection_error(self) -> ConnectionError:
+        return ConnectionError(
+            f"Could not connect to Ollama at {self.base_url}. \n"
+            f"Make sure Ollama is running and the model '{self.model_name}' is installed.\n"
+            f"Install: https://ollama.ai\n"
+            f"Run: ollama pull {self.model_name}"
+        )
+
     def get_model_name(self) -> str:
         """Get the model name for caching purposes."""
         return f"ollama:{self.model_name}"
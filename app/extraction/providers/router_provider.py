@@ -0,0 +1,434 @@
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Optional
+from app.config import Config
+from app.extraction.providers.base_provider import BaseLLMProvider
+from app.extraction.providers.ollama_provider import OllamaProvider, OllamaServerError
+from app.utils.tracing import Tracer
+
+
+class _Backend:
+    #routing state of one Ollama host, shared by every RouterProvider in the process
+
+    def __init__(self, base_url: str, model_name: str):
+        self.base_url = base_url
+        self.provider = OllamaProvider(model_name, base_url)
+        self.outstanding = 0
+        self.ewma = None  # Smoothed latency in seconds; None until the first response
+        self.latencies = {}  # Prompt size class -> recent latencies (for the hedge delay)
+        self.failures = 0  # Consecutive failures
+        self.opened_at = None  # Circuit breaker open since (None = closed)
+        self.trial = False  # A half-open trial request is in flight
+        self.served = 0
+        self.errors = 0
+
+    def state(self, now: float) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if now - self.opened_at >= Config.ROUTER_OPEN_SECONDS:
+            return "half-open"
+        return "open"
+
+
+class RouterProvider(BaseLLMProvider):
+    """
+    Spreads LLM calls over several Ollama hosts serving the same model.
+
+    Each call goes to the available backend with the fewest outstanding
+    requests ("least_outstanding") or the lowest latency EWMA weighted by
+    its outstanding requests ("ewma"). Backends that fail
+    Config.ROUTER_FAILURE_THRESHOLD times in a row (calls or background
+    health checks) are ejected for Config.ROUTER_OPEN_SECONDS, then get one
+    trial request. Connection failures move the call to the next backend,
+    and a call still running past the p95 latency of similar-sized prompts
+    is hedged to a second backend; the first response wins.
+
+    get_model_name() does not depend on the backend, so cache keys and
+    single-flight coalescing are the same whichever host answered.
+    """
+
+    _backends = {}
+    _lock = threading.Lock()
+    _health_thread = None
+    _executor = None
+    requests = 0
+    hedges = 0
+    hedge_wins = 0
+
+    def __init__(self, model_name: str = None, backends: list = None):
+        self.model_name = model_name or Config.OLLAMA_MODEL
+        urls = backends or Config.ROUTER_BACKENDS or [Config.OLLAMA_BASE_URL]
+        with self._lock:
+            self.backends = []
+            for url in urls:
+                key = (url.rstrip("/"), self.model_name)
+                if key not in self._backends:
+                    self._backends[key] = _Backend(key[0], self.model_name)
+                self.backends.append(self._backends[key])
+        self._start_health_checks()
+
+    def get_model_name(self) -> str:
+        # Same as OllamaProvider so single-host and routed runs share the cache
+        return f"ollama:{self.model_name}"
+
+    # --- backend selection -------------------------------------------------
+
+    def _pick(self, exclude: tuple = ()) -> _Backend:
+        #reserves an outstanding slot on the best available backend
+        now = time.time()
+        with self._lock:
+            candidates = []
+            for backend in self.backends:
+                if backend in exclude:
+                    continue
+                state = backend.state(now)
+                if state == "open" or (state == "half-open" and backend.trial):
+                    continue
+                candidates.append(backend)
+
+            if not candidates:
+                raise ConnectionError(
+                    f"No healthy Ollama backends for '{self.model_name}' "
+                    f"({', '.join(b.base_url for b in self.backends)})"
+                )
+
+            if Config.ROUTER_POLICY == "ewma":
+                # Unmeasured backends score 0 so each gets tried at least once
+                score = lambda b: ((b.ewma or 0.0) * (b.outstanding + 1), b.outstanding)
+            else:
+                score = lambda b: (b.outstanding, b.ewma or 0.0)
+            backend = min(candidates, key=score)
+
+            if backend.state(now) == "half-open":
+                backend.trial = True
+            backend.outstanding += 1
+            return backend
+
+    def _release(self, backend: _Backend, started: float, prompt: str, error: Exception = None):
+        elapsed = time.time() - started
+        with self._lock:
+            backend.outstanding -= 1
+            backend.trial = False
+            if error is None:
+                backend.served += 1
+                backend.failures = 0
+                backend.opened_at = None
+                alpha = Config.ROUTER_EWMA_ALPHA
+                backend.ewma = elapsed if backend.ewma is None else alpha * elapsed + (1 - alpha) * backend.ewma
+                window = backend.latencies.setdefault(self._size_class(prompt), deque(maxlen=100))
+                window.append(elapsed)
+            elif self._is_backend_failure(error):
+                backend.errors += 1
+                self._record_failure(backend)
+
+    @staticmethod
+    def _record_failure(backend: _Backend):
+        #caller holds _lock
+        backend.failures += 1
+        if backend.failures >= Config.ROUTER_FAILURE_THRESHOLD or backend.opened_at is not None:
+            if backend.opened_at is None:
+                print(f"⚠ Ollama backend {backend.base_url} ejected after {backend.failures} failures")
+            backend.opened_at = time.time()
+
+    @staticmethod
+    def _is_backend_failure(error: Exception) -> bool:
+        #connection problems, timeouts and 5xx answers are the host's fault; other
+        #errors (e.g. a bad request) would fail on every host
+        return isinstance(error, (ConnectionError, TimeoutError, asyncio.TimeoutError, OllamaServerError))
+
+    # --- hedging -------------------------------------------------------------
+
+    @staticmethod
+    def _size_class(prompt: str) -> int:
+        #latency grows with the prompt, so p95s are kept per power-of-two prompt size
+        return int(math.log2(len(prompt) + 1))
+
+    def _hedge_delay(self, prompt: str) -> Optional[float]:
+        #p95 latency of similar prompts across all backends; None = do not hedge
+        with self._lock:
+            RouterProvider.requests += 1
+        if not Config.ROUTER_HEDGE or len(self.backends) < 2:
+            return None
+        size_class = self._size_class(prompt)
+        with self._lock:
+            samples = sorted(
+                latency for backend in self.backends
+                for latency in backend.latencies.get(size_class, ())
+            )
+        if len(samples) < Config.ROUTER_HEDGE_MIN_SAMPLES:
+            return None
+        # The floor keeps scheduling noise on fast calls from spending the budget
+        return max(Config.ROUTER_HEDGE_MIN_DELAY, samples[min(len(samples) - 1, int(len(samples) * 0.95))])
+
+    def _may_hedge(self) -> bool:
+        #hedges are capped at Config.ROUTER_HEDGE_BUDGET of all calls so a
+        #slow period cannot double the load on every backend
+        with self._lock:
+            if RouterProvider.hedges >= Config.ROUTER_HEDGE_BUDGET * RouterProvider.requests:
+                return False
+            RouterProvider.hedges += 1
+            return True
+
+    def _pick_hedge(self, tried: list) -> Optional[_Backend]:
+        #a second backend for a slow call, or None (no budget or no other healthy backend)
+        if not self._may_hedge():
+            return None
+        try:
+            backend = self._pick(tuple(tried))
+        except ConnectionError:
+            with self._lock:
+                RouterProvider.hedges -= 1
+            return None
+        tried.append(backend)
+        Tracer.set_attribute("llm.hedged", True)
+        return backend
+
+    @classmethod
+    def _pool(cls) -> ThreadPoolExecutor:
+        with cls._lock:
+            if cls._executor is None:
+                # Losing hedges keep their thread until the host answers, so
+                # size for every slot on every backend rather than for the CPUs
+                workers = 2 * Config.OLLAMA_MAX_CONCURRENCY_PER_HOST * max(1, len(cls._backends))
+                cls._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-router")
+            return cls._executor
+
+    # --- calls ---------------------------------------------------------------
+
+    def _call(self, backend: _Backend, prompt: str, temperature: float, max_tokens: int,
+              system: str = None) -> str:
+        started = time.time()
+        try:
+            response = backend.provider.generate(prompt, temperature, max_tokens, system)
+        except Exception as e:
+            self._release(backend, started, prompt, e)
+            raise
+        self._release(backend, started, prompt)
+        return response
+
+    def generate(self, prompt: str, temperature: float, max_tokens: int, system: str = None) -> str:
+        """Generate on the best backend, failing over and hedging as needed."""
+        tried = []
+        hedge_delay = self._hedge_delay(prompt)
+
+        while True:
+            backend = self._pick(tuple(tried))
+            tried.append(backend)
+            try:
+                if hedge_delay is None:
+                    response = self._call(backend, prompt, temperature, max_tokens, system)
+                else:
+                    response, backend = self._hedged(backend, tried, hedge_delay, prompt, temperature,
+                                                     max_tokens, system)
+                Tracer.set_attribute("llm.backend", backend.base_url)
+                return response
+            except Exception as e:
+                if not self._is_backend_failure(e) or len(tried) >= len(self.backends):
+                    raise
+                print(f"⚠ Ollama backend {backend.base_url} failed, retrying on another host: {e}")
+
+    def _hedged(self, primary: _Backend, tried: list, delay: float, prompt: str,
+                temperature: float, max_tokens: int, system: str = None) -> tuple:
+        #(response, backend): starts a second backend if the first is slower than delay
+        pool = self._pool()
+        calls = {pool.submit(self._call, primary, prompt, temperature, max_tokens, system): primary}
+        done, _ = wait(calls, timeout=delay)
+
+        if not done:
+            secondary = self._pick_hedge(tried)
+            if secondary is not None:
+                calls[pool.submit(self._call, secondary, prompt, temperature, max_tokens, system)] = secondary
+
+        # The first successful response wins; the slower call finishes in the
+        # background (its latency still feeds the statistics)
+        pending = set(calls)
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if calls[future] is not primary:
+                        with self._lock:
+                            RouterProvider.hedge_wins += 1
+                    return future.result(), calls[future]
+                error = error or future.exception()
+        raise error
+
+    async def agenerate(self, prompt: str, temperature: float, max_tokens: int,
+                        deadline: float = None, system: str = None) -> str:
+        """Async generate with the same routing, failover and hedging as generate()."""
+        call = self._agenerate(prompt, temperature, max_tokens, deadline, system)
+        if deadline is None:
+            return await call
+        return await asyncio.wait_for(call, timeout=deadline)
+
+    async def _acall(self, backend: _Backend, prompt: str, temperature: float, max_tokens: int,
+                     deadline: float = None, system: str = None) -> str:
+        started = time.time()
+        try:
+            response = await backend.provider.agenerate(prompt, temperature, max_tokens, deadline, system)
+        except asyncio.CancelledError:
+            # A hedge lost the race; not the backend's fault
+            with self._lock:
+                backend.outstanding -= 1
+                backend.trial = False
+            raise
+        except Exception as e:
+            self._release(backend, started, prompt, e)
+            raise
+        self._release(backend, started, prompt)
+        return response
+
+    async def _agenerate(self, prompt: str, temperature: float, max_tokens: int,
+                         deadline: float = None, system: str = None) -> str:
+        tried = []
+        hedge_delay = self._hedge_delay(prompt)
+
+        while True:
+            backend = self._pick(tuple(tried))
+            tried.append(backend)
+            tasks = {asyncio.ensure_future(
+                self._acall(backend, prompt, temperature, max_tokens, deadline, system)
+            ): backend}
+            try:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+                if not done:
+                    secondary = self._pick_hedge(tried)
+                    if secondary is not None:
+                        tasks[asyncio.ensure_future(
+                            self._acall(secondary, prompt, temperature, max_tokens, deadline, system)
+                        )] = secondary
+
+                pending = set(tasks)
+                error = None
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.exception() is None:
+                            if tasks[task] is not backend:
+                                with self._lock:
+                                    RouterProvider.hedge_wins += 1
+                            Tracer.set_attribute("llm.backend", tasks[task].base_url)
+                            return task.result()
+                        error = error or task.exception()
+                raise error
+            except Exception as e:
+                if not self._is_backend_failure(e) or len(tried) >= len(self.backends):
+                    raise
+                print(f"⚠ Ollama backend {backend.base_url} failed, retrying on another host: {e}")
+            finally:
+                for task in tasks:
+                    if not task.done():
+                        task.cancel()
+
+    def stream(self, prompt: str, temperature: float, max_tokens: int, system: str = None):
+        """Stream from the best backend; fails over only before the first chunk."""
+        tried = []
+
+        while True:
+            backend = self._pick(tuple(tried))
+            tried.append(backend)
+            started = time.time()
+            received = False
+            try:
+                for chunk in backend.provider.stream(prompt, temperature, max_tokens, system):
+                    received = True
+                    yield chunk
+            except Exception as e:
+                self._release(backend, started, prompt, e)
+                if received or not self._is_backend_failure(e) or len(tried) >= len(self.backends):
+                    raise
+                print(f"⚠ Ollama backend {backend.base_url} failed, retrying on another host: {e}")
+                continue
+            except BaseException:
+                # Consumer stopped early (GeneratorExit)
+                with self._lock:
+                    backend.outstanding -= 1
+                    backend.trial = False
+                raise
+            self._release(backend, started, prompt)
+            return
+
+    def preload(self):
+        """Load the model on every backend so no job pays for a cold start."""
+        for backend in self.backends:
+            backend.provider.preload()
+
+    # --- health checks -------------------------------------------------------
+
+    @classmethod
+    def _start_health_checks(cls):
+        if not Config.ROUTER_HEALTH_INTERVAL:
+            return
+        with cls._lock:
+            if cls._health_thread is None:
+                cls._health_thread = threading.Thread(
+                    target=cls._health_loop, name="llm-router-health", daemon=True
+                )
+                cls._health_thread.start()
+
+    @classmethod
+    def _health_loop(cls):
+        while True:
+            time.sleep(Config.ROUTER_HEALTH_INTERVAL)
+            with cls._lock:
+                backends = list(cls._backends.values())
+            for backend in backends:
+                cls.check_health(backend)
+
+    @classmethod
+    def check_health(cls, backend: _Backend) -> bool:
+        #GET /api/tags; a host that lists the model closes its circuit, an unreachable
+        #host or one without the model counts as a failure
+        session, _ = backend.provider._sync_pool()
+        try:
+            response = session.get(f"{backend.base_url}/api/tags", timeout=Config.ROUTER_HEALTH_TIMEOUT)
+            response.raise_for_status()
+            healthy = cls._has_model(response.json(), backend.provider.model_name)
+        except Exception:
+            healthy = False
+
+        with cls._lock:
+            if healthy:
+                if backend.opened_at is not None:
+                    print(f"✓ Ollama backend {backend.base_url} is reachable again")
+                backend.failures = 0
+                backend.opened_at = None
+            else:
+                cls._record_failure(backend)
+        return healthy
+
+    @staticmethod
+    def _has_model(tags: dict, model_name: str) -> bool:
+        #Ollama lists models with their tag ("llama3.2:latest"); an untagged name means :latest
+        wanted = model_name if ":" in model_name else f"{model_name}:latest"
+        return any(
+            wanted in (model.get("name"), model.get("model"))
+            for model in tags.get("models") or ()
+        )
+
+    def stats(self) -> dict:
+        """Return per-backend load, latency and circuit state plus hedge counts."""
+        now = time.time()
+        with self._lock:
+            backends = {}
+            for backend in self.backends:
+                samples = sorted(latency for window in backend.latencies.values() for latency in window)
+                backends[backend.base_url] = {
+                    "state": backend.state(now),
+                    "outstanding": backend.outstanding,
+                    "served": backend.served,
+                    "errors": backend.errors,
+                    "ewma_seconds": round(backend.ewma, 3) if backend.ewma is not None else None,
+                    "p95_seconds": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3) if samples else None
+                }
+            return {
+                "backends": backends,
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins
+            }
@@ -1,18 +1,16 @@
-import json
-import re
+from typing import Optional
 from app.extraction.llm_client import LLMClient
+from app.extraction.thermal_parser import ThermalTemplateParser
 from app.config import Config
+from app.utils.json_stream import IncrementalJSONParser
+from app.utils.tracing import Tracer, traced
 
 
 class ThermalExtractor:
     #extract thermal data from thermal report
 
-    def __init__(self):
-        self.client = LLMClient(Config.MODEL_EXTRACTION)
-
-    def extract(self, thermal_text: str) -> dict:
-
-        prompt = f"""
+    # Sent as the system prompt: identical for every call, so Ollama can reuse it as a cached prefix
+    SYSTEM_PROMPT = """
 You are extracting structured thermal data from a Thermal Report.
 
 STRICT RULES:
@@ -25,36 +23,91 @@ STRICT RULES:
 
 Return format:
 
-{{
+{
   "thermal_readings": [
-    {{
+    {
       "image_id": "",
       "hotspot": "",
       "coldspot": ""
-    }}
+    }
   ]
-}}
-
-Thermal Report:
-{thermal_text}
+}
 """
 
-        response_text = self.client.generate(
-            prompt=prompt,
-            temperature=Config.EXTRACTION_TEMPERATURE
+    def __init__(self):
+        self.client = LLMClient(Config.MODEL_EXTRACTION)
+
+    @traced("extract.thermal")
+    def extract(self, thermal_text: str) -> dict:
+
+        result = self._fast_path(thermal_text)
+        if result is not None:
+            return result
+
+        parser = IncrementalJSONParser("thermal_readings")
+
+        for chunk in self.client.stream(
+            prompt=self._build_prompt(thermal_text),
+            temperature=Config.EXTRACTION_TEMPERATURE,
+            system=self.SYSTEM_PROMPT
+        ):
+            parser.feed(chunk)
+
+        return self._finish(parser)
+
+    @traced("extract.thermal")
+    async def aextract(self, thermal_text: str) -> dict:
+        #awaitable counterpart of extract()
+        result = self._fast_path(thermal_text)
+        if result is not None:
+            return result
+
+        response_text = await self.client.agenerate(
+            prompt=self._build_prompt(thermal_text),
+            temperature=Config.EXTRACTION_TEMPERATURE,
+            system=self.SYSTEM_PROMPT
         )
 
         return self._parse_json(response_text)
 
+    def _fast_path(self, thermal_text: str) -> Optional[dict]:
+        #readings parsed from a known template, or None when the LLM is needed
+        if not Config.THERMAL_FAST_PATH:
+            Tracer.set_attribute("extract.fast_path", False)
+            return None
+
+        result, confidence = ThermalTemplateParser.parse(thermal_text)
+        trusted = confidence >= Config.THERMAL_FAST_PATH_MIN_CONFIDENCE
+        Tracer.set_attribute("extract.fast_path", trusted)
+        Tracer.set_attribute("extract.confidence", round(confidence, 3))
+
+        if trusted:
+            print(f"✓ Thermal template parsed: {len(result['thermal_readings'])} readings "
+                  f"(confidence {confidence:.2f})")
+            return result
+
+        if result is not None:
+            print(f"⚠ Thermal template confidence {confidence:.2f} is below "
+                  f"{Config.THERMAL_FAST_PATH_MIN_CONFIDENCE}, using the LLM")
+        return None
+
+    def _build_prompt(self, thermal_text: str) -> str:
+        #only the report text varies; the instructions go in SYSTEM_PROMPT
+        return f"""
+Thermal Report:
+{thermal_text}
+"""
+
     def _parse_json(self, response_text: str) -> dict:
         #extracting json from response text
+        parser = IncrementalJSONParser("thermal_readings")
+        parser.feed(response_text)
+        return self._finish(parser)
+
+    def _finish(self, parser: IncrementalJSONParser) -> dict:
+        result = parser.close()
 
-        try:
-            cleaned = re.search(r"\{.*\}", response_text, re.DOTALL)
-            if cleaned:
-                return json.loads(cleaned.group())
-            else:
-                raise ValueError("No valid JSON found in response.")
+        if not result:
+            raise RuntimeError("Failed to parse thermal extraction JSON: No valid JSON found in response.")
 
-        except Exception as e:
-            raise RuntimeError(f"Failed to parse thermal extraction JSON: {str(e)}")
+        return result
@@ -0,0 +1,110 @@
+"""
+Rule-based extraction of thermal readings from known report templates.
+
+Thermal cameras export one page per image with the same labels every time,
+so the readings can be read straight from the parsed text without an LLM.
+Two layouts are recognised:
+
+- "labelled": "Hotspot : 28.8 °C", "Coldspot : 23.4 °C" and
+  "Thermal image : RB02380X.JPG" (label and value on the same or the next
+  line), as exported by Bosch GTC and similar devices
+- "table": one row per image, "<image id> <hotspot> <coldspot>"
+
+parse() returns the readings in the LLM extractor's output shape together
+with a confidence in [0, 1]: the share of expected records that were read
+completely and plausibly. ThermalExtractor only trusts the result above
+Config.THERMAL_FAST_PATH_MIN_CONFIDENCE and falls back to the LLM otherwise.
+"""
+
+import re
+from typing import Optional, Tuple
+from app.intelligence.models import parse_temperature
+
+_VALUE = r"(-?\d+(?:\.\d+)?(?:\s*°\s*C)?)"
+
+_HOTSPOT = re.compile(r"hot\s*spot\s*:?\s*" + _VALUE, re.IGNORECASE)
+_COLDSPOT = re.compile(r"cold\s*spot\s*:?\s*" + _VALUE, re.IGNORECASE)
+_IMAGE = re.compile(r"thermal\s+image\s*:?\s*(\S+)", re.IGNORECASE)
+
+_IMAGE_ID = r"(\S+\.(?:jpe?g|png|tiff?|is2)|IR[_-]?\d+|IMG[_-]?\d+)"
+_TEMPERATURE = r"(-?\d+(?:\.\d+)?\s*°\s*C)"
+_TABLE_ROW = re.compile(
+    r"^\s*" + _IMAGE_ID + r"\s*[|,;]?\s*" + _TEMPERATURE + r"\s*[|,;]?\s*" + _TEMPERATURE,
+    re.IGNORECASE | re.MULTILINE
+)
+
+# Readings outside this range (°C) are treated as misreads
+PLAUSIBLE_RANGE = (-40.0, 200.0)
+
+
+class ThermalTemplateParser:
+    #reads thermal readings from templated report text without an LLM
+
+    @staticmethod
+    def parse(thermal_text: str) -> Tuple[Optional[dict], float]:
+        #(result, confidence) from the template that explains the text best;
+        #(None, 0.0) when no template is recognised
+        best = (None, 0.0)
+        for parse in (ThermalTemplateParser._parse_labelled, ThermalTemplateParser._parse_table):
+            readings, expected = parse(thermal_text)
+            if not readings:
+                continue
+            confidence = ThermalTemplateParser._confidence(readings, expected)
+            if confidence > best[1]:
+                best = ({"thermal_readings": readings}, confidence)
+        return best
+
+    @staticmethod
+    def _parse_labelled(text: str) -> Tuple[list, int]:
+        # One record per "Hotspot" label; the coldspot and image name are
+        # looked up between it and the next "Hotspot" label
+        starts = [m.start() for m in _HOTSPOT.finditer(text)]
+        readings = []
+
+        for position, start in enumerate(starts):
+            end = starts[position + 1] if position + 1 < len(starts) else len(text)
+            record = text[start:end]
+
+            hotspot = _HOTSPOT.match(record)
+            coldspot = _COLDSPOT.search(record)
+            image = _IMAGE.search(record)
+
+            readings.append({
+                "image_id": image.group(1) if image else "",
+                "hotspot": hotspot.group(1).strip(),
+                "coldspot": coldspot.group(1).strip() if coldspot else ""
+            })
+
+        # Every label the template uses should have produced one record
+        expected = max(len(starts), len(_COLDSPOT.findall(text)), len(_IMAGE.findall(text)))
+        return readings, expected
+
+    @staticmethod
+    def _parse_table(text: str) -> Tuple[list, int]:
+        readings = [
+            {"image_id": image_id, "hotspot": hotspot.strip(), "coldspot": coldspot.strip()}
+            for image_id, hotspot, coldspot in _TABLE_ROW.findall(text)
+        ]
+        # Rows that name an image but did not parse count against confidence
+        expected = len(re.findall(r"^\s*" + _IMAGE_ID, text, re.IGNORECASE | re.MULTILINE))
+        return readings, max(expected, len(readings))
+
+    @staticmethod
+    def _confidence(readings: list, expected: int) -> float:
+        #share of expected records with an unseen image id and a plausible hot >= cold pair
+        low, high = PLAUSIBLE_RANGE
+        seen = set()
+        complete = 0
+
+        for reading in readings:
+            hot = parse_temperature(reading["hotspot"])
+            cold = parse_temperature(reading["coldspot"])
+            image_id = reading["image_id"]
+
+            if not image_id or image_id in seen or hot is None or cold is None:
+                continue
+            seen.add(image_id)
+            if low <= cold <= hot <= high:
+                complete += 1
+
+        return complete / expected if expected else 0.0
@@ -1,29 +1,68 @@
+from app.config import Config
+from app.intelligence.models import PropertyData
+from app.utils.phrase_index import PhraseIndex, tokenize
+from app.utils.tracing import traced
+
+
 class AreaLinker:
-    #links thermal findings to specific areas only if the area name is explicitly mentioned.
+    #links thermal findings to specific areas only if the area name (or a configured synonym) is explicitly mentioned.
 
     @staticmethod
-    def link(normalized_data: dict) -> dict:
+    @traced("intelligence.link")
+    def link(normalized_data: PropertyData) -> PropertyData:
         #adding thermal readings to matching areas if area name appears in thermal image_id or description.
         #otherwise, keeps them under 'General Thermal Findings'.
+        #the longest matching name wins, so "Hallway" is not linked to "Hall".
 
-        thermal_readings = normalized_data.get("thermal_readings", [])
-        areas = normalized_data.get("areas", {})
+        normalized_data = PropertyData.coerce(normalized_data)
+        areas = normalized_data.areas
+        index = AreaLinker.build_index(areas.keys())
 
         #create general bucket
-        normalized_data["general_thermal_findings"] = []
+        normalized_data.general_thermal = []
+
+        for reading in normalized_data.thermal_readings:
+            area_name = index.longest_match(f"{reading.image_id} {reading.description}")
+
+            if area_name is not None:
+                areas[area_name].thermal_readings.append(reading)
+            else:
+                normalized_data.general_thermal.append(reading)
+
+        return normalized_data
+
+    @staticmethod
+    def build_index(area_names, synonyms: dict = None) -> PhraseIndex:
+        #indexes each area name plus variants with synonyms substituted,
+        #e.g. "Living Room 2" -> "hall 2" when hall <-> living room
+        synonyms = Config.AREA_SYNONYMS if synonyms is None else synonyms
+        groups = [[tokenize(p) for p in [term, *aliases]] for term, aliases in synonyms.items()]
 
-        for reading in thermal_readings:
-            linked = False
+        index = PhraseIndex()
 
-            image_id = str(reading.get("image_id", "")).lower()
+        # Exact names first so they win over synonym variants
+        for name in area_names:
+            index.add(name, name)
 
-            for area_name in areas.keys():
-                if area_name.lower() in image_id:
-                    areas[area_name].setdefault("thermal_readings", []).append(reading)
-                    linked = True
+        for name in area_names:
+            tokens = tokenize(name)
+            for group in groups:
+                for phrase in group:
+                    position = AreaLinker._find(tokens, phrase)
+                    if position < 0:
+                        continue
+                    for alias in group:
+                        if alias != phrase:
+                            variant = tokens[:position] + alias + tokens[position + len(phrase):]
+                            index.add(" ".join(variant), name)
                     break
 
-            if not linked:
-                normalized_data["general_thermal_findings"].append(reading)
+        return index
 
-        return normalized_data
+    @staticmethod
+    def _find(tokens: list, phrase: list) -> int:
+        #start of phrase within tokens, or -1
+        for start in range(len(tokens) - len(phrase) + 1):
+            if tokens[start:start + len(phrase)] == phrase:
+                return start
+        return -1
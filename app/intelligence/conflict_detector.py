@@ -1,42 +1,56 @@
+import threading
+from pathlib import Path
+from app.config import Config
+from app.intelligence.models import PropertyData
+from app.intelligence.rule_engine import RuleEngine
+from app.utils.tracing import traced
+
+DEFAULT_RULES_PATH = str(Path(__file__).with_name("conflict_rules.json"))
+
+
 class ConflictDetector:
-    # Detects conflicting information in the normalized data
-    
+    # Detects conflicting information in the normalized data using the
+    # declarative rules in Config.CONFLICT_RULES_PATH (see rule_engine.py)
+
+    _engines = {}
+    _engines_lock = threading.Lock()
+
     @staticmethod
-    def detect(normalized_data: dict) -> list:
-        # Returns list of conflict descriptions
+    def engine() -> RuleEngine:
+        # Rules are compiled once per rule file and shared process-wide
+        path = Config.CONFLICT_RULES_PATH or DEFAULT_RULES_PATH
+        with ConflictDetector._engines_lock:
+            if path not in ConflictDetector._engines:
+                ConflictDetector._engines[path] = RuleEngine.from_file(path)
+            return ConflictDetector._engines[path]
+
+    @staticmethod
+    @traced("intelligence.detect_conflicts")
+    def detect(normalized_data: PropertyData) -> list:
+        # Returns a list of Conflict records (area, rule id, message)
+        normalized_data = PropertyData.coerce(normalized_data)
+        engine = ConflictDetector.engine()
         conflicts = []
-        
-        for area_name, content in normalized_data.get("areas", {}).items():
-            # Ensure findings are lists, not strings
-            negative_findings = content.get("negative_findings", [])
-            positive_findings = content.get("positive_findings", [])
-            
-            # Convert to list if string (defensive programming)
-            if isinstance(negative_findings, str):
-                negative_findings = [negative_findings] if negative_findings else []
-            if isinstance(positive_findings, str):
-                positive_findings = [positive_findings] if positive_findings else []
-            
-            # Check for "no leakage" but also mentions "dampness"
-            no_leakage = any("no leakage" in f.lower() for f in negative_findings)
-            dampness = any("damp" in f.lower() or "seepage" in f.lower()
-                           for f in negative_findings)
-            
-            if no_leakage and dampness:
-                conflicts.append(
-                    f"Conflict in {area_name}: 'No leakage' and dampness/seepage both reported."
-                )
-            
-            # Check for plumbing marked both yes and no
-            all_findings = negative_findings + positive_findings
-            plumbing_yes = any("plumbing" in f.lower() and "yes" in f.lower()
-                               for f in all_findings)
-            plumbing_no = any("plumbing" in f.lower() and "no" in f.lower()
-                              for f in all_findings)
-            
-            if plumbing_yes and plumbing_no:
-                conflicts.append(
-                    f"Conflict in {area_name}: Plumbing reported both Yes and No."
-                )
-        
+
+        area_stats = (normalized_data.thermal_stats or {}).get("areas", {})
+
+        for area_name, area in normalized_data.areas.items():
+            # Thermal figures from ThermalAnalytics when it has run
+            deltas = area.deltas
+            stats = area_stats.get(area_name, {})
+            thermal = {
+                "max_delta": max(deltas) if deltas else None,
+                "signal": stats.get("signal"),
+                "outliers": stats.get("outliers", 0)
+            }
+
+            conflicts.extend(engine.evaluate(
+                area_name, area.negative_findings, area.positive_findings, thermal
+            ))
+
         return conflicts
+
+    @staticmethod
+    def stats() -> dict:
+        """Rule evaluation counters for the active rule file."""
+        return ConflictDetector.engine().stats()
@@ -1,21 +1,22 @@
+from app.intelligence.models import Area, PropertyData, ThermalReading
+from app.utils.tracing import traced
+
+
 class DataNormalizer:
     #normalizes extracted inspection and thermal data into consistent internal structure
 
     @staticmethod
-    def normalize(inspection_data: dict, thermal_data: dict) -> dict:
-        #returns unified structure
+    @traced("intelligence.normalize")
+    def normalize(inspection_data: dict, thermal_data: dict) -> PropertyData:
+        #returns unified structure; strings-vs-lists and temperature strings
+        #are resolved here once so later stages can rely on the types
 
-        normalized = {
-            "areas": {},
-            "thermal_readings": thermal_data.get("thermal_readings", [])
-        }
+        normalized = PropertyData(
+            thermal_readings=[ThermalReading.from_dict(r) for r in thermal_data.get("thermal_readings", [])]
+        )
 
         for area in inspection_data.get("areas", []):
             name = area.get("area_name", "Unknown Area")
-
-            normalized["areas"][name] = {
-                "negative_findings": area.get("negative_findings", []),
-                "positive_findings": area.get("positive_findings", [])
-            }
+            normalized.areas[name] = Area.from_dict(name, area)
 
         return normalized
@@ -1,17 +1,65 @@
+from app.intelligence.models import PropertyData
+from app.utils.similarity import MinHashLSH, content_words, is_negated, words
+from app.utils.tracing import traced
+
+
 class Deduplicator:
-    #removes duplicate findings within each area
+    #removes duplicate findings within each area and groups near-duplicates
 
     @staticmethod
-    def deduplicate(normalized_data: dict) -> dict:
-        #removes duplicate negative and positive findings
+    @traced("intelligence.deduplicate")
+    def deduplicate(normalized_data: PropertyData) -> PropertyData:
+        #removes findings whose normalized text repeats an earlier one in the same
+        #area and side, keeping first-seen order. Near-duplicates ("Dampness at
+        #skirting" / "dampness observed at skirting level") are kept, since
+        #similar wording can still be a different defect ("External wall crack" /
+        #"Internal wall crack"), and are listed together in recurring_findings
+
+        normalized_data = PropertyData.coerce(normalized_data)
+        areas = normalized_data.areas
 
-        for area_name, content in normalized_data.get("areas", {}).items():
+        # One clustering pass over every finding of every area, so the cost
+        # stays near-linear however many areas and reports are merged. The
+        # area's own name is left out: every finding of the area shares it
+        texts = []
+        ignore = []
+        for area_name, area in areas.items():
+            skip = words(area_name)
+            for finding in area.findings():
+                texts.append(finding.text)
+                ignore.append(skip)
+        clusters = MinHashLSH().cluster(texts, ignore)
 
-            negative = content.get("negative_findings", [])
-            positive = content.get("positive_findings", [])
+        position = 0
+        groups = {}
+        for area_name, area in areas.items():
+            for side in ("negative", "positive"):
+                kept = []
+                seen = set()
+                for finding in getattr(area, side):
+                    cluster = clusters[position]
+                    position += 1
+                    key = (is_negated(finding.text), " ".join(content_words(finding.text)))
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    kept.append(finding)
+                    group = groups.setdefault(cluster, {"areas": [], "wordings": []})
+                    group["areas"].append(area_name)
+                    group["wordings"].append(finding.text)
+                setattr(area, side, kept)
 
-            # Remove exact duplicates
-            content["negative_findings"] = list(set(negative))
-            content["positive_findings"] = list(set(positive))
+        # Issues reported in more than one area or in several similar wordings,
+        # worded as first seen; the other wordings are listed as related
+        normalized_data.recurring_findings = []
+        for cluster, group in groups.items():
+            related = [text for text in dict.fromkeys(group["wordings"]) if text != texts[cluster]]
+            areas_seen = list(dict.fromkeys(group["areas"]))
+            if len(areas_seen) < 2 and not related:
+                continue
+            entry = {"finding": texts[cluster], "areas": areas_seen}
+            if related:
+                entry["related"] = related
+            normalized_data.recurring_findings.append(entry)
 
         return normalized_data
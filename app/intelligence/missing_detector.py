@@ -1,32 +1,29 @@
+from app.intelligence.models import PropertyData
+from app.utils.tracing import traced
+
+
 class MissingDetector:
     #detects missing or unclear required information for final DDR generation
     
     @staticmethod
-    def detect(normalized_data: dict) -> list:
+    @traced("intelligence.detect_missing")
+    def detect(normalized_data: PropertyData) -> list:
         #returns list of missing information statements
+        normalized_data = PropertyData.coerce(normalized_data)
         missing = []
         
-        areas = normalized_data.get("areas", {})
+        areas = normalized_data.areas
         
         if not areas:
             missing.append("No impacted areas identified.")
         
         # Check if any area has no findings
-        for area_name, content in areas.items():
-            negative = content.get("negative_findings", [])
-            positive = content.get("positive_findings", [])
-            
-            # Handle both string and list types
-            if isinstance(negative, str):
-                negative = [negative] if negative else []
-            if isinstance(positive, str):
-                positive = [positive] if positive else []
-            
-            if not negative and not positive:
+        for area_name, area in areas.items():
+            if not area.negative and not area.positive:
                 missing.append(f"No findings available for {area_name}.")
         
         # Check if no thermal readings present
-        if not normalized_data.get("thermal_readings"):
+        if not normalized_data.thermal_readings:
             missing.append("Thermal readings: Not Available.")
         
         return missing
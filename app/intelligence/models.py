@@ -0,0 +1,253 @@
+"""
+Typed data model passed between the intelligence stages.
+
+DataNormalizer turns the extractors' JSON into a PropertyData once: findings
+are always lists, area names are interned, and temperatures are parsed to
+floats. Later stages read and update these objects instead of re-validating
+nested dicts. All classes use __slots__ to keep per-report memory small in
+large batches.
+
+to_dict()/from_dict() convert to and from the plain JSON shape;
+to_json()/from_json() use orjson when it is installed.
+"""
+
+import json
+import re
+import sys
+from typing import Iterator, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+NEGATIVE = sys.intern("negative")
+POSITIVE = sys.intern("positive")
+
+_TEMPERATURE = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def parse_temperature(value) -> Optional[float]:
+    #"32.5°C" -> 32.5; numbers pass through; None if no number is present
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _TEMPERATURE.search(str(value or ""))
+    return float(match.group()) if match else None
+
+
+def _as_list(value) -> list:
+    #extractors sometimes return a single string instead of a list
+    if isinstance(value, str):
+        return [value] if value else []
+    return list(value or [])
+
+
+class Finding:
+    """One inspection finding on the negative (damage) or positive (source) side."""
+
+    __slots__ = ("text", "side")
+
+    def __init__(self, text: str, side: str = NEGATIVE):
+        self.text = text
+        self.side = sys.intern(side)
+
+    def __repr__(self):
+        return f"Finding({self.text!r}, {self.side!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, Finding) and (self.text, self.side) == (other.text, other.side)
+
+    def __hash__(self):
+        #consistent with __eq__; do not change text or side while a Finding is in a set or dict
+        return hash((self.text, self.side))
+
+
+class ThermalReading:
+    """
+    One thermal image with its hotspot/coldspot temperatures in °C.
+
+    z_score, area_z_score and outlier are filled in by ThermalAnalytics.
+    """
+
+    __slots__ = ("image_id", "hotspot", "coldspot", "description", "z_score", "area_z_score", "outlier")
+
+    def __init__(self, image_id: str, hotspot: Optional[float] = None,
+                 coldspot: Optional[float] = None, description: str = ""):
+        self.image_id = image_id
+        self.hotspot = hotspot
+        self.coldspot = coldspot
+        self.description = description
+        self.z_score = None
+        self.area_z_score = None
+        self.outlier = False
+
+    @property
+    def delta(self) -> Optional[float]:
+        #hot/cold spread, or None if either temperature is missing
+        if self.hotspot is None or self.coldspot is None:
+            return None
+        return self.hotspot - self.coldspot
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ThermalReading":
+        reading = cls(
+            image_id=str(data.get("image_id", "")),
+            hotspot=parse_temperature(data.get("hotspot")),
+            coldspot=parse_temperature(data.get("coldspot")),
+            description=str(data.get("description") or data.get("location") or "")
+        )
+        reading.z_score = data.get("z_score")
+        reading.area_z_score = data.get("area_z_score")
+        reading.outlier = bool(data.get("outlier", False))
+        return reading
+
+    def to_dict(self) -> dict:
+        data = {"image_id": self.image_id, "hotspot": self.hotspot, "coldspot": self.coldspot}
+        if self.description:
+            data["description"] = self.description
+        if self.z_score is not None:
+            data["z_score"] = self.z_score
+            data["area_z_score"] = self.area_z_score
+            data["outlier"] = self.outlier
+        return data
+
+    def __repr__(self):
+        return f"ThermalReading({self.image_id!r}, {self.hotspot!r}, {self.coldspot!r})"
+
+
+class Area:
+    """An impacted area with its findings and linked thermal readings."""
+
+    __slots__ = ("name", "negative", "positive", "thermal_readings")
+
+    def __init__(self, name: str, negative: list = None, positive: list = None,
+                 thermal_readings: list = None):
+        self.name = sys.intern(name)
+        self.negative = negative or []
+        self.positive = positive or []
+        self.thermal_readings = thermal_readings or []
+
+    @property
+    def negative_findings(self) -> list:
+        return [f.text for f in self.negative]
+
+    @property
+    def positive_findings(self) -> list:
+        return [f.text for f in self.positive]
+
+    def findings(self) -> Iterator[Finding]:
+        yield from self.negative
+        yield from self.positive
+
+    @property
+    def deltas(self) -> list:
+        #hot/cold spread of each linked reading that has both temperatures
+        return [r.delta for r in self.thermal_readings if r.delta is not None]
+
+    @classmethod
+    def from_dict(cls, name: str, data: dict) -> "Area":
+        return cls(
+            name=name,
+            negative=[Finding(str(t), NEGATIVE) for t in _as_list(data.get("negative_findings"))],
+            positive=[Finding(str(t), POSITIVE) for t in _as_list(data.get("positive_findings"))],
+            thermal_readings=[ThermalReading.from_dict(r) for r in data.get("thermal_readings", [])]
+        )
+
+    def to_dict(self) -> dict:
+        data = {
+            "negative_findings": self.negative_findings,
+            "positive_findings": self.positive_findings
+        }
+        if self.thermal_readings:
+            data["thermal_readings"] = [r.to_dict() for r in self.thermal_readings]
+        return data
+
+    def __repr__(self):
+        return f"Area({self.name!r}, negative={len(self.negative)}, positive={len(self.positive)}, thermal={len(self.thermal_readings)})"
+
+
+class Conflict:
+    """A conflict rule that fired for one area, with its rendered message."""
+
+    __slots__ = ("area", "rule_id", "message")
+
+    def __init__(self, area: str, rule_id: str, message: str):
+        self.area = sys.intern(area)
+        self.rule_id = rule_id
+        self.message = message
+
+    def to_dict(self) -> dict:
+        return {"area": self.area, "rule_id": self.rule_id, "message": self.message}
+
+    def __repr__(self):
+        return f"Conflict({self.area!r}, {self.rule_id!r})"
+
+
+class PropertyData:
+    """
+    Everything known about one property after normalization.
+
+    areas keeps report order. general_thermal holds readings AreaLinker could
+    not place in an area (None until linking has run); recurring_findings
+    lists issues Deduplicator found in more than one area; thermal_stats
+    holds the survey and per-area figures from ThermalAnalytics.
+    """
+
+    __slots__ = ("areas", "thermal_readings", "general_thermal", "recurring_findings", "thermal_stats")
+
+    def __init__(self, areas: dict = None, thermal_readings: list = None,
+                 general_thermal: list = None, recurring_findings: list = None,
+                 thermal_stats: dict = None):
+        self.areas = areas if areas is not None else {}
+        self.thermal_readings = thermal_readings or []
+        self.general_thermal = general_thermal
+        self.recurring_findings = recurring_findings or []
+        self.thermal_stats = thermal_stats
+
+    def unlinked_thermal(self) -> list:
+        #readings not attached to an area; before linking that is all of them
+        return self.thermal_readings if self.general_thermal is None else self.general_thermal
+
+    @classmethod
+    def coerce(cls, data) -> "PropertyData":
+        #accepts a PropertyData or the equivalent plain dict
+        return data if isinstance(data, cls) else cls.from_dict(data)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PropertyData":
+        general = data.get("general_thermal_findings")
+        return cls(
+            areas={sys.intern(name): Area.from_dict(name, content)
+                   for name, content in data.get("areas", {}).items()},
+            thermal_readings=[ThermalReading.from_dict(r) for r in data.get("thermal_readings", [])],
+            general_thermal=None if general is None else [ThermalReading.from_dict(r) for r in general],
+            recurring_findings=list(data.get("recurring_findings", [])),
+            thermal_stats=data.get("thermal_stats")
+        )
+
+    def to_dict(self) -> dict:
+        data = {
+            "areas": {name: area.to_dict() for name, area in self.areas.items()},
+            "thermal_readings": [r.to_dict() for r in self.thermal_readings]
+        }
+        if self.general_thermal is not None:
+            data["general_thermal_findings"] = [r.to_dict() for r in self.general_thermal]
+        if self.recurring_findings:
+            data["recurring_findings"] = self.recurring_findings
+        if self.thermal_stats is not None:
+            data["thermal_stats"] = self.thermal_stats
+        return data
+
+    def to_json(self) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(self.to_dict())
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    @classmethod
+    def from_json(cls, payload) -> "PropertyData":
+        if orjson is not None:
+            return cls.from_dict(orjson.loads(payload))
+        return cls.from_dict(json.loads(payload))
+
+    def __repr__(self):
+        return f"PropertyData(areas={len(self.areas)}, thermal_readings={len(self.thermal_readings)})"
@@ -0,0 +1,230 @@
+"""
+Declarative rules for finding conflicts within an area.
+
+A rule file (JSON, or YAML if PyYAML is installed) declares named terms and
+rules over them:
+
+    "terms": {"damp": ["damp*", "seepage"], "no_leakage": ["no leakage"]}
+    "rules": [{
+        "id": "no_leakage_vs_damp",
+        "scope": "negative",                  # negative | positive | all
+        "all":  [["no_leakage"], ["damp"]],   # every clause must hold
+        "any":  [...],                        # at least one clause must hold
+        "none": [...],                        # no clause may hold
+        "thermal": {"min_delta": 5.0},        # optional: min_delta / max_delta (area's
+                                              # largest ΔT), min_signal, min_outliers
+        "message": "Conflict in {area}: ..."
+    }]
+
+A clause is a list of terms that must all appear in the SAME finding. Term
+phrases match whole words ("no" never matches inside "nothing"), "*" makes
+the last word a prefix, and a longer phrase hides the shorter ones inside it
+("no leakage" does not also count as "leak*").
+
+All phrases are compiled into one PhraseIndex, so each finding is scanned
+once regardless of the number of rules, and a rule is only evaluated when
+every term its "all" clauses need was seen in the area.
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+from app.intelligence.models import Conflict
+from app.utils.phrase_index import PhraseIndex
+
+
+class Rule:
+    #one compiled rule; clauses are frozensets of term names
+
+    __slots__ = ("id", "scope", "all", "any", "none", "min_delta", "max_delta", "min_signal",
+                 "min_outliers", "message", "required")
+
+    SCOPES = ("negative", "positive", "all")
+
+    def __init__(self, spec: dict, known_terms: set):
+        self.id = spec["id"]
+        self.scope = spec.get("scope", "all")
+        if self.scope not in self.SCOPES:
+            raise ValueError(f"Rule '{self.id}': unknown scope '{self.scope}'")
+
+        self.all = self._clauses(spec.get("all", []), known_terms)
+        self.any = self._clauses(spec.get("any", []), known_terms)
+        self.none = self._clauses(spec.get("none", []), known_terms)
+
+        thermal = spec.get("thermal", {})
+        self.min_delta = thermal.get("min_delta")
+        self.max_delta = thermal.get("max_delta")
+        self.min_signal = thermal.get("min_signal")
+        self.min_outliers = thermal.get("min_outliers")
+        self.message = spec["message"]
+
+        if not (self.all or self.any or thermal):
+            raise ValueError(f"Rule '{self.id}' has no conditions")
+
+        # Terms that must have been seen in the area for the rule to fire
+        self.required = frozenset().union(*self.all) if self.all else frozenset()
+
+    def _clauses(self, clauses: list, known_terms: set) -> list:
+        compiled = []
+        for clause in clauses:
+            clause = frozenset([clause] if isinstance(clause, str) else clause)
+            unknown = clause - known_terms
+            if unknown:
+                raise ValueError(f"Rule '{self.id}' uses undefined terms: {sorted(unknown)}")
+            compiled.append(clause)
+        return compiled
+
+
+class RuleEngine:
+    """
+    Evaluates compiled conflict rules against areas.
+
+    evaluate() takes one area's negative and positive findings plus its
+    thermal figures (max_delta, signal, outliers) and returns a Conflict for
+    each rule that fired. Messages may use {area} and those figures.
+    """
+
+    NO_THERMAL = {"max_delta": None, "signal": None, "outliers": 0}
+
+    def __init__(self, spec: dict):
+        terms = spec.get("terms", {})
+        phrases = {}
+        for term, term_phrases in terms.items():
+            for phrase in term_phrases:
+                phrases.setdefault(phrase.lower(), set()).add(term)
+
+        self.index = PhraseIndex()
+        for phrase, names in phrases.items():
+            self.index.add(phrase, frozenset(names))
+
+        self.rules = [Rule(rule, set(terms)) for rule in spec.get("rules", [])]
+
+        ids = [rule.id for rule in self.rules]
+        if len(ids) != len(set(ids)):
+            raise ValueError("Duplicate rule ids in conflict rules")
+
+        # Rules indexed by one of their required terms; rules without
+        # required terms are candidates for every area
+        self._unconditional = []
+        self._by_term = {}
+        for position, rule in enumerate(self.rules):
+            if rule.required:
+                self._by_term.setdefault(min(rule.required), []).append(position)
+            else:
+                self._unconditional.append(position)
+
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    @classmethod
+    def from_file(cls, path: str) -> "RuleEngine":
+        path = Path(path)
+        with open(path, "r", encoding="utf-8") as f:
+            if path.suffix.lower() in (".yaml", ".yml"):
+                try:
+                    import yaml
+                except ImportError:
+                    raise ImportError("PyYAML is required for YAML conflict rules")
+                spec = yaml.safe_load(f)
+            else:
+                spec = json.load(f)
+        return cls(spec)
+
+    def terms_in(self, finding: str) -> frozenset:
+        #names of every term occurring in one finding
+        return frozenset().union(*self.index.scan(finding))
+
+    def evaluate(self, area_name: str, negative: list, positive: list, thermal: dict = None) -> list:
+        #returns a Conflict for each rule that fires for this area, in rule order
+        start = time.perf_counter()
+
+        # Single pass: each finding is scanned once into its set of terms
+        scoped = {
+            "negative": [self.terms_in(f) for f in negative],
+            "positive": [self.terms_in(f) for f in positive]
+        }
+        scoped["all"] = scoped["negative"] + scoped["positive"]
+        seen = {scope: frozenset().union(*sets) for scope, sets in scoped.items()}
+        thermal = {**self.NO_THERMAL, **(thermal or {})}
+
+        conflicts = []
+        evaluated = 0
+        fired = []
+
+        # Only rules keyed by a term seen in the area are looked at
+        candidates = list(self._unconditional)
+        for term in seen["all"]:
+            candidates.extend(self._by_term.get(term, ()))
+
+        for position in sorted(candidates):
+            rule = self.rules[position]
+            if not rule.required <= seen[rule.scope]:
+                continue
+            evaluated += 1
+
+            if self._matches(rule, scoped[rule.scope], thermal):
+                fired.append(rule.id)
+                conflicts.append(Conflict(area_name, rule.id, rule.message.format(
+                    area=area_name,
+                    max_delta=thermal["max_delta"] or 0.0,
+                    signal=thermal["signal"] or 0.0,
+                    outliers=thermal["outliers"]
+                )))
+
+        self._record(len(scoped["all"]), evaluated, fired, time.perf_counter() - start)
+        return conflicts
+
+    @staticmethod
+    def _matches(rule: Rule, findings: list, thermal: dict) -> bool:
+        def holds(clause):
+            return any(clause <= terms for terms in findings)
+
+        if not all(holds(clause) for clause in rule.all):
+            return False
+        if rule.any and not any(holds(clause) for clause in rule.any):
+            return False
+        if any(holds(clause) for clause in rule.none):
+            return False
+
+        max_delta = thermal["max_delta"]
+        if rule.min_delta is not None and (max_delta is None or max_delta < rule.min_delta):
+            return False
+        if rule.max_delta is not None and (max_delta is None or max_delta > rule.max_delta):
+            return False
+        if rule.min_signal is not None and (thermal["signal"] is None or thermal["signal"] < rule.min_signal):
+            return False
+        if rule.min_outliers is not None and thermal["outliers"] < rule.min_outliers:
+            return False
+
+        return True
+
+    def _record(self, findings: int, evaluated: int, fired: list, seconds: float):
+        with self._stats_lock:
+            self._stats["areas"] += 1
+            self._stats["findings"] += findings
+            self._stats["rules_evaluated"] += evaluated
+            self._stats["rules_skipped"] += len(self.rules) - evaluated
+            self._stats["seconds"] += seconds
+            for rule_id in fired:
+                self._stats["fired"][rule_id] = self._stats["fired"].get(rule_id, 0) + 1
+
+    def stats(self) -> dict:
+        """Return counters since the last reset (areas, findings, rule evaluations, fires per rule)."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats["fired"] = dict(self._stats["fired"])
+        stats["rules"] = len(self.rules)
+        stats["phrases"] = self.index.size
+        return stats
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats = {
+                "areas": 0,
+                "findings": 0,
+                "rules_evaluated": 0,
+                "rules_skipped": 0,
+                "fired": {},
+                "seconds": 0.0
+            }
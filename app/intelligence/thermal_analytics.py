@@ -0,0 +1,100 @@
+import numpy as np
+from app.config import Config
+from app.intelligence.models import PropertyData
+from app.utils.tracing import traced
+
+
+class ThermalAnalytics:
+    #numeric analysis of thermal readings (hot/cold spread per image)
+
+    @staticmethod
+    @traced("intelligence.thermal_analytics")
+    def analyze(normalized_data: PropertyData) -> PropertyData:
+        #scores every reading against the whole survey and against its own area
+        #and stores the results on the readings and in normalized_data.thermal_stats.
+        #runs after AreaLinker so readings are grouped by area.
+        normalized_data = PropertyData.coerce(normalized_data)
+        readings = [r for r in normalized_data.thermal_readings if r.delta is not None]
+
+        if not readings:
+            normalized_data.thermal_stats = None
+            return normalized_data
+
+        # Area of each reading as an integer group id (-1 = not linked)
+        area_names = list(normalized_data.areas)
+        group_of = {}
+        for position, name in enumerate(area_names):
+            for reading in normalized_data.areas[name].thermal_readings:
+                group_of[id(reading)] = position
+
+        count = len(readings)
+        delta = np.fromiter((r.delta for r in readings), dtype=np.float64, count=count)
+        groups = np.fromiter((group_of.get(id(r), -1) for r in readings), dtype=np.int64, count=count)
+
+        # Survey-wide z-score and IQR fences
+        mean = delta.mean()
+        std = delta.std()
+        z = (delta - mean) / std if std > 0 else np.zeros(count)
+        q1, median, q3 = np.percentile(delta, [25, 50, 75])
+        iqr = q3 - q1
+        upper_fence = q3 + Config.THERMAL_IQR_FACTOR * iqr
+        lower_fence = q1 - Config.THERMAL_IQR_FACTOR * iqr
+
+        # Only unusually LARGE spreads are anomalies; a uniform image is not
+        outlier = (z >= Config.THERMAL_Z_THRESHOLD) | (delta > upper_fence)
+
+        # Per-area aggregates via bincount over the linked readings
+        linked = groups >= 0
+        area_count = np.bincount(groups[linked], minlength=len(area_names))
+        area_sum = np.bincount(groups[linked], weights=delta[linked], minlength=len(area_names))
+        area_sq = np.bincount(groups[linked], weights=delta[linked] ** 2, minlength=len(area_names))
+        area_max = np.full(len(area_names), -np.inf)
+        np.maximum.at(area_max, groups[linked], delta[linked])
+        area_outliers = np.bincount(groups[linked], weights=outlier[linked], minlength=len(area_names))
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            area_mean = area_sum / area_count
+            area_std = np.sqrt(np.maximum(area_sq / area_count - area_mean ** 2, 0.0))
+
+        # z-score of each reading within its own area (0 where the area has one reading)
+        area_z = np.zeros(count)
+        idx = groups[linked]
+        spread = area_std[idx]
+        area_z[linked] = np.where(spread > 0, (delta[linked] - area_mean[idx]) / np.where(spread > 0, spread, 1), 0.0)
+
+        # Severity signal in [0, 1]: how large the worst spread is in absolute
+        # terms, and how far it stands out from the rest of the survey
+        max_z = np.where(area_count > 0, (area_max - mean) / std if std > 0 else 0.0, 0.0)
+        signal = 0.5 * np.clip(area_max / Config.THERMAL_SEVERE_DELTA, 0, 1) + 0.5 * np.clip(max_z / 3, 0, 1)
+
+        for position, reading in enumerate(readings):
+            reading.z_score = round(float(z[position]), 2)
+            reading.area_z_score = round(float(area_z[position]), 2)
+            reading.outlier = bool(outlier[position])
+
+        areas = {}
+        for position, name in enumerate(area_names):
+            if area_count[position] == 0:
+                continue
+            areas[name] = {
+                "images": int(area_count[position]),
+                "max_delta": round(float(area_max[position]), 1),
+                "mean_delta": round(float(area_mean[position]), 1),
+                "outliers": int(area_outliers[position]),
+                "signal": round(float(signal[position]), 2)
+            }
+
+        normalized_data.thermal_stats = {
+            "survey": {
+                "images": count,
+                "mean_delta": round(float(mean), 1),
+                "median_delta": round(float(median), 1),
+                "std_delta": round(float(std), 2),
+                "max_delta": round(float(delta.max()), 1),
+                "iqr_fences": [round(float(lower_fence), 1), round(float(upper_fence), 1)],
+                "outliers": int(outlier.sum())
+            },
+            "areas": areas
+        }
+
+        return normalized_data
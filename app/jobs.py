@@ -0,0 +1,464 @@
+"""
+Job queue and worker processes for DDR generation.
+
+Usage:
+    python -m app.jobs worker --workers 2
+    python -m app.jobs submit inspection.pdf thermal.pdf
+    python -m app.jobs status <job id>
+
+The Streamlit UI submits each report pair as a job and follows its progress
+instead of running the pipeline on the script thread. Jobs live in one
+SQLite file (WAL mode), so any number of UI sessions and worker processes
+can share the queue:
+
+- identical reports submitted while a job for them is queued or running
+  join that job instead of starting another one
+- admission control rejects submissions once JOB_QUEUE_MAX_PENDING jobs are
+  waiting
+- a worker only claims a job while fewer than the LLM backend's cap
+  (JOB_BACKEND_CONCURRENCY) are running on it, across all workers
+- running jobs send heartbeats; a job whose worker died is requeued, and
+  failed after JOB_MAX_ATTEMPTS attempts
+"""
+
+import argparse
+import atexit
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from app.config import Config
+
+FINISHED = ("done", "failed")
+
+
+class QueueFullError(RuntimeError):
+    """Raised by JobQueue.submit when JOB_QUEUE_MAX_PENDING jobs are already waiting."""
+
+
+class JobQueue:
+    """
+    SQLite-backed queue of DDR jobs.
+
+    Uploaded PDFs are spooled to JOB_SPOOL_DIR/<job id>/ and removed once the
+    job finishes; the generated markdown and stage timings are kept in the
+    jobs table. Progress messages go to job_events so callers can follow a
+    job with events(job_id, after=<last seq>).
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        fingerprint TEXT NOT NULL,
+        backend TEXT NOT NULL,
+        status TEXT NOT NULL,
+        inspection TEXT NOT NULL,
+        thermal TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        submissions INTEGER NOT NULL DEFAULT 1,
+        worker TEXT,
+        created_at REAL NOT NULL,
+        started_at REAL,
+        heartbeat_at REAL,
+        finished_at REAL,
+        result TEXT,
+        timings TEXT,
+        error TEXT
+    );
+    CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+    CREATE INDEX IF NOT EXISTS jobs_fingerprint ON jobs (fingerprint, status);
+    CREATE TABLE IF NOT EXISTS job_events (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        job_id TEXT NOT NULL,
+        at REAL NOT NULL,
+        message TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS job_events_job ON job_events (job_id, seq);
+    """
+
+    def __init__(self, db_path: Optional[str] = None, spool_dir: Optional[str] = None):
+        self.db_path = str(db_path or Config.JOB_QUEUE_PATH)
+        self.spool_dir = Path(spool_dir or Config.JOB_SPOOL_DIR)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript(self._SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        #IMMEDIATE takes the write lock up front, so check-then-insert is atomic across processes
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def backend_name() -> str:
+        #the LLM backend jobs submitted now will run against
+        return "mock" if Config.USE_MOCK else Config.LLM_PROVIDER.lower()
+
+    @staticmethod
+    def fingerprint(inspection: bytes, thermal: bytes, backend: str) -> str:
+        #same reports + same backend and generation settings = same DDR
+        digest = hashlib.sha256()
+        for part in (inspection, thermal):
+            digest.update(hashlib.sha256(part).digest())
+        settings = f"{backend}:{Config.MODEL_GENERATION}:{Config.OLLAMA_MODEL}:{Config.DDR_GENERATION_MODE}"
+        digest.update(settings.encode())
+        return digest.hexdigest()
+
+    def submit(self, inspection: bytes, thermal: bytes) -> tuple:
+        """Queue a report pair; returns (job_id, joined) where joined means an identical job was in flight."""
+        backend = self.backend_name()
+        fingerprint = self.fingerprint(inspection, thermal, backend)
+
+        job_dir = None
+        try:
+            with self._transaction() as conn:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE fingerprint = ? AND status IN ('queued', 'running') LIMIT 1",
+                    (fingerprint,)
+                ).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE jobs SET submissions = submissions + 1 WHERE id = ?", (row["id"],))
+                    return row["id"], True
+
+                queued = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+                if queued >= Config.JOB_QUEUE_MAX_PENDING:
+                    raise QueueFullError(f"{queued} jobs are already waiting; try again shortly")
+
+                job_id = uuid.uuid4().hex
+                job_dir = self.spool_dir / job_id
+                paths = {name: job_dir / f"{name}.pdf" for name in ("inspection", "thermal")}
+                conn.execute(
+                    "INSERT INTO jobs (id, fingerprint, backend, status, inspection, thermal, created_at) "
+                    "VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                    (job_id, fingerprint, backend, str(paths["inspection"]), str(paths["thermal"]), time.time())
+                )
+
+                # Spooled after the INSERT; no worker sees the row before COMMIT
+                job_dir.mkdir(parents=True)
+                paths["inspection"].write_bytes(inspection)
+                paths["thermal"].write_bytes(thermal)
+        except BaseException:
+            # The INSERT was rolled back, so nothing will ever clean these files up
+            if job_dir is not None:
+                shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+
+        self.add_event(job_id, "⏳ Queued")
+        return job_id, False
+
+    def claim(self, worker_id: str) -> Optional[dict]:
+        """Mark the oldest queued job whose backend is under its concurrency cap as running and return it."""
+        with self._transaction() as conn:
+            running = dict(conn.execute(
+                "SELECT backend, COUNT(*) FROM jobs WHERE status = 'running' GROUP BY backend"
+            ).fetchall())
+
+            for row in conn.execute("SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at"):
+                if running.get(row["backend"], 0) >= self.backend_cap(row["backend"]):
+                    continue
+                now = time.time()
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, "
+                    "started_at = ?, heartbeat_at = ? WHERE id = ?",
+                    (worker_id, now, now, row["id"])
+                )
+                return dict(row, status="running", worker=worker_id)
+
+        return None
+
+    @staticmethod
+    def backend_cap(backend: str) -> int:
+        return Config.JOB_BACKEND_CONCURRENCY.get(backend, Config.JOB_DEFAULT_BACKEND_CONCURRENCY)
+
+    def heartbeat(self, job_id: str):
+        self._conn().execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = 'running'",
+                             (time.time(), job_id))
+
+    def add_event(self, job_id: str, message: str):
+        self._conn().execute("INSERT INTO job_events (job_id, at, message) VALUES (?, ?, ?)",
+                             (job_id, time.time(), message))
+
+    def events(self, job_id: str, after: int = 0) -> list:
+        """Return [(seq, message)] for the job's progress messages after seq `after`."""
+        return [tuple(row) for row in self._conn().execute(
+            "SELECT seq, message FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq",
+            (job_id, after)
+        )]
+
+    def complete(self, job_id: str, worker_id: str, markdown: str, timings: dict) -> bool:
+        return self._finish(job_id, worker_id, "done", f"✅ Pipeline finished in {timings['total']:.1f}s",
+                            result=markdown, timings=json.dumps(timings))
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        return self._finish(job_id, worker_id, "failed", f"✗ {error}", error=error)
+
+    def _finish(self, job_id: str, worker_id: str, status: str, message: str, result: str = None,
+                timings: str = None, error: str = None) -> bool:
+        #False if the job was requeued (and maybe claimed by another worker)
+        #while worker_id ran it; its row and spooled PDFs are then left alone.
+        #The final event is written with the status so follow() never misses it
+        with self._transaction() as conn:
+            updated = conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, result = ?, timings = ?, error = ? "
+                "WHERE id = ? AND status = 'running' AND worker = ?",
+                (status, time.time(), result, timings, error, job_id, worker_id)
+            ).rowcount
+            if updated:
+                conn.execute("INSERT INTO job_events (job_id, at, message) VALUES (?, ?, ?)",
+                             (job_id, time.time(), message))
+        if updated:
+            shutil.rmtree(self.spool_dir / job_id, ignore_errors=True)
+        return bool(updated)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Return the job row as a dict (timings decoded), or None if unknown."""
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["timings"] = json.loads(job["timings"]) if job["timings"] else None
+        return job
+
+    def follow(self, job_id: str, poll_interval: Optional[float] = None,
+               timeout: Optional[float] = None) -> Iterator[str]:
+        """Yield the job's progress messages until it finishes (or timeout seconds pass)."""
+        poll_interval = poll_interval or Config.JOB_POLL_INTERVAL
+        deadline = None if timeout is None else time.monotonic() + timeout
+        seen = 0
+
+        while True:
+            job = self.get(job_id)
+            for seen, message in self.events(job_id, after=seen):
+                yield message
+            if job is None or job["status"] in FINISHED:
+                return
+            if deadline is not None and time.monotonic() > deadline:
+                return
+            time.sleep(poll_interval)
+
+    def requeue_stale(self) -> int:
+        """Requeue running jobs whose worker stopped sending heartbeats; returns how many were found."""
+        cutoff = time.time() - Config.JOB_STALE_SECONDS
+        with self._transaction() as conn:
+            stale = conn.execute(
+                "SELECT id, attempts FROM jobs WHERE status = 'running' AND heartbeat_at < ?", (cutoff,)
+            ).fetchall()
+            for row in stale:
+                if row["attempts"] >= Config.JOB_MAX_ATTEMPTS:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'failed', finished_at = ?, error = ? WHERE id = ?",
+                        (time.time(), "Worker stopped responding", row["id"])
+                    )
+                else:
+                    conn.execute("UPDATE jobs SET status = 'queued', worker = NULL WHERE id = ?", (row["id"],))
+
+        for row in stale:
+            self.add_event(row["id"], "⚠ Worker stopped responding; job requeued"
+                           if row["attempts"] < Config.JOB_MAX_ATTEMPTS else "✗ Worker stopped responding")
+            if row["attempts"] >= Config.JOB_MAX_ATTEMPTS:
+                shutil.rmtree(self.spool_dir / row["id"], ignore_errors=True)
+        return len(stale)
+
+    def stats(self) -> dict:
+        """Return job counts by status, plus running jobs per backend."""
+        conn = self._conn()
+        stats = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        stats["running_by_backend"] = dict(conn.execute(
+            "SELECT backend, COUNT(*) FROM jobs WHERE status = 'running' GROUP BY backend"
+        ).fetchall())
+        return stats
+
+
+def run_job(queue: JobQueue, job: dict):
+    """Run one claimed job through the pipeline, recording progress, result or error."""
+    from app.pipeline import run_ddr_pipeline
+
+    job_id = job["id"]
+    worker_id = job["worker"]
+    stop = threading.Event()
+
+    def beat():
+        # The pipeline can wait minutes on one LLM call, so heartbeats run on their own thread
+        while not stop.wait(Config.JOB_HEARTBEAT_SECONDS):
+            queue.heartbeat(job_id)
+
+    def on_stage(name, event):
+        if event == "finished":
+            queue.add_event(job_id, f"✓ {name.replace('_', ' ')}")
+
+    def on_area(area):
+        queue.add_event(job_id, f"📍 Found area: {area.get('area_name', 'Unknown Area')}")
+
+    heartbeat = threading.Thread(target=beat, daemon=True)
+    heartbeat.start()
+    queue.add_event(job_id, "🤖 Generating Detailed Diagnostic Report...")
+
+    try:
+        final_markdown, timings = run_ddr_pipeline(
+            job["inspection"], job["thermal"], on_area=on_area, on_stage=on_stage
+        )
+        if not queue.complete(job_id, worker_id, final_markdown, timings):
+            print(f"⚠ Job {job_id[:12]} was requeued while {worker_id} ran it; result discarded")
+    except Exception as e:
+        if not queue.fail(job_id, worker_id, str(e)):
+            print(f"⚠ Job {job_id[:12]} was requeued while {worker_id} ran it; error discarded: {e}")
+    finally:
+        stop.set()
+        heartbeat.join()
+
+
+def run_worker(db_path: Optional[str] = None, max_jobs: Optional[int] = None,
+               parent_pid: Optional[int] = None):
+    """Claim and run jobs until max_jobs have run (forever if None).
+
+    With parent_pid the worker also exits once that process is gone, so a
+    pool whose parent was killed does not linger.
+    """
+    queue = JobQueue(db_path)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    done = 0
+
+    from app.processing.pdf_parser import PDFParser
+
+    # WorkerPool.stop() terminates workers; exit through the finally below so
+    # the PDF page pool is shut down instead of orphaned
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    try:
+        # Start the PDF page pool and load the model now (and keep both) so the
+        # first job does not pay for a cold start
+        PDFParser.warm_up()
+        if not Config.USE_MOCK:
+            from app.extraction.llm_client import LLMClient
+            LLMClient(Config.MODEL_EXTRACTION).provider.preload()
+
+        while max_jobs is None or done < max_jobs:
+            if parent_pid is not None and os.getppid() != parent_pid:
+                break
+            queue.requeue_stale()
+            job = queue.claim(worker_id)
+            if job is None:
+                time.sleep(Config.JOB_POLL_INTERVAL)
+                continue
+
+            print(f"▶ {worker_id} running job {job['id'][:12]}")
+            run_job(queue, job)
+            done += 1
+    finally:
+        PDFParser.shutdown()
+
+
+class WorkerPool:
+    """Worker processes started from another process (e.g. the Streamlit server)."""
+
+    def __init__(self, workers: Optional[int] = None, db_path: Optional[str] = None):
+        self.workers = Config.JOB_WORKERS if workers is None else workers
+        self.db_path = db_path
+        self.processes = []
+
+    def start(self) -> "WorkerPool":
+        # spawn: workers must not inherit the parent's threads or SQLite connections.
+        # Not daemonic: PDFParser parses large reports on its own process pool,
+        # and daemonic processes may not have children. stop() runs at exit instead.
+        context = multiprocessing.get_context("spawn")
+        for _ in range(self.workers):
+            process = context.Process(target=run_worker, args=(self.db_path, None, os.getpid()))
+            process.start()
+            self.processes.append(process)
+        atexit.register(self.stop)
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join(timeout)
+        self.processes = []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DDR job queue.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    worker = commands.add_parser("worker", help="Run worker processes")
+    worker.add_argument("--workers", type=int, default=Config.JOB_WORKERS or 1, help="Number of worker processes")
+
+    submit = commands.add_parser("submit", help="Queue a report pair and follow its progress")
+    submit.add_argument("inspection", help="Inspection report PDF")
+    submit.add_argument("thermal", help="Thermal report PDF")
+    submit.add_argument("--no-wait", action="store_true", help="Print the job id and exit")
+
+    status = commands.add_parser("status", help="Show a job, or queue counts without an id")
+    status.add_argument("job_id", nargs="?")
+
+    args = parser.parse_args()
+    queue = JobQueue()
+
+    if args.command == "worker":
+        if args.workers <= 1:
+            run_worker()
+            return
+        pool = WorkerPool(args.workers).start()
+        try:
+            for process in pool.processes:
+                process.join()
+        except KeyboardInterrupt:
+            pool.stop()
+
+    elif args.command == "submit":
+        with open(args.inspection, "rb") as f:
+            inspection = f.read()
+        with open(args.thermal, "rb") as f:
+            thermal = f.read()
+
+        job_id, joined = queue.submit(inspection, thermal)
+        print(f"{'Joined' if joined else 'Queued'} job {job_id}")
+        if args.no_wait:
+            return
+
+        for message in queue.follow(job_id):
+            print(message)
+        job = queue.get(job_id)
+        if job["status"] == "done":
+            print("\n" + job["result"])
+
+    else:
+        if args.job_id:
+            job = queue.get(args.job_id)
+            print(json.dumps(job, indent=2, default=str) if job else f"Unknown job: {args.job_id}")
+        else:
+            print(json.dumps(queue.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Optional
+
+from app.config import Config
+from app.processing.document_cache import DocumentCache
+from app.extraction.inspection_extractor import InspectionExtractor
+from app.extraction.thermal_extractor import ThermalExtractor
+from app.intelligence.data_normalizer import DataNormalizer
+from app.intelligence.deduplicator import Deduplicator
+from app.intelligence.area_linker import AreaLinker
+from app.intelligence.thermal_analytics import ThermalAnalytics
+from app.intelligence.conflict_detector import ConflictDetector
+from app.intelligence.missing_detector import MissingDetector
+from app.reporting.ddr_builder import DDRBuilder
+from app.reporting.markdown_renderer import MarkdownRenderer
+from app.utils.tracing import Tracer
+
+
+class PipelineRunner:
+    """
+    Runs a graph of pipeline stages, executing independent branches concurrently.
+
+    Each stage is a callable that receives the results of its dependencies as
+    positional arguments (in the order they were declared). Stages whose
+    dependencies are all satisfied are submitted to a thread pool, so the
+    inspection and thermal branches overlap instead of running back to back.
+    """
+
+    def __init__(self, max_workers: int = 4, on_stage: Optional[Callable] = None,
+                 initializer: Optional[Callable] = None):
+        self.max_workers = max_workers
+        self.on_stage = on_stage
+        self.initializer = initializer
+        self.stages = {}
+        self.timings = {}
+
+    def add_stage(self, name: str, func: Callable, depends_on: tuple = ()):
+        """Register a stage. Dependencies must be registered before use."""
+        if name in self.stages:
+            raise ValueError(f"Duplicate pipeline stage: {name}")
+        for dep in depends_on:
+            if dep not in self.stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+
+        self.stages[name] = (func, tuple(depends_on))
+        return self
+
+    def run(self) -> dict:
+        """Execute all stages and return their results keyed by stage name."""
+        results = {}
+        pending = dict(self.stages)
+        running = {}
+        self.timings = {}
+
+        with Tracer.span("pipeline.run", stages=len(self.stages)), \
+                ThreadPoolExecutor(max_workers=self.max_workers,
+                                   initializer=self.initializer) as pool:
+            while pending or running:
+                # Submit every stage whose dependencies are complete. Each
+                # runs in a copy of this context so its spans nest under ours.
+                for name, (func, deps) in list(pending.items()):
+                    if all(dep in results for dep in deps):
+                        args = [results[dep] for dep in deps]
+                        context = contextvars.copy_context()
+                        running[pool.submit(context.run, self._timed, name, func, args)] = name
+                        del pending[name]
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    name = running.pop(future)
+                    # Re-raises the stage's exception; remaining stages are abandoned
+                    results[name] = future.result()
+
+        return results
+
+    def _timed(self, name: str, func: Callable, args: list):
+        if self.on_stage:
+            self.on_stage(name, "started")
+
+        start = time.perf_counter()
+        with Tracer.span(f"stage.{name}"):
+            result = func(*args)
+        self.timings[name] = time.perf_counter() - start
+
+        if self.on_stage:
+            self.on_stage(name, "finished")
+
+        return result
+
+
+def build_ddr_pipeline(inspection_path: str, thermal_path: str, on_area: Optional[Callable] = None,
+                       **runner_kwargs) -> PipelineRunner:
+    """
+    Wire the DDR stages into a PipelineRunner for one inspection/thermal pair.
+
+    on_area, if given, receives each inspection area as soon as the streaming
+    extractor has parsed it.
+    """
+    runner = PipelineRunner(**runner_kwargs)
+    documents = DocumentCache()
+
+    # Inspection branch: (layout parse, or parse -> clean -> segment; cached by PDF hash) -> extract
+    runner.add_stage("prepare_inspection", lambda: _prepare_inspection(documents, inspection_path))
+    runner.add_stage("extract_inspection", lambda prepared: _extract_inspection(prepared, on_area),
+                     ("prepare_inspection",))
+
+    # Thermal branch: (parse -> clean, cached by PDF hash) -> extract
+    runner.add_stage("prepare_thermal", lambda: documents.load(thermal_path))
+    runner.add_stage("extract_thermal", lambda text: ThermalExtractor().extract(text),
+                     ("prepare_thermal",))
+
+    # Join: normalize -> dedupe -> link -> thermal analytics -> detect -> build
+    runner.add_stage("normalize", DataNormalizer.normalize,
+                     ("extract_inspection", "extract_thermal"))
+    runner.add_stage("deduplicate", Deduplicator.deduplicate, ("normalize",))
+    runner.add_stage("link", AreaLinker.link, ("deduplicate",))
+    runner.add_stage("thermal_analytics", ThermalAnalytics.analyze, ("link",))
+    runner.add_stage("detect_conflicts", ConflictDetector.detect, ("thermal_analytics",))
+    runner.add_stage("detect_missing", MissingDetector.detect, ("thermal_analytics",))
+    runner.add_stage("build", lambda data, conflicts, missing: DDRBuilder().build(data, conflicts, missing),
+                     ("thermal_analytics", "detect_conflicts", "detect_missing"))
+    runner.add_stage("render", MarkdownRenderer.render, ("build",))
+
+    return runner
+
+
+def _prepare_inspection(documents: DocumentCache, inspection_path: str):
+    #structured areas when the report follows the inspection form, else segmented text
+    if Config.INSPECTION_PARSE_MODE == "structured":
+        parsed = documents.load_structured(inspection_path)
+        if parsed["areas"]:
+            return parsed
+    return documents.load(inspection_path, segment=True)
+
+
+def _extract_inspection(prepared, on_area: Optional[Callable]) -> dict:
+    if isinstance(prepared, dict):
+        return InspectionExtractor().extract_structured(prepared, on_area=on_area)
+    return InspectionExtractor().extract(prepared, on_area=on_area)
+
+
+def run_ddr_pipeline(inspection_path: str, thermal_path: str, on_area: Optional[Callable] = None,
+                     **runner_kwargs) -> tuple:
+    """
+    Run the full DDR pipeline for one report pair.
+
+    Returns (final_markdown, timings) where timings maps stage name to seconds.
+    """
+    runner = build_ddr_pipeline(inspection_path, thermal_path, on_area=on_area, **runner_kwargs)
+
+    start = time.perf_counter()
+    results = runner.run()
+    timings = dict(runner.timings)
+    timings["total"] = time.perf_counter() - start
+
+    return results["render"], timings
+
+
+def format_timings(timings: dict) -> str:
+    """Render stage timings as an aligned text table."""
+    width = max(len(name) for name in timings)
+    lines = [f"  {name.ljust(width)}  {seconds:8.3f}s" for name, seconds in timings.items()]
+    return "\n".join(lines)
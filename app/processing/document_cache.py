@@ -0,0 +1,165 @@
+import hashlib
+import json
+import threading
+import time
+from typing import Callable, Iterator, Optional
+from app.config import Config
+from app.processing.layout_parser import LayoutParser
+from app.processing.pdf_parser import PDFParser
+from app.processing.text_cleaner import TextCleaner
+from app.processing.section_segmenter import SectionSegmenter
+from app.utils.cache_backends import CacheBackend
+from app.utils.cache_manager import CacheManager
+from app.utils.tracing import Tracer, traced
+
+
+class DocumentCache:
+    """
+    Caches the pre-LLM text of a PDF (parsed, cleaned and optionally segmented)
+    and the LayoutParser areas of inspection reports.
+
+    Entries are keyed by the SHA-256 of the PDF bytes plus the TextCleaner and
+    SectionSegmenter (or LayoutParser) versions and the settings they read
+    (SEGMENT_KEYWORDS, AREA_SYNONYMS), so re-uploading the same document
+    skips PyMuPDF and text processing entirely, and changing either stage or
+    its settings invalidates old entries. Entries live in the same backend as the LLM response cache.
+    """
+
+    # Process-wide lookup counters, shared by every DocumentCache instance
+    hits = 0
+    misses = 0
+    _stats_lock = threading.Lock()
+
+    def __init__(self, backend: Optional[CacheBackend] = None):
+        if backend is None and Config.ENABLE_DOCUMENT_CACHE:
+            backend = CacheManager(Config.CACHE_DIR).backend
+        self.backend = backend
+
+    @staticmethod
+    def _generate_cache_key(pdf_bytes: bytes, segment: bool) -> str:
+        segmenter = "-"
+        if segment:
+            keywords = [k.lower() for k in Config.SEGMENT_KEYWORDS]
+            segmenter = f"{SectionSegmenter.VERSION}:{DocumentCache._settings_hash(keywords)}"
+        return DocumentCache._content_key(pdf_bytes, f"document:{{digest}}:{TextCleaner.VERSION}:{segmenter}")
+
+    @staticmethod
+    def _settings_hash(settings) -> str:
+        #short stable digest of JSON-serializable settings for a cache key
+        encoded = json.dumps(settings, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(encoded.encode()).hexdigest()[:16]
+
+    @staticmethod
+    def _content_key(pdf_bytes: bytes, template: str) -> str:
+        #template receives the PDF digest, e.g. "document:{digest}:<versions>"
+        digest = hashlib.sha256(pdf_bytes).hexdigest()
+        return hashlib.sha256(template.format(digest=digest).encode()).hexdigest()
+
+    @traced("document.load", input_size=False)
+    def load(self, file_path: str, segment: bool = False) -> str:
+        #returns cleaned (and, if requested, segmented) text for the pdf
+        Tracer.set_attribute("document.segmented", segment)
+        entry = self._cached(
+            file_path,
+            lambda pdf_bytes: self._generate_cache_key(pdf_bytes, segment),
+            lambda: {"kind": "document", "segmented": segment, "text": self._prepare(file_path, segment)}
+        )
+        return entry["text"]
+
+    @traced("document.load_structured", input_size=False)
+    def load_structured(self, file_path: str) -> dict:
+        #returns LayoutParser.parse() output for the pdf
+        entry = self._cached(
+            file_path,
+            lambda pdf_bytes: self._content_key(
+                pdf_bytes,
+                f"layout:{{digest}}:{LayoutParser.VERSION}:{self._settings_hash(Config.AREA_SYNONYMS)}"
+            ),
+            lambda: {"kind": "layout", "parsed": LayoutParser.parse(file_path)}
+        )
+        return entry["parsed"]
+
+    def _cached(self, file_path: str, make_key: Callable, build: Callable) -> dict:
+        #backend entry for the pdf, built and stored on a miss
+        if self.backend is None:
+            return build()
+
+        with open(file_path, "rb") as f:
+            pdf_bytes = f.read()
+        Tracer.set_attribute("input.bytes", len(pdf_bytes))
+        cache_key = make_key(pdf_bytes)
+
+        entry = None
+        try:
+            entry = self.backend.get(cache_key)
+        except Exception as e:
+            print(f"⚠ Document cache read error: {e}")
+
+        self._record(hit=entry is not None)
+        Tracer.set_attribute("cache.hit", entry is not None)
+        if entry is not None:
+            print(f"✓ Document cache hit: {cache_key[:12]}...")
+            return entry
+
+        entry = build()
+
+        try:
+            self.backend.set(cache_key, entry)
+        except Exception as e:
+            print(f"⚠ Document cache write error: {e}")
+
+        return entry
+
+    @staticmethod
+    def _prepare(file_path: str, segment: bool) -> str:
+        #streams pages straight into the fused clean/segment pass
+        try:
+            with Tracer.span("document.prepare", segmented=segment) as span:
+                # Parsing and cleaning interleave page by page, so each gets a
+                # timed attribute instead of a span of its own
+                timing = {"pages": 0, "parse": 0.0}
+                started = time.perf_counter()
+                text = DocumentCache._clean(DocumentCache._timed_pages(file_path, timing), segment)
+                total = time.perf_counter() - started
+
+                span.set("document.pages", timing["pages"])
+                span.set("document.parse_ms", round(timing["parse"] * 1000, 1))
+                span.set("document.segment_ms" if segment else "document.clean_ms",
+                         round((total - timing["parse"]) * 1000, 1))
+                return text
+
+        except Exception as e:
+            raise RuntimeError(f"Failed to read PDF {file_path}: {str(e)}")
+
+    @staticmethod
+    def _clean(pages: Iterator[str], segment: bool) -> str:
+        if segment:
+            return "\n".join(SectionSegmenter.segment_pages(pages))
+        return "\n".join(TextCleaner.clean_lines(pages))
+
+    @staticmethod
+    def _timed_pages(file_path: str, timing: dict) -> Iterator[str]:
+        #page texts, adding the time spent parsing them to timing["parse"]
+        pages = PDFParser.iter_pages(file_path)
+        while True:
+            started = time.perf_counter()
+            page = next(pages, None)
+            timing["parse"] += time.perf_counter() - started
+            if page is None:
+                return
+            timing["pages"] += 1
+            yield page[1]
+
+    @classmethod
+    def _record(cls, hit: bool):
+        with cls._stats_lock:
+            if hit:
+                cls.hits += 1
+            else:
+                cls.misses += 1
+
+    @classmethod
+    def stats(cls) -> dict:
+        """Return process-wide document cache hit/miss counters."""
+        with cls._stats_lock:
+            return {"hits": cls.hits, "misses": cls.misses}
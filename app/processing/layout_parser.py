@@ -0,0 +1,224 @@
+"""
+Layout-aware parsing of inspection reports into area -> findings records.
+
+PDFParser flattens each page to plain text, and SectionSegmenter then has
+to recover the "Impacted Area / Negative side / Positive side" structure
+by keyword filtering. LayoutParser instead reads PyMuPDF's get_text("dict")
+lines with their font flags, page by page, and follows the form's labels:
+
+    Impacted Areas/Rooms        -> room names used to name each area
+    Impacted Area <n>           -> starts a new area
+    Negative side Description   -> negative findings
+    Positive side Description   -> positive findings
+    ... side photographs        -> skipped (photo numbers and captions)
+
+Lines of one description cell sit directly below each other, so a line
+that follows the previous one without a gap continues its finding, unless
+it starts with a room name and the finding already reads as complete. Any
+other bold heading ends the current area's section (checklists, summary
+table).
+
+Each area is named after the room its first finding starts with. The
+confidence is the share of complete areas: named, with both negative and
+positive findings, none of which stops mid-sentence ("... open and").
+InspectionExtractor skips the LLM above
+Config.INSPECTION_STRUCTURED_MIN_CONFIDENCE.
+"""
+
+import re
+from typing import Iterator, Optional
+import fitz  # PyMuPDF
+from app.config import Config
+from app.utils.phrase_index import PhraseIndex, tokenize
+from app.utils.tracing import traced
+
+_ROOMS_LABEL = re.compile(r"^impacted areas?\s*/\s*rooms?\b", re.IGNORECASE)
+_AREA_LABEL = re.compile(r"^impacted area\s+(\d+)\s*$", re.IGNORECASE)
+_SIDE_LABEL = re.compile(r"^(negative|positive) side\s+(description|photo(?:graph)?s?)\s*$", re.IGNORECASE)
+# A finding ending like this was cut off (the cell overflowed or wrapped away)
+_DANGLING = re.compile(
+    r"(?:[,;:/&(-]|\b(?:and|or|with|of|at|in|on|to|the|from|near|due|below|above|between))$",
+    re.IGNORECASE
+)
+
+# PyMuPDF span flag for bold text
+_BOLD = 16
+
+
+class LayoutParser:
+    #reads inspection forms into structured areas without an LLM
+
+    # Bump when the parsing rules change so cached results are invalidated
+    VERSION = "2"
+
+    # Room words recognised even when the report has no "Impacted Areas/Rooms" list
+    ROOM_TERMS = [
+        "hall", "hallway", "living room", "bedroom", "master bedroom", "bed room", "kitchen",
+        "bathroom", "common bathroom", "toilet", "wc", "balcony", "terrace", "parking",
+        "parking area", "lobby", "passage", "staircase", "dining", "utility", "store room",
+        "study", "external wall"
+    ]
+
+    @staticmethod
+    @traced("pdf.parse_layout", input_size=False)
+    def parse(file_path: str) -> dict:
+        #{"areas": [...], "general_observations": [], "confidence": float}
+        #areas use the LLM extractor's shape, in report order
+        areas = []
+        complete = 0
+
+        try:
+            for area, usable in LayoutParser.iter_areas(file_path):
+                areas.append(area)
+                complete += usable
+        except Exception as e:
+            raise RuntimeError(f"Failed to read PDF {file_path}: {str(e)}")
+
+        return {
+            "areas": areas,
+            "general_observations": [],
+            "confidence": complete / len(areas) if areas else 0.0
+        }
+
+    @staticmethod
+    def iter_areas(file_path: str) -> Iterator[tuple]:
+        #yields (area, complete) as each area is completed, reading one page at a time
+        rooms = LayoutParser._room_index([])
+        room_list = []
+        state = None
+        area = None
+        previous = None  # (page, bottom, height) of the last description line
+
+        for text, bold, box in LayoutParser._iter_lines(file_path):
+            if _ROOMS_LABEL.match(text):
+                state = "rooms"
+                continue
+
+            number = _AREA_LABEL.match(text)
+            side = _SIDE_LABEL.match(text)
+
+            if number or side or bold:
+                if state == "rooms":
+                    rooms = LayoutParser._room_index(room_list)
+
+                if number:
+                    if area:
+                        yield LayoutParser._finish(area, rooms)
+                    area = {"number": number.group(1), "negative": [], "positive": []}
+                    state = None
+                elif side and area and side.group(2).lower() == "description":
+                    state = side.group(1).lower()
+                else:
+                    # Photo grids (numbers and captions) and any other heading
+                    # end the description
+                    state = None
+                previous = None
+                continue
+
+            if state == "rooms":
+                room_list.extend(name.strip() for name in text.split(","))
+            elif state:
+                LayoutParser._add_line(area[state], text, LayoutParser._follows(previous, box), rooms)
+                previous = box
+
+        if area:
+            yield LayoutParser._finish(area, rooms)
+
+    @staticmethod
+    def to_text(parsed: dict) -> str:
+        #the parsed areas in the report's own labels; a much smaller LLM prompt
+        #than the segmented page text when the areas cannot be used directly
+        lines = []
+        for number, area in enumerate(parsed["areas"], start=1):
+            lines.append(f"Impacted Area {number}: {area['area_name']}")
+            lines.append("Negative side Description")
+            lines.extend(area["negative_findings"])
+            lines.append("Positive side Description")
+            lines.extend(area["positive_findings"])
+        return "\n".join(lines)
+
+    @staticmethod
+    def _iter_lines(file_path: str) -> Iterator[tuple]:
+        #(text, bold, (page, bottom, height)) for every non-empty line, in PyMuPDF block order
+        with fitz.open(file_path) as document:
+            for number, page in enumerate(document):
+                for block in page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)["blocks"]:
+                    if block["type"] != 0:
+                        continue
+                    for line in block["lines"]:
+                        spans = [span for span in line["spans"] if span["text"].strip()]
+                        text = " ".join("".join(span["text"] for span in spans).split())
+                        if text:
+                            _, top, _, bottom = line["bbox"]
+                            yield text, any(span["flags"] & _BOLD for span in spans), (number, bottom, bottom - top)
+
+    @staticmethod
+    def _room_index(room_list: list) -> PhraseIndex:
+        #rooms listed in the report first, then the built-in and configured room words
+        index = PhraseIndex()
+        index.add_all([room for room in room_list if room], True)
+        index.add_all(LayoutParser.ROOM_TERMS, True)
+        for term, aliases in Config.AREA_SYNONYMS.items():
+            index.add_all([term, *aliases], True)
+        return index
+
+    @staticmethod
+    def _follows(previous: Optional[tuple], box: tuple) -> bool:
+        #True if the line starts right below the previous one, i.e. in the same cell
+        if previous is None or previous[0] != box[0]:
+            return False
+        gap = box[1] - box[2] - previous[1]
+        return -previous[2] / 2 <= gap <= previous[2] / 2
+
+    @staticmethod
+    def _add_line(findings: list, text: str, wrapped: bool, rooms: PhraseIndex):
+        #a wrapped line continues the previous finding unless it names a room
+        #and that finding is already complete
+        if wrapped and findings and (
+            rooms.leading_match(text) is None or LayoutParser._incomplete(findings[-1])
+        ):
+            findings[-1] = f"{findings[-1]} {text}"
+        elif text not in findings:
+            findings.append(text)
+
+    @staticmethod
+    def _incomplete(finding: str) -> bool:
+        return bool(_DANGLING.search(finding.rstrip()))
+
+    @staticmethod
+    def _finish(area: dict, rooms: PhraseIndex) -> tuple:
+        name = None
+        for finding in area["negative"] + area["positive"]:
+            name = LayoutParser._room_name(finding, rooms)
+            if name:
+                break
+
+        findings = area["negative"] + area["positive"]
+        complete = (
+            name is not None and area["negative"] and area["positive"]
+            and not any(LayoutParser._incomplete(finding) for finding in findings)
+        )
+
+        return {
+            "area_name": name or f"Impacted Area {area['number']}",
+            "negative_findings": area["negative"],
+            "positive_findings": area["positive"]
+        }, bool(complete)
+
+    @staticmethod
+    def _room_name(finding: str, rooms: PhraseIndex) -> Optional[str]:
+        #leading words of the finding up to the end of the room it names,
+        #e.g. "Master bedroom Skirting level Dampness" -> "Master bedroom"
+        match = rooms.leading_match(finding, within=2)
+        if match is None:
+            return None
+
+        start, length, _ = match
+        words = []
+        tokens = 0
+        for word in finding.split():
+            words.append(word)
+            tokens += len(tokenize(word))
+            if tokens >= start + length:
+                break
+        return " ".join(words).strip(" ,:-")
@@ -1,30 +1,73 @@
 import re
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional
+from app.config import Config
+from app.processing.text_cleaner import TextCleaner
+from app.utils.tracing import traced
 
 
 class SectionSegmenter:
    #splits large inspection text into logical sections
 
+    # Bump when segmenting output changes so cached documents are rebuilt
+    VERSION = "1"
+
     @staticmethod
-    def extract_relevant_sections(text: str) -> str:
-
-        keywords = [
-            "impacted area",
-            "negative side",
-            "positive side",
-            "summary",
-            "observation",
-            "damp",
-            "leakage",
-            "plumbing"
-        ]
-
-        lines = text.splitlines()
-        relevant_lines = []
-
-        for line in lines:
-            lower_line = line.lower()
-            if any(keyword in lower_line for keyword in keywords):
-                relevant_lines.append(line)
+    @traced("text.segment")
+    def extract_relevant_sections(text: str, keywords: Optional[list] = None) -> str:
 
         # Join only relevant lines
-        return "\n".join(relevant_lines)
+        return "\n".join(SectionSegmenter.segment_pages([text], keywords))
+
+    @staticmethod
+    def segment_pages(pages: Iterable[str], keywords: Optional[list] = None) -> Iterator[str]:
+        #fused clean + segment: yields cleaned lines containing a keyword
+        #the keyword pattern is searched across each page's lowercased text,
+        #so only matching lines are ever sliced out and cleaned
+        pattern = _compile_keywords(tuple(k.lower() for k in keywords or Config.SEGMENT_KEYWORDS))
+        carry = ""
+
+        for page in pages:
+            text = carry + page
+            # Only complete lines are scanned; the tail waits for the next page
+            end = text.rfind("\n") + 1
+            carry = text[end:]
+            yield from _matching_lines(text, end, pattern)
+
+        if carry:
+            yield from _matching_lines(carry, len(carry), pattern)
+
+
+@lru_cache(maxsize=32)
+def _compile_keywords(keywords: tuple) -> re.Pattern:
+    #one alternation over lowercase keywords; whitespace inside a keyword
+    #matches any run of spaces/tabs because lines are matched before cleaning
+    alternatives = [
+        r"[ \t]+".join(re.escape(word) for word in keyword.split())
+        for keyword in keywords
+    ]
+    return re.compile("|".join(alternatives))
+
+
+def _matching_lines(text: str, end: int, pattern: re.Pattern) -> Iterator[str]:
+    # Searching a lowercased copy is several times faster than re.IGNORECASE.
+    # Rare characters change length when lowercased; fall back for those pages.
+    haystack = text.lower()
+    if len(haystack) != len(text):
+        haystack = text
+        pattern = re.compile(pattern.pattern, re.IGNORECASE)
+
+    pos = 0
+
+    while True:
+        match = pattern.search(haystack, pos, end)
+        if not match:
+            return
+
+        line_start = text.rfind("\n", 0, match.start()) + 1
+        line_end = text.find("\n", match.end(), end)
+        if line_end == -1:
+            line_end = end
+
+        yield TextCleaner.clean_line(text[line_start:line_end])
+        pos = line_end + 1
@@ -1,25 +1,53 @@
 import re
+from typing import Iterable, Iterator
+from app.utils.tracing import traced
 
 
 class TextCleaner:
    #cleans raw extracted text from pdf
 
+    # Bump when cleaning output changes so cached documents are rebuilt
+    VERSION = "2"
+
+    _SPACES = re.compile(r"[ \t]{2,}")
+
     @staticmethod
+    @traced("text.clean")
     def clean(text: str) -> str:
 
         if not text:
             return ""
 
-        # Remove page numbers that appear alone on lines
-        text = re.sub(r"\n\s*\d+\s*\n", "\n", text)
+        return "\n".join(TextCleaner.clean_lines([text]))
+
+    @staticmethod
+    def clean_line(line: str) -> str:
+        # Replace multiple spaces with single space and trim the line
+        return TextCleaner._SPACES.sub(" ", line).strip()
+
+    @staticmethod
+    def clean_lines(pages: Iterable[str]) -> Iterator[str]:
+        #streams cleaned lines from an iterable of page texts in one pass
+        #pages are treated as one continuous text, as PDFParser joins them
+
+        for line in iter_lines(pages):
+            line = TextCleaner.clean_line(line)
+
+            # Drop blank lines and page numbers that appear alone on lines
+            if not line or line.isdigit():
+                continue
+
+            yield line
 
-        # Replace multiple newlines with single newline
-        text = re.sub(r"\n{2,}", "\n", text)
 
-        # Replace multiple spaces with single space
-        text = re.sub(r"[ \t]{2,}", " ", text)
+def iter_lines(pages: Iterable[str]) -> Iterator[str]:
+    #yields lines across page texts, carrying a partial last line into the next page
+    carry = ""
 
-        # Remove trailing spaces on each line
-        text = "\n".join(line.strip() for line in text.splitlines())
+    for page in pages:
+        lines = (carry + page).split("\n")
+        carry = lines.pop()
+        yield from lines
 
-        return text.strip()
+    if carry:
+        yield carry
@@ -1,17 +1,216 @@
+import asyncio
+import contextvars
 import json
 import re
+from concurrent.futures import ThreadPoolExecutor
 from app.extraction.llm_client import LLMClient
 from app.config import Config
+from app.intelligence.models import PropertyData
+from app.reporting.prompt_compactor import PromptCompactor
+from app.utils.tracing import Tracer, traced
 
 class DDRBuilder:
     # Generates the final DDR report from processed data
     
+    SEVERITY_ORDER = {"Low": 1, "Moderate": 2, "Medium": 2, "High": 3, "Critical": 4}
+
     def __init__(self):
         self.client = LLMClient(Config.MODEL_GENERATION)
     
-    def build(self, normalized_data: dict, conflicts: list, missing: list) -> dict:
+    @traced("ddr.build", input_size=False)
+    def build(self, normalized_data: PropertyData, conflicts: list, missing: list) -> dict:
+        self._trace_input(normalized_data, conflicts)
+        if Config.DDR_GENERATION_MODE == "fanout":
+            return self._build_fanout(normalized_data, conflicts, missing)
+
+        # Call LLM to generate DDR
+        response = self.client.generate(
+            prompt=self._build_prompt(normalized_data, conflicts, missing),
+            temperature=Config.GENERATION_TEMPERATURE
+        )
+        
+        return self._parse_json(response)
+
+    @traced("ddr.build", input_size=False)
+    async def abuild(self, normalized_data: PropertyData, conflicts: list, missing: list) -> dict:
+        # Awaitable counterpart of build()
+        self._trace_input(normalized_data, conflicts)
+        if Config.DDR_GENERATION_MODE == "fanout":
+            prompts = self._area_prompts(normalized_data, conflicts)
+            responses = await asyncio.gather(*[
+                self.client.agenerate(prompt=prompt, temperature=Config.GENERATION_TEMPERATURE)
+                for _, prompt in prompts
+            ])
+            areas = self._area_results(prompts, responses)
+
+            summary = await self.client.agenerate(
+                prompt=self._build_summary_prompt(normalized_data, areas, conflicts, missing),
+                temperature=Config.GENERATION_TEMPERATURE
+            )
+            return self._assemble(areas, self._parse_json(summary))
+
+        response = await self.client.agenerate(
+            prompt=self._build_prompt(normalized_data, conflicts, missing),
+            temperature=Config.GENERATION_TEMPERATURE
+        )
+
+        return self._parse_json(response)
+
+    def _build_fanout(self, normalized_data: PropertyData, conflicts: list, missing: list) -> dict:
+        # Map: one short call per area, run concurrently. Each prompt depends
+        # only on its own area, so the LLM cache reuses unchanged areas.
+        prompts = self._area_prompts(normalized_data, conflicts)
+        responses = []
+
+        if prompts:
+            workers = min(Config.DDR_AREA_MAX_WORKERS, len(prompts))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(contextvars.copy_context().run, self.client.generate,
+                                prompt, Config.GENERATION_TEMPERATURE)
+                    for _, prompt in prompts
+                ]
+                responses = [f.result() for f in futures]
+
+        areas = self._area_results(prompts, responses)
+
+        # Reduce: one short call for the property-wide sections
+        summary = self.client.generate(
+            prompt=self._build_summary_prompt(normalized_data, areas, conflicts, missing),
+            temperature=Config.GENERATION_TEMPERATURE
+        )
+
+        return self._assemble(areas, self._parse_json(summary))
+
+    @staticmethod
+    def _trace_input(normalized_data: PropertyData, conflicts: list):
+        # input.items counts areas; the first sized argument would be the conflicts
+        if not Tracer.enabled():
+            return
+        areas = PropertyData.coerce(normalized_data).areas
+        Tracer.set_attribute("input.items", len(areas))
+        Tracer.set_attribute("input.findings", sum(len(a.negative) + len(a.positive) for a in areas.values()))
+        Tracer.set_attribute("input.conflicts", len(conflicts))
+
+    def _area_prompts(self, normalized_data: PropertyData, conflicts: list) -> list:
+        # Returns [(area name, prompt)]
+        prompts = []
+        for name, area_json in PromptCompactor.area_payloads(normalized_data):
+            area_conflicts = [c.message for c in conflicts if c.area == name]
+            prompts.append((name, self._build_area_prompt(area_json, area_conflicts)))
+        return prompts
+
+    def _area_results(self, prompts: list, responses: list) -> list:
+        results = []
+        for (name, _), response in zip(prompts, responses):
+            result = self._parse_json(response)
+            result["name"] = name
+            results.append(result)
+        return results
+
+    def _assemble(self, areas: list, summary: dict) -> dict:
+        # Stitch per-area sections and the summary into the usual DDR sections
+        if not areas:
+            observations = root_causes = "Not Available"
+            severity = "**Severity Level:** Not Available"
+        else:
+            observations = "\n\n".join(
+                f"**{a['name']}:**\n{a.get('observations', 'Not Available')}" for a in areas
+            )
+            root_causes = "\n\n".join(
+                f"**{a['name']}:** {a.get('root_cause', 'Not Available')}" for a in areas
+            )
+            levels = [str(a.get("severity", "")).strip().capitalize() for a in areas]
+            overall = max(levels, key=lambda level: self.SEVERITY_ORDER.get(level, 0))
+            reasons = "\n".join(
+                f"- {a['name']} ({level or 'Not Available'}): {a.get('severity_reason', 'Not Available')}"
+                for a, level in zip(areas, levels)
+            )
+            severity = f"**Severity Level:** {overall or 'Not Available'}\n\n**Reasoning:**\n{reasons}"
+
+        return {
+            "property_summary": summary.get("property_summary", "Not Available"),
+            "area_observations": observations,
+            "root_cause": root_causes,
+            "severity": severity,
+            "recommendations": summary.get("recommendations", "Not Available"),
+            "additional_notes": summary.get("additional_notes", "Not Available"),
+            "missing_info": summary.get("missing_info", "Not Available")
+        }
+
+    def _build_area_prompt(self, area_json: str, area_conflicts: list) -> str:
+        # Per-area prompt for fan-out mode
+        return f"""
+Write the diagnostic sections for ONE area of a property inspection report.
+
+CRITICAL RULES:
+- Use ONLY the provided data below - do NOT invent facts
+- If data is empty or missing, write "Not Available"
+- Do NOT mention thermal readings if the area has none
+- Be specific and use simple language
+- Explain technical terms in parentheses
+
+Return ONLY valid JSON in this structure (ALL values must be STRINGS with \\n for line breaks):
+
+{{
+  "observations": "- Finding 1\\n- Finding 2",
+  "root_cause": "Likely cause based on evidence, or what is missing to tell",
+  "severity": "Low, Moderate, High or Critical",
+  "severity_reason": "One sentence explaining the severity"
+}}
+
+AREA (neg = negative side findings, pos = positive side findings, thermal = [image_id, hotspot, coldspot] in °C):
+
+{area_json}
+
+Conflicts: {json.dumps(area_conflicts, ensure_ascii=False)}
+
+Return ONLY the JSON object. Start with {{ and end with }}.
+"""
+
+    def _build_summary_prompt(self, normalized_data: PropertyData, areas: list, conflicts: list, missing: list) -> str:
+        # Reduce prompt for fan-out mode: works from the per-area results only
+        area_summaries = [
+            {"name": a["name"], "severity": a.get("severity", ""), "root_cause": a.get("root_cause", "")}
+            for a in areas
+        ]
+        data = {
+            "areas": area_summaries,
+            "general_thermal": PromptCompactor.general_thermal(normalized_data),
+            "recurring_findings": PropertyData.coerce(normalized_data).recurring_findings,
+            "conflicts": [c.message for c in conflicts],
+            "missing": missing
+        }
+
+        return f"""
+Summarise a property inspection from its per-area diagnoses.
+
+CRITICAL RULES:
+- Use ONLY the provided data below - do NOT invent facts
+- If data is empty or missing, write "Not Available"
+- Be specific and use simple language
+
+Return ONLY valid JSON in this structure (ALL values must be STRINGS with \\n for line breaks):
+
+{{
+  "property_summary": "2-3 sentence overview of issues and severity based on the data",
+  "recommendations": "**Immediate Actions (1-2 days):**\\n1. Action\\n\\n**Short-term (1-2 weeks):**\\n2. Action\\n\\n**Long-term:**\\n3. Action",
+  "additional_notes": "Patterns observed across areas, further investigation needs, preventive advice",
+  "missing_info": "List missing data OR write: All necessary information was available."
+}}
+
+DATA (general_thermal = [image_id, hotspot, coldspot] in °C, not linked to an area):
+
+{json.dumps(data, ensure_ascii=False, separators=(",", ":"))}
+
+Return ONLY the JSON object. Start with {{ and end with }}.
+"""
+
+    def _build_prompt(self, normalized_data: PropertyData, conflicts: list, missing: list) -> str:
         # Build comprehensive prompt for DDR generation
-        prompt = f"""
+        data = PromptCompactor.compact(normalized_data, [c.message for c in conflicts], missing)
+
+        return f"""
 Generate a professional Detailed Diagnostic Report (DDR) for a property inspection.
 
 CRITICAL RULES:
@@ -20,6 +219,7 @@ CRITICAL RULES:
 - Do NOT mention thermal readings if thermal data is empty
 - Be specific and use simple language
 - Explain technical terms in parentheses
+- Areas listed as omitted have no detail in DATA; name them in area_observations without inventing findings
 
 Return ONLY valid JSON in this structure (ALL values must be STRINGS with \\n for line breaks):
 
@@ -35,21 +235,10 @@ Return ONLY valid JSON in this structure (ALL values must be STRINGS with \\n fo
 
 DATA:
 
-{normalized_data}
-
-Conflicts: {conflicts}
-Missing: {missing}
+{data}
 
 Return ONLY the JSON object. Start with {{ and end with }}.
 """
-        
-        # Call LLM to generate DDR
-        response = self.client.generate(
-            prompt=prompt,
-            temperature=Config.GENERATION_TEMPERATURE
-        )
-        
-        return self._parse_json(response)
     
     def _parse_json(self, response_text: str) -> dict:
         # Extract and parse JSON from LLM response
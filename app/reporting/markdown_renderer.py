@@ -1,7 +1,11 @@
+from app.utils.tracing import traced
+
+
 class MarkdownRenderer:
    #markdown format
 
     @staticmethod
+    @traced("render.markdown")
     def render(ddr_sections: dict) -> str:
         
         md = "# Detailed Diagnostic Report (DDR)\n\n"
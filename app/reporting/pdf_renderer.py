@@ -8,12 +8,14 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak,
 from reportlab.lib import colors
 from datetime import datetime
 import re
+from app.utils.tracing import traced
 
 
 class PDFRenderer:
     #converts markdown to pdf
     
     @staticmethod
+    @traced("render.pdf")
     def render(markdown_content: str, output_path: str) -> str:
         #returns pdf file path
         
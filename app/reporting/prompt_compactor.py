@@ -0,0 +1,255 @@
+import json
+from typing import Optional
+from app.config import Config
+from app.extraction.chunker import TextChunker
+from app.intelligence.models import Area, PropertyData, ThermalReading
+
+
+class PromptCompactor:
+    """
+    Serializes the DDR input (normalized data, conflicts, missing info) compactly.
+
+    Replaces the Python repr of normalized_data in the generation prompt:
+    - minified JSON ("json") or one line per area ("table")
+    - each thermal reading appears once, either under its linked area or in
+      general_thermal, instead of both at the top level and inside the area
+    - temperatures are reduced to bare numbers (°C); once ThermalAnalytics
+      has run, per-area ΔT statistics and the outlier images replace the
+      full list of readings
+    - over the token budget, the highest-severity areas are kept and the
+      rest are listed by name only, so the report can still mention them
+    """
+
+    # Weight of each term found in an area's negative findings
+    SEVERITY_TERMS = {
+        "leak": 3,
+        "seepage": 3,
+        "crack": 3,
+        "structural": 3,
+        "damp": 2,
+        "efflorescence": 2,
+        "spalling": 2,
+        "fungus": 2,
+        "mould": 2,
+        "mold": 2,
+        "peel": 1,
+        "hollow": 1,
+        "gap": 1,
+        "joint": 1,
+    }
+
+    @staticmethod
+    def compact(normalized_data: PropertyData, conflicts: list, missing: list,
+                budget_tokens: Optional[int] = None, style: Optional[str] = None) -> str:
+        #returns the DATA block for the DDR prompt
+        budget_tokens = budget_tokens or Config.DDR_PROMPT_TOKEN_BUDGET
+        style = (style or Config.DDR_PROMPT_FORMAT).lower()
+        if style not in ("json", "table"):
+            raise ValueError(f"Unknown DDR prompt format: {style}. Supported: 'json', 'table'")
+
+        normalized_data = PropertyData.coerce(normalized_data)
+        areas = PromptCompactor._areas(normalized_data)
+        general = PromptCompactor._general_thermal(normalized_data)
+        survey = (normalized_data.thermal_stats or {}).get("survey")
+
+        if style == "table":
+            render, entry = PromptCompactor._render_table, PromptCompactor._area_line
+        else:
+            render, entry = PromptCompactor._render_json, PromptCompactor._area_entry
+
+        text = render(areas, general, [], conflicts, missing, survey)
+        if TextChunker.estimate_tokens(text) <= budget_tokens:
+            return text
+
+        # Over budget: start from a names-only listing and admit full areas,
+        # then general readings, by severity until the budget is spent.
+        # Each item is costed on its own so this stays linear in area count.
+        names = [area["name"] for area in areas]
+        remaining = budget_tokens - TextChunker.estimate_tokens(render([], [], names, conflicts, missing, survey))
+
+        kept = set()
+        for index in sorted(range(len(areas)), key=lambda i: -areas[i]["severity"]):
+            cost = TextChunker.estimate_tokens(entry(areas[index]))
+            if cost > remaining:
+                break
+            kept.add(index)
+            remaining -= cost
+
+        kept_general = []
+        for row in sorted(general, key=lambda row: -PromptCompactor._delta(row)):
+            cost = TextChunker.estimate_tokens(json.dumps(row))
+            if cost > remaining:
+                break
+            kept_general.append(row)
+            remaining -= cost
+
+        # Emitted in report order, not severity order
+        kept_areas = [area for i, area in enumerate(areas) if i in kept]
+        omitted = [area["name"] for i, area in enumerate(areas) if i not in kept]
+        return render(kept_areas, kept_general, omitted, conflicts, missing, survey)
+
+    @staticmethod
+    def area_payloads(normalized_data: PropertyData) -> list:
+        #[(area name, compact JSON of that area alone)] in report order
+        return [(area["name"], PromptCompactor._area_entry(area))
+                for area in PromptCompactor._areas(PropertyData.coerce(normalized_data))]
+
+    @staticmethod
+    def general_thermal(normalized_data: PropertyData) -> list:
+        #deduplicated [image_id, hotspot, coldspot] rows not linked to any area
+        return PromptCompactor._general_thermal(PropertyData.coerce(normalized_data))
+
+    @staticmethod
+    def area_severity(area: Area, signal: Optional[float] = None) -> float:
+        #higher means the area should be kept first when trimming
+        score = 0.0
+        for finding in area.negative:
+            lowered = finding.text.lower()
+            score += sum(w for term, w in PromptCompactor.SEVERITY_TERMS.items() if term in lowered)
+
+        # A large hot/cold spread is itself a sign of moisture
+        if signal is not None:
+            score += 5 * signal
+        else:
+            deltas = area.deltas
+            if deltas:
+                score += max(deltas) / 2
+
+        return score
+
+    @staticmethod
+    def _areas(normalized_data: PropertyData) -> list:
+        area_stats = (normalized_data.thermal_stats or {}).get("areas", {})
+        areas = []
+
+        for name, area in normalized_data.areas.items():
+            stats = area_stats.get(name)
+            readings = area.thermal_readings
+
+            if stats:
+                # Statistics plus the images that stand out, not every reading
+                stats = dict(stats, outlier_images=[r.image_id for r in readings if r.outlier])
+                readings = []
+
+            areas.append({
+                "name": name,
+                "neg": area.negative_findings,
+                "pos": area.positive_findings,
+                "thermal": PromptCompactor._dedupe_rows(PromptCompactor._reading_row(r) for r in readings),
+                "thermal_stats": stats,
+                "severity": PromptCompactor.area_severity(area, stats and stats["signal"])
+            })
+        return areas
+
+    @staticmethod
+    def _general_thermal(normalized_data: PropertyData) -> list:
+        #readings not linked to an area; before AreaLinker runs that is all of them.
+        #with survey statistics available only the outliers are listed
+        readings = normalized_data.unlinked_thermal()
+        if normalized_data.thermal_stats:
+            readings = [r for r in readings if r.outlier]
+        return PromptCompactor._dedupe_rows(PromptCompactor._reading_row(r) for r in readings)
+
+    @staticmethod
+    def _reading_row(reading: ThermalReading) -> list:
+        #[image_id, hotspot, coldspot]; whole degrees are written without ".0"
+        return [
+            reading.image_id,
+            PromptCompactor._number(reading.hotspot),
+            PromptCompactor._number(reading.coldspot)
+        ]
+
+    @staticmethod
+    def _number(value):
+        if value is not None and float(value).is_integer():
+            return int(value)
+        return value
+
+    @staticmethod
+    def _delta(row: list) -> float:
+        hot, cold = row[1], row[2]
+        if isinstance(hot, (int, float)) and isinstance(cold, (int, float)):
+            return hot - cold
+        return 0.0
+
+    @staticmethod
+    def _dedupe_rows(rows) -> list:
+        seen = set()
+        unique = []
+        for row in rows:
+            key = tuple(row)
+            if key not in seen:
+                seen.add(key)
+                unique.append(row)
+        return unique
+
+    @staticmethod
+    def _area_entry(area: dict) -> str:
+        entry = {"name": area["name"]}
+        for key in ("neg", "pos", "thermal", "thermal_stats"):
+            if area[key]:
+                entry[key] = area[key]
+        return json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+
+    @staticmethod
+    def _area_line(area: dict) -> str:
+        return " | ".join([
+            area["name"],
+            "; ".join(area["neg"]) or "-",
+            "; ".join(area["pos"]) or "-",
+            PromptCompactor._stats_cell(area["thermal_stats"])
+            or PromptCompactor._thermal_cells(area["thermal"]) or "-"
+        ])
+
+    @staticmethod
+    def _stats_cell(stats: Optional[dict]) -> str:
+        if not stats:
+            return ""
+        cell = (f"{stats['images']} images, ΔT max {stats['max_delta']} mean {stats['mean_delta']}, "
+                f"signal {stats['signal']}")
+        if stats["outlier_images"]:
+            cell += ", outliers " + " ".join(stats["outlier_images"])
+        return cell
+
+    @staticmethod
+    def _thermal_cells(rows: list) -> str:
+        return ", ".join(f"{row[0]}:{row[1]}/{row[2]}" for row in rows)
+
+    @staticmethod
+    def _render_json(areas: list, general: list, omitted: list, conflicts: list, missing: list,
+                     survey: Optional[dict] = None) -> str:
+        #areas are pre-serialized so the budget pass and the output agree on size
+        parts = [
+            '"temperature_unit":"C"',
+            '"thermal_columns":["image_id","hotspot","coldspot"]',
+            '"areas":[' + ",".join(PromptCompactor._area_entry(area) for area in areas) + "]"
+        ]
+        if survey:
+            parts.append('"thermal_survey":' + json.dumps(survey, separators=(",", ":")))
+        if general:
+            parts.append('"general_thermal":' + json.dumps(general, ensure_ascii=False, separators=(",", ":")))
+        if omitted:
+            parts.append('"omitted_areas":' + json.dumps(omitted, ensure_ascii=False))
+        parts.append('"conflicts":' + json.dumps(conflicts, ensure_ascii=False))
+        parts.append('"missing":' + json.dumps(missing, ensure_ascii=False))
+
+        return "{" + ",".join(parts) + "}"
+
+    @staticmethod
+    def _render_table(areas: list, general: list, omitted: list, conflicts: list, missing: list,
+                      survey: Optional[dict] = None) -> str:
+        lines = ["Areas (name | negative findings | positive findings | thermal image:hotspot/coldspot °C "
+                 "or ΔT statistics):"]
+        lines.extend(PromptCompactor._area_line(area) for area in areas)
+
+        if survey:
+            lines.append("Thermal survey (ΔT °C): " + ", ".join(f"{k} {v}" for k, v in survey.items()))
+        if general:
+            lines.append("General thermal (image:hotspot/coldspot °C): " + PromptCompactor._thermal_cells(general))
+        if omitted:
+            lines.append("Omitted areas (no detail available): " + ", ".join(omitted))
+
+        lines.append("Conflicts: " + ("; ".join(conflicts) if conflicts else "None"))
+        lines.append("Missing: " + ("; ".join(missing) if missing else "None"))
+
+        return "\n".join(lines)
@@ -0,0 +1,559 @@
+import copy
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+
+class CacheBackend(ABC):
+    """
+    Key/value store for cache entries.
+
+    Values are JSON-serialisable dicts. Every backend records when an entry was
+    created and last hit, and honours optional entry-count, byte-size and TTL
+    limits, evicting least recently hit entries first.
+
+    Persistent backends also hand out leases: short-lived exclusive claims
+    on a key that let one process compute a missing entry while others wait
+    for it. A lease expires after ttl_seconds so a crashed holder cannot
+    block the key forever.
+    """
+
+    def __init__(self, max_entries: int = None, max_bytes: int = None, ttl_seconds: float = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[dict]:
+        """Return the stored value, or None if absent or expired."""
+        pass
+
+    def get_entry(self, key: str) -> Optional[tuple]:
+        """Return (value, created_at), or None; lets a tier keep the entry's original age."""
+        value = self.get(key)
+        return None if value is None else (value, time.time())
+
+    @abstractmethod
+    def set(self, key: str, value: dict):
+        """Store a value, replacing any existing entry atomically."""
+        pass
+
+    @abstractmethod
+    def delete(self, key: str):
+        pass
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+    def acquire_lease(self, key: str, ttl_seconds: float) -> bool:
+        """Claim key for ttl_seconds; False if another process holds an unexpired lease."""
+        # Nothing outside this process can see an in-memory store
+        return True
+
+    def release_lease(self, key: str):
+        pass
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU cache; also used as the hot tier in front of a persistent backend."""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = None, ttl_seconds: float = None):
+        super().__init__(max_entries, max_bytes, ttl_seconds)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self.get_entry(key)
+        return None if entry is None else entry[0]
+
+    def get_entry(self, key: str) -> Optional[tuple]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self._expired(entry["created_at"], now):
+                self._remove(key)
+                return None
+            entry["last_hit_at"] = now
+            self._entries.move_to_end(key)
+            value, created_at = entry["value"], entry["created_at"]
+        # Callers get their own copy, so mutating a result cannot change the cache
+        return copy.deepcopy(value), created_at
+
+    def set(self, key: str, value: dict, size: int = None, created_at: float = None):
+        #created_at keeps the age of an entry promoted from a slower tier
+        now = time.time()
+        size = size if size is not None else len(json.dumps(value, ensure_ascii=False))
+        value = copy.deepcopy(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = {"value": value, "size": size, "created_at": created_at or now,
+                                  "last_hit_at": now}
+            self._bytes += size
+            self._evict()
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str):
+        self._bytes -= self._entries.pop(key)["size"]
+
+    def _evict(self):
+        # OrderedDict keeps least recently hit entries first
+        while self._entries and (
+            (self.max_entries and len(self._entries) > self.max_entries)
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            self._remove(next(iter(self._entries)))
+
+
+class FileCacheBackend(CacheBackend):
+    """
+    One JSON file per key in a directory (the original cache layout).
+
+    Writes go to a temporary file that is renamed into place, so concurrent
+    writers of the same key never leave a torn file. The creation time is
+    stored in the entry; the last-hit time is kept in the file's atime so a
+    hit does not rewrite the file. Eviction scans the directory, so it only
+    runs once the limits are exceeded and trims 10% below them.
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int = None, max_bytes: int = None,
+                 ttl_seconds: float = None):
+        super().__init__(max_entries, max_bytes, ttl_seconds)
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Running totals are only needed (and only worth a directory scan) with limits
+        limited = max_entries or max_bytes
+        self._entry_count, self._byte_count = self._scan_totals() if limited else (0, 0)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self.get_entry(key)
+        return None if entry is None else entry[0]
+
+    def get_entry(self, key: str) -> Optional[tuple]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+
+        now = time.time()
+        # Entries written before timestamps were recorded fall back to mtime
+        created_at = data.get("created_at", stat.st_mtime)
+        if self._expired(created_at, now):
+            self.delete(key)
+            return None
+
+        try:
+            os.utime(path, (now, stat.st_mtime))
+        except OSError:
+            pass
+
+        return data, created_at
+
+    def set(self, key: str, value: dict):
+        data = dict(value)
+        data["created_at"] = time.time()
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        path = self._path(key)
+
+        # Not ".json", so clear() and the directory scans never see a half-written entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp-", suffix=".part")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(payload)
+            try:
+                old_size = path.stat().st_size
+                existed = True
+            except FileNotFoundError:
+                old_size, existed = 0, False
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        with self._lock:
+            if not existed:
+                self._entry_count += 1
+            # An overwrite only adds the difference to the replaced entry
+            self._byte_count += len(payload.encode("utf-8")) - old_size
+            over_limit = (
+                (self.max_entries and self._entry_count > self.max_entries)
+                or (self.max_bytes and self._byte_count > self.max_bytes)
+            )
+
+        if over_limit:
+            self._evict()
+
+    def delete(self, key: str):
+        try:
+            size = self._path(key).stat().st_size
+            self._path(key).unlink()
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._entry_count -= 1
+            self._byte_count -= size
+
+    def acquire_lease(self, key: str, ttl_seconds: float) -> bool:
+        #O_EXCL creation is atomic, also on network filesystems that honour it
+        path = self.cache_dir / f"{key}.lease"
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    if time.time() - path.stat().st_mtime <= ttl_seconds:
+                        return False
+                    path.unlink()  # holder died without releasing; take over
+                except FileNotFoundError:
+                    pass
+                continue
+            with os.fdopen(fd, "w") as f:
+                f.write(str(os.getpid()))
+            return True
+        return False
+
+    def release_lease(self, key: str):
+        try:
+            (self.cache_dir / f"{key}.lease").unlink()
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith((".json", ".lease")):
+                try:
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    pass
+        with self._lock:
+            self._entry_count, self._byte_count = 0, 0
+
+    def _scan(self) -> list:
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".json"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_atime, stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _scan_totals(self) -> tuple:
+        entries = self._scan()
+        return len(entries), sum(size for _, _, size, _ in entries)
+
+    def _evict(self):
+        with self._lock:
+            now = time.time()
+            entries = sorted(self._scan())
+            target_entries = int(self.max_entries * 0.9) if self.max_entries else None
+            target_bytes = int(self.max_bytes * 0.9) if self.max_bytes else None
+            count = len(entries)
+            total = sum(size for _, _, size, _ in entries)
+
+            for atime, mtime, size, path in entries:
+                stale = self._expired(mtime, now)
+                over = (
+                    (target_entries is not None and count > target_entries)
+                    or (target_bytes is not None and total > target_bytes)
+                )
+                if not (stale or over):
+                    continue
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    continue
+                count -= 1
+                total -= size
+
+            self._entry_count, self._byte_count = count, total
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Single-file SQLite store in WAL mode.
+
+    Entry count and total bytes are maintained by triggers, so limit checks are
+    O(1) and eviction deletes the least recently hit rows through an index.
+    Each thread gets its own connection; WAL lets readers proceed while
+    another process writes. A hit only rewrites last_hit_at when the stored
+    time is older than HIT_RESOLUTION seconds, so hot keys do not turn every
+    read into a write transaction.
+    """
+
+    # LRU order is only kept to this many seconds
+    HIT_RESOLUTION = 60.0
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS entries (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        created_at REAL NOT NULL,
+        last_hit_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS entries_last_hit ON entries (last_hit_at);
+    CREATE TABLE IF NOT EXISTS totals (
+        id INTEGER PRIMARY KEY CHECK (id = 0),
+        entries INTEGER NOT NULL,
+        bytes INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO totals VALUES (0, 0, 0);
+    CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+        UPDATE totals SET entries = entries + 1, bytes = bytes + NEW.size WHERE id = 0;
+    END;
+    CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN
+        UPDATE totals SET bytes = bytes + NEW.size - OLD.size WHERE id = 0;
+    END;
+    CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+        UPDATE totals SET entries = entries - 1, bytes = bytes - OLD.size WHERE id = 0;
+    END;
+    CREATE TABLE IF NOT EXISTS leases (
+        key TEXT PRIMARY KEY,
+        expires_at REAL NOT NULL
+    );
+    """
+
+    def __init__(self, db_path: str, max_entries: int = None, max_bytes: int = None,
+                 ttl_seconds: float = None):
+        super().__init__(max_entries, max_bytes, ttl_seconds)
+        self.db_path = str(db_path)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript(self._SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self.get_entry(key)
+        return None if entry is None else entry[0]
+
+    def get_entry(self, key: str) -> Optional[tuple]:
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, created_at, last_hit_at FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        now = time.time()
+        if self._expired(row[1], now):
+            self.delete(key)
+            return None
+
+        if now - row[2] >= self.HIT_RESOLUTION:
+            conn.execute("UPDATE entries SET last_hit_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value: dict):
+        payload = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        size = len(payload.encode("utf-8"))
+        now = time.time()
+        conn = self._conn()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                """
+                INSERT INTO entries (key, value, size, created_at, last_hit_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    value = excluded.value,
+                    size = excluded.size,
+                    created_at = excluded.created_at,
+                    last_hit_at = excluded.last_hit_at
+                """,
+                (key, payload, size, now, now)
+            )
+            self._evict(conn, now)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, key: str):
+        self._conn().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def acquire_lease(self, key: str, ttl_seconds: float) -> bool:
+        now = time.time()
+        conn = self._conn()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM leases WHERE key = ? AND expires_at < ?", (key, now))
+            cursor = conn.execute("INSERT OR IGNORE INTO leases (key, expires_at) VALUES (?, ?)",
+                                  (key, now + ttl_seconds))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount == 1
+
+    def release_lease(self, key: str):
+        self._conn().execute("DELETE FROM leases WHERE key = ?", (key,))
+
+    def clear(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM leases")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        if self.ttl_seconds is not None:
+            conn.execute("DELETE FROM entries WHERE created_at < ?", (now - self.ttl_seconds,))
+
+        count, total = conn.execute("SELECT entries, bytes FROM totals WHERE id = 0").fetchone()
+
+        if self.max_entries and count > self.max_entries:
+            conn.execute(
+                "DELETE FROM entries WHERE key IN "
+                "(SELECT key FROM entries ORDER BY last_hit_at LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+        if self.max_bytes and total > self.max_bytes:
+            # Drop least recently hit rows until the remaining total fits
+            conn.execute(
+                """
+                DELETE FROM entries WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, SUM(size) OVER (
+                            ORDER BY last_hit_at, key ROWS UNBOUNDED PRECEDING
+                        ) - size AS freed_before
+                        FROM entries
+                    ) WHERE freed_before < ?
+                )
+                """,
+                (total - self.max_bytes,)
+            )
+
+
+class TieredCacheBackend(CacheBackend):
+    """In-memory LRU tier in front of a persistent backend."""
+
+    def __init__(self, front: MemoryCacheBackend, back: CacheBackend):
+        super().__init__()
+        self.front = front
+        self.back = back
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self.get_entry(key)
+        return None if entry is None else entry[0]
+
+    def get_entry(self, key: str) -> Optional[tuple]:
+        entry = self.front.get_entry(key)
+        if entry is not None:
+            return entry
+
+        entry = self.back.get_entry(key)
+        if entry is not None:
+            # Promoted entries keep their age, so the TTL still counts from the original write
+            self.front.set(key, entry[0], created_at=entry[1])
+        return entry
+
+    def set(self, key: str, value: dict):
+        self.back.set(key, value)
+        self.front.set(key, value)
+
+    def delete(self, key: str):
+        self.front.delete(key)
+        self.back.delete(key)
+
+    def acquire_lease(self, key: str, ttl_seconds: float) -> bool:
+        return self.back.acquire_lease(key, ttl_seconds)
+
+    def release_lease(self, key: str):
+        self.back.release_lease(key)
+
+    def clear(self):
+        self.front.clear()
+        self.back.clear()
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def create_cache_backend(cache_dir: str, backend_type: str = "file", memory_entries: int = 0,
+                         max_entries: int = None, max_bytes: int = None,
+                         ttl_seconds: float = None, sqlite_path: str = None) -> CacheBackend:
+    """
+    Build (or reuse) a cache backend.
+
+    Backends are shared per configuration within a process, so every
+    CacheManager pointing at the same store also shares one memory tier.
+    """
+    backend_type = backend_type.lower()
+    signature = (cache_dir, backend_type, memory_entries, max_entries, max_bytes,
+                 ttl_seconds, sqlite_path)
+
+    with _backends_lock:
+        backend = _backends.get(signature)
+        if backend is not None:
+            return backend
+
+        if backend_type == "file":
+            backend = FileCacheBackend(cache_dir, max_entries, max_bytes, ttl_seconds)
+        elif backend_type == "sqlite":
+            path = sqlite_path or os.path.join(cache_dir, "cache.sqlite3")
+            backend = SQLiteCacheBackend(path, max_entries, max_bytes, ttl_seconds)
+        elif backend_type == "memory":
+            backend = MemoryCacheBackend(max_entries or 1024, max_bytes, ttl_seconds)
+        else:
+            raise ValueError(
+                f"Unknown cache backend: {backend_type}. "
+                f"Supported: 'file', 'sqlite', 'memory'"
+            )
+
+        if memory_entries and backend_type != "memory":
+            backend = TieredCacheBackend(
+                MemoryCacheBackend(memory_entries, ttl_seconds=ttl_seconds),
+                backend
+            )
+
+        _backends[signature] = backend
+        return backend
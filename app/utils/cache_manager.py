@@ -1,8 +1,8 @@
 import hashlib
-import json
-import os
-from pathlib import Path
+import threading
 from typing import Optional
+from app.config import Config
+from app.utils.cache_backends import CacheBackend, create_cache_backend
 
 
 class CacheManager:
@@ -10,63 +10,142 @@ class CacheManager:
     Manages caching of LLM responses to reduce API calls.
     """
 
-    def __init__(self, cache_dir: str = "data/cache"):
-        self.cache_dir = Path(cache_dir)
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
+    # Process-wide lookup counters, shared by every CacheManager instance
+    hits = 0
+    misses = 0
+    _stats_lock = threading.Lock()
 
-    def _generate_cache_key(self, prompt: str, model: str, temperature: float) -> str:
+    def __init__(self, cache_dir: str = "data/cache", backend: CacheBackend = None):
+        self.cache_dir = cache_dir
+        self.backend = backend or create_cache_backend(
+            cache_dir,
+            backend_type=Config.CACHE_BACKEND,
+            memory_entries=Config.CACHE_MEMORY_ENTRIES,
+            max_entries=Config.CACHE_MAX_ENTRIES,
+            max_bytes=Config.CACHE_MAX_BYTES,
+            ttl_seconds=Config.CACHE_TTL_SECONDS,
+            sqlite_path=Config.CACHE_SQLITE_PATH
+        )
+
+    def _generate_cache_key(self, prompt: str, model: str, temperature: float,
+                            system: Optional[str] = None) -> str:
         """
-        Generate a unique cache key based on prompt, model, and temperature.
+        Generate a unique cache key based on prompt, model, temperature and
+        system prompt (keys of calls without one are unchanged).
         """
         content = f"{model}:{temperature}:{prompt}"
+        if system:
+            content = f"{model}:{temperature}:system={system}:{prompt}"
         return hashlib.sha256(content.encode()).hexdigest()
 
-    def get(self, prompt: str, model: str, temperature: float) -> Optional[str]:
+    def cache_key(self, prompt: str, model: str, temperature: float, system: Optional[str] = None) -> str:
+        """
+        Return the key a response for this prompt is cached under.
+        """
+        return self._generate_cache_key(prompt, model, temperature, system)
+
+    def get(self, prompt: str, model: str, temperature: float, system: Optional[str] = None) -> Optional[str]:
         """
         Retrieve cached response if it exists.
         """
-        cache_key = self._generate_cache_key(prompt, model, temperature)
-        cache_file = self.cache_dir / f"{cache_key}.json"
+        cache_key = self._generate_cache_key(prompt, model, temperature, system)
+        data = self.get_entry(cache_key)
 
-        if cache_file.exists():
-            try:
-                with open(cache_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    print(f"✓ Cache hit: {cache_key[:12]}...")
-                    return data["response"]
-            except Exception as e:
-                print(f"⚠ Cache read error: {e}")
-                return None
+        if data is not None and "response" in data:
+            print(f"✓ Cache hit: {cache_key[:12]}...")
+            return data["response"]
 
         return None
 
-    def set(self, prompt: str, model: str, temperature: float, response: str):
+    def set(self, prompt: str, model: str, temperature: float, response: str, system: Optional[str] = None):
         """
         Store response in cache.
         """
-        cache_key = self._generate_cache_key(prompt, model, temperature)
-        cache_file = self.cache_dir / f"{cache_key}.json"
+        cache_key = self._generate_cache_key(prompt, model, temperature, system)
 
-        try:
-            data = {
-                "prompt": prompt[:200] + "..." if len(prompt) > 200 else prompt,
-                "model": model,
-                "temperature": temperature,
-                "response": response
-            }
-
-            with open(cache_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+        data = {
+            "prompt": prompt[:200] + "..." if len(prompt) > 200 else prompt,
+            "model": model,
+            "temperature": temperature,
+            "response": response
+        }
 
+        if self.set_entry(cache_key, data):
             print(f"✓ Cached response: {cache_key[:12]}...")
 
+    def get_entry(self, cache_key: str) -> Optional[dict]:
+        """
+        Retrieve a raw cache entry by key, counting the lookup as a hit or miss.
+        """
+        try:
+            data = self.backend.get(cache_key)
+        except Exception as e:
+            print(f"⚠ Cache read error: {e}")
+            data = None
+
+        self._record(hit=data is not None)
+        return data
+
+    def set_entry(self, cache_key: str, data: dict) -> bool:
+        """
+        Store a raw cache entry by key. Returns False if the write failed.
+        """
+        try:
+            self.backend.set(cache_key, data)
+            return True
         except Exception as e:
             print(f"⚠ Cache write error: {e}")
+            return False
+
+    def peek(self, cache_key: str) -> Optional[str]:
+        """
+        Return the cached response for a key without counting a hit or miss
+        (used while waiting for another process to fill the entry).
+        """
+        try:
+            data = self.backend.get(cache_key)
+        except Exception as e:
+            print(f"⚠ Cache read error: {e}")
+            return None
+        return data.get("response") if data else None
+
+    def acquire_lease(self, cache_key: str) -> bool:
+        """
+        Claim the right to generate the response for a key across processes.
+        Leases expire after LLM_LEASE_SECONDS in case the holder dies.
+        """
+        try:
+            return self.backend.acquire_lease(cache_key, Config.LLM_LEASE_SECONDS)
+        except Exception as e:
+            # A broken lease store must not block generation
+            print(f"⚠ Cache lease error: {e}")
+            return True
+
+    def release_lease(self, cache_key: str):
+        try:
+            self.backend.release_lease(cache_key)
+        except Exception as e:
+            print(f"⚠ Cache lease error: {e}")
+
+    @classmethod
+    def _record(cls, hit: bool):
+        with cls._stats_lock:
+            if hit:
+                cls.hits += 1
+            else:
+                cls.misses += 1
+
+    @classmethod
+    def stats(cls) -> dict:
+        """
+        Return process-wide cache hit/miss counters.
+        """
+        with cls._stats_lock:
+            return {"hits": cls.hits, "misses": cls.misses}
 
     def clear(self):
         """
         Clear all cached responses.
         """
-        for cache_file in self.cache_dir.glob("*.json"):
-            cache_file.unlink()
+        self.backend.clear()
         print("✓ Cache cleared")
@@ -0,0 +1,154 @@
+import json
+from typing import Optional
+
+
+class IncrementalJSONParser:
+    """
+    Incrementally parses a JSON object streamed from an LLM.
+
+    Text is fed chunk by chunk. Elements of one top-level array (for example
+    "areas") are returned from feed() as soon as each element closes, so
+    callers can act on partial results while the model is still generating.
+
+    The parser tolerates the usual LLM noise: prose or markdown fences around
+    the object are skipped, trailing commas before a closing bracket are
+    dropped, and a truncated response still yields every element that was
+    completed before the cut-off.
+    """
+
+    _SCALAR_END = set(",}] \t\r\n")
+
+    def __init__(self, array_key: str):
+        self.array_key = array_key
+        self.items = []
+        self.fields = {}
+        self._out = []
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._in_scalar = False
+        self._pending_comma = False
+        self._started = False
+        self._done = False
+
+    def feed(self, chunk: str) -> list:
+        """Consume a chunk of text and return array elements completed by it."""
+        completed = []
+
+        for char in chunk:
+            if self._done:
+                break
+
+            if not self._started:
+                if char == "{":
+                    self._started = True
+                    self._open("obj")
+                continue
+
+            if self._in_string:
+                self._out.append(char)
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._value_done(completed)
+                continue
+
+            if self._in_scalar and char in self._SCALAR_END:
+                self._in_scalar = False
+                self._value_done(completed)
+
+            if char in " \t\r\n":
+                continue
+
+            if self._pending_comma:
+                self._pending_comma = False
+                if char not in "}]":
+                    self._out.append(",")
+                    self._after_comma()
+
+            if char == ",":
+                self._pending_comma = True
+            elif char == ":":
+                self._out.append(char)
+                self._stack[-1]["state"] = "value"
+            elif char in "{[":
+                self._value_start()
+                self._open("obj" if char == "{" else "arr")
+            elif char in "}]":
+                self._out.append(char)
+                self._stack.pop()
+                if not self._stack:
+                    self._done = True
+                else:
+                    self._value_done(completed)
+            elif char == '"':
+                self._value_start()
+                self._out.append(char)
+                self._in_string = True
+            elif not self._in_scalar:
+                self._value_start()
+                self._out.append(char)
+                self._in_scalar = True
+            else:
+                self._out.append(char)
+
+        return completed
+
+    def close(self) -> dict:
+        """Finish parsing and return the top-level fields recovered so far."""
+        result = dict(self.fields)
+        if self.array_key not in result and self._started:
+            result[self.array_key] = list(self.items)
+        return result
+
+    def _open(self, kind: str):
+        self._out.append("{" if kind == "obj" else "[")
+        self._stack.append({
+            "kind": kind,
+            "state": "key" if kind == "obj" else "value",
+            "key": None,
+            "start": None
+        })
+
+    def _value_start(self):
+        frame = self._stack[-1]
+        if frame["kind"] == "arr" or frame["state"] in ("key", "value"):
+            frame["start"] = len(self._out)
+
+    def _after_comma(self):
+        frame = self._stack[-1]
+        frame["state"] = "key" if frame["kind"] == "obj" else "value"
+
+    def _value_done(self, completed: list):
+        frame = self._stack[-1]
+        start = frame["start"]
+        if start is None:
+            return
+        frame["start"] = None
+
+        if frame["kind"] == "obj" and frame["state"] == "key":
+            frame["key"] = self._loads(start)
+            frame["state"] = "colon"
+            return
+
+        frame["state"] = "after"
+        depth = len(self._stack)
+
+        if depth == 1:
+            value = self._loads(start)
+            if value is not None or frame["key"] != self.array_key:
+                self.fields[frame["key"]] = value
+        elif depth == 2 and frame["kind"] == "arr" and self._stack[0]["key"] == self.array_key:
+            item = self._loads(start)
+            if item is not None:
+                self.items.append(item)
+                completed.append(item)
+
+    def _loads(self, start: int) -> Optional[object]:
+        try:
+            return json.loads("".join(self._out[start:]))
+        except ValueError:
+            return None
@@ -0,0 +1,119 @@
+import re
+from typing import Any, Iterable, Optional
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_END = object()  # trie key marking the end of a phrase
+_PREFIX = object()  # trie key holding {token prefix: (length, value)} for phrases ending in "*"
+
+
+def tokenize(text: str) -> list:
+    #lowercase alphanumeric tokens; "Master_Bedroom-IR01.JPG" -> master, bedroom, ir01, jpg
+    return _TOKEN.findall(str(text).lower())
+
+
+class PhraseIndex:
+    """
+    Token trie for finding known phrases inside free text.
+
+    Phrases match on whole tokens, so "hall" does not match inside
+    "hallway"; a trailing "*" makes the last token a prefix ("leak*"
+    matches "leakage"). A lookup walks the trie once from each token of the
+    text, so its cost depends on the text length, not on how many phrases
+    are indexed.
+    """
+
+    def __init__(self):
+        self._root = {}
+        self.size = 0
+
+    def add(self, phrase: str, value: Any):
+        #first value registered for a phrase wins
+        tokens = tokenize(phrase)
+        if not tokens:
+            return
+        node = self._root
+
+        if phrase.rstrip().endswith("*"):
+            for token in tokens[:-1]:
+                node = node.setdefault(token, {})
+            prefixes = node.setdefault(_PREFIX, {})
+            if tokens[-1] not in prefixes:
+                prefixes[tokens[-1]] = (len(tokens), value)
+                self.size += 1
+            return
+
+        for token in tokens:
+            node = node.setdefault(token, {})
+        if _END not in node:
+            node[_END] = (len(tokens), value)
+            self.size += 1
+
+    def add_all(self, phrases: Iterable[str], value: Any):
+        for phrase in phrases:
+            self.add(phrase, value)
+
+    def longest_match(self, text: str) -> Optional[Any]:
+        #value of the longest phrase in text (earliest wins a tie), or None
+        best = None
+        best_length = 0
+
+        for length, value in self._matches(tokenize(text)):
+            if length > best_length:
+                best_length, best = length, value
+
+        return best
+
+    def leading_match(self, text: str, within: int = 1) -> Optional[tuple]:
+        #(start, length, value) of the longest phrase starting at one of the first
+        #`within` tokens (earliest wins a tie), or None; positions are in tokens
+        tokens = tokenize(text)
+        best = None
+
+        for start in range(min(within, len(tokens))):
+            for length, value in self._matches_at(tokens, start):
+                if best is None or length > best[1]:
+                    best = (start, length, value)
+
+        return best
+
+    def scan(self, text: str) -> list:
+        #values of the phrases in text, left to right, without overlaps: at each
+        #position the longest phrase wins and the scan resumes after it, so
+        #"no leakage" hides the "leak*" inside it. Equal-length phrases at the
+        #same position are all returned.
+        tokens = tokenize(text)
+        values = []
+        start = 0
+
+        while start < len(tokens):
+            longest = 0
+            found = []
+            for length, value in self._matches_at(tokens, start):
+                if length > longest:
+                    longest, found = length, [value]
+                elif length == longest:
+                    found.append(value)
+            values.extend(found)
+            start += longest or 1
+
+        return values
+
+    def _matches(self, tokens: list):
+        #yields (phrase length, value) for each match, by start position
+        for start in range(len(tokens)):
+            yield from self._matches_at(tokens, start)
+
+    def _matches_at(self, tokens: list, start: int):
+        node = self._root
+        for token in tokens[start:]:
+            prefixes = node.get(_PREFIX)
+            if prefixes:
+                for size in range(1, len(token) + 1):
+                    match = prefixes.get(token[:size])
+                    if match:
+                        yield match
+            node = node.get(token)
+            if node is None:
+                break
+            if _END in node:
+                yield node[_END]
@@ -0,0 +1,277 @@
+"""
+Proactive rate limiting for quota-limited LLM APIs.
+
+RateLimiter keeps two token buckets per API - requests per minute and tokens
+per minute - and makes callers wait BEFORE a call would exceed either, instead
+of reacting to 429s after the quota is already burnt. Bucket state lives in a
+small SQLite table (Config.RATE_LIMIT_STATE_PATH), so every thread and every
+process (batch workers, job workers, UI sessions) draws from the same budget.
+
+The effective rate adapts AIMD-style: each throttled call halves it and blocks
+all callers for the server's retry-after hint (or an exponential backoff),
+and each successful call restores a small share (Config.RATE_LIMIT_RECOVERY).
+Waits carry random jitter so blocked callers do not retry in lock-step, and
+aacquire() waits with asyncio.sleep and takes the SQLite write lock on a
+worker thread, so an event loop is never blocked.
+"""
+
+import asyncio
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from app.config import Config
+
+
+class RateLimiter:
+    """Requests/minute and tokens/minute buckets shared across threads and processes."""
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS buckets (
+        name TEXT PRIMARY KEY,
+        requests REAL NOT NULL,
+        tokens REAL NOT NULL,
+        updated_at REAL NOT NULL,
+        factor REAL NOT NULL,
+        blocked_until REAL NOT NULL,
+        throttles INTEGER NOT NULL
+    );
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, name: str, requests_per_minute: float, tokens_per_minute: Optional[float] = None,
+                 state_path: Optional[str] = None):
+        self.name = name
+        self.rpm = float(requests_per_minute)
+        self.tpm = float(tokens_per_minute) if tokens_per_minute else None
+        self.state_path = state_path
+
+        self._lock = threading.Lock()
+        self._memory = None
+        self._local = threading.local()
+        if state_path:
+            Path(state_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn().executescript(self._SCHEMA)
+
+        # Process-local metrics
+        self.waiting = 0
+        self.acquired = 0
+        self.abandoned = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+
+    @classmethod
+    def shared(cls, name: str, requests_per_minute: float, tokens_per_minute: Optional[float] = None) -> "RateLimiter":
+        """Return the process-wide limiter for an API, using Config.RATE_LIMIT_STATE_PATH."""
+        with cls._instances_lock:
+            limiter = cls._instances.get(name)
+            if limiter is None:
+                limiter = cls(name, requests_per_minute, tokens_per_minute, Config.RATE_LIMIT_STATE_PATH)
+                cls._instances[name] = limiter
+            return limiter
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.state_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _fresh(self, now: float) -> dict:
+        return {
+            "requests": self._capacity(self.rpm, 1.0),
+            "tokens": self._capacity(self.tpm, 1.0) if self.tpm else 0.0,
+            "updated_at": now,
+            "factor": 1.0,
+            "blocked_until": 0.0,
+            "throttles": 0
+        }
+
+    def _update(self, change):
+        #applies change(state, now) atomically to the shared bucket state and returns its result
+        now = time.time()
+
+        if not self.state_path:
+            with self._lock:
+                state = self._memory or self._fresh(now)
+                self._refill(state, now)
+                result = change(state, now)
+                self._memory = state
+                return result
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT requests, tokens, updated_at, factor, blocked_until, throttles FROM buckets WHERE name = ?",
+                (self.name,)
+            ).fetchone()
+            state = self._fresh(now) if row is None else dict(zip(
+                ("requests", "tokens", "updated_at", "factor", "blocked_until", "throttles"), row
+            ))
+            self._refill(state, now)
+            result = change(state, now)
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.name, state["requests"], state["tokens"], state["updated_at"],
+                 state["factor"], state["blocked_until"], state["throttles"])
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    @staticmethod
+    def _capacity(per_minute: float, factor: float) -> float:
+        #a bucket holding a full minute of quota would allow bursts a per-minute
+        #window rejects, so it only holds Config.RATE_LIMIT_BURST of it
+        return max(1.0, per_minute * factor * Config.RATE_LIMIT_BURST)
+
+    def _refill(self, state: dict, now: float):
+        elapsed = max(0.0, now - state["updated_at"])
+        factor = state["factor"]
+        state["requests"] = min(self._capacity(self.rpm, factor),
+                                state["requests"] + elapsed * self.rpm * factor / 60)
+        if self.tpm:
+            state["tokens"] = min(self._capacity(self.tpm, factor),
+                                  state["tokens"] + elapsed * self.tpm * factor / 60)
+        state["updated_at"] = now
+
+    def try_acquire(self, tokens: int = 0) -> float:
+        """Take one request and `tokens` tokens if available; returns 0, or the seconds to wait first."""
+        def take(state, now):
+            if state["blocked_until"] > now:
+                return state["blocked_until"] - now
+
+            factor = state["factor"]
+            waits = []
+            if state["requests"] < 1:
+                waits.append((1 - state["requests"]) * 60 / (self.rpm * factor))
+
+            # A call larger than the whole bucket only waits for a full bucket
+            needed = min(tokens, self._capacity(self.tpm, factor)) if self.tpm else 0
+            if self.tpm and state["tokens"] < needed:
+                waits.append((needed - state["tokens"]) * 60 / (self.tpm * factor))
+
+            if waits:
+                return max(waits)
+
+            state["requests"] -= 1
+            state["tokens"] -= needed
+            return 0.0
+
+        return self._update(take)
+
+    def _jittered(self, wait: float) -> float:
+        return wait * (1 + random.uniform(0, Config.RATE_LIMIT_JITTER))
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Block until the call may proceed; returns the seconds spent waiting."""
+        waited = 0.0
+        acquired = False
+        with self._lock:
+            self.waiting += 1
+        try:
+            while True:
+                wait = self.try_acquire(tokens)
+                if wait <= 0:
+                    break
+                wait = self._jittered(wait)
+                time.sleep(wait)
+                waited += wait
+            acquired = True
+        finally:
+            self._record(waited, acquired)
+        return waited
+
+    async def aacquire(self, tokens: int = 0) -> float:
+        """Awaitable acquire(); waits without blocking the event loop."""
+        waited = 0.0
+        acquired = False
+        with self._lock:
+            self.waiting += 1
+        try:
+            while True:
+                # BEGIN IMMEDIATE can wait on other processes for up to 30s
+                if self.state_path:
+                    wait = await asyncio.to_thread(self.try_acquire, tokens)
+                else:
+                    wait = self.try_acquire(tokens)
+                if wait <= 0:
+                    break
+                wait = self._jittered(wait)
+                await asyncio.sleep(wait)
+                waited += wait
+            acquired = True
+        finally:
+            self._record(waited, acquired)
+        return waited
+
+    def _record(self, waited: float, acquired: bool):
+        #waits that were cancelled or failed are not counted as acquired
+        with self._lock:
+            self.waiting -= 1
+            if acquired:
+                self.acquired += 1
+            else:
+                self.abandoned += 1
+            self.wait_seconds += waited
+
+    def on_success(self, reserved: int = 0, used: Optional[int] = None):
+        """
+        Additive increase: restore part of the rate after a call that was not
+        throttled. When the call's real token usage is known, the difference
+        to the `reserved` estimate is refunded to (or charged from) the bucket.
+        """
+        def increase(state, now):
+            state["factor"] = min(1.0, state["factor"] + Config.RATE_LIMIT_RECOVERY)
+            state["throttles"] = 0
+            if self.tpm and used is not None:
+                state["tokens"] = min(self._capacity(self.tpm, state["factor"]),
+                                      state["tokens"] + reserved - used)
+
+        self._update(increase)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> float:
+        """
+        Multiplicative decrease after a 429: halve the rate and block every
+        caller for retry_after seconds (exponential backoff without a hint).
+        Returns the block duration.
+        """
+        def decrease(state, now):
+            state["factor"] = max(Config.RATE_LIMIT_MIN_FACTOR, state["factor"] / 2)
+            state["throttles"] += 1
+            delay = retry_after
+            if delay is None:
+                delay = min(Config.MAX_RETRY_DELAY,
+                            Config.INITIAL_RETRY_DELAY * 2 ** (state["throttles"] - 1))
+            state["blocked_until"] = max(state["blocked_until"], now + delay)
+            # The throttled request drained the buckets as far as the server is concerned
+            state["requests"] = min(state["requests"], 0.0)
+            return delay
+
+        with self._lock:
+            self.throttled += 1
+        return self._update(decrease)
+
+    def stats(self) -> dict:
+        """Return queue depth, throttle counts, time spent waiting and the current adapted rate."""
+        state = self._update(lambda state, now: dict(state, now=now))
+        with self._lock:
+            return {
+                "waiting": self.waiting,
+                "acquired": self.acquired,
+                "abandoned": self.abandoned,
+                "throttled": self.throttled,
+                "wait_seconds": round(self.wait_seconds, 3),
+                "rate_factor": round(state["factor"], 3),
+                "effective_rpm": round(self.rpm * state["factor"], 2),
+                "effective_tpm": round(self.tpm * state["factor"]) if self.tpm else None,
+                "blocked_for": round(max(0.0, state["blocked_until"] - state["now"]), 3)
+            }
@@ -1,62 +1,40 @@
-import time
-from functools import wraps
-from typing import Callable, Any
+import re
+from typing import Optional, Tuple
 
+_RETRY_IN = re.compile(r"retry in\s*([\d.]+)\s*s", re.IGNORECASE)
 
-def retry_with_exponential_backoff(
-    max_retries: int = 3,
-    initial_delay: float = 1.0,
-    max_delay: float = 60.0,
-    exponential_base: float = 2.0
-):
+
+def rate_limit_info(error: BaseException) -> Tuple[bool, Optional[float]]:
     """
-    Decorator to retry function calls with exponential backoff.
-    
-    Handles rate limit errors gracefully by waiting and retrying.
+    Classify an API error as (is_rate_limit, retry_after_seconds).
+
+    Checks the google.api_core exception types and HTTP status first, then
+    falls back to the error text. retry_after is None when the server gave
+    no hint.
     """
-    def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        def wrapper(*args, **kwargs) -> Any:
-            delay = initial_delay
-            
-            for attempt in range(max_retries + 1):
-                try:
-                    return func(*args, **kwargs)
-                    
-                except Exception as e:
-                    error_str = str(e).lower()
-                    
-                    # Check if it's a rate limit error
-                    is_rate_limit = any([
-                        "429" in error_str,
-                        "quota" in error_str,
-                        "rate limit" in error_str,
-                        "resourceexhausted" in error_str
-                    ])
-                    
-                    if not is_rate_limit or attempt == max_retries:
-                        # Not a rate limit error or max retries reached
-                        raise
-                    
-                    # Extract retry-after time if available
-                    retry_after = None
-                    if "retry in" in error_str:
-                        try:
-                            # Parse "retry in 27.286803409s"
-                            parts = error_str.split("retry in")[1].split("s")[0]
-                            retry_after = float(parts.strip())
-                        except:
-                            pass
-                    
-                    wait_time = retry_after if retry_after else min(delay, max_delay)
-                    
-                    print(f"⚠ Rate limit hit. Retrying in {wait_time:.1f}s (attempt {attempt + 1}/{max_retries})...")
-                    time.sleep(wait_time)
-                    
-                    # Exponential backoff for next attempt
-                    delay *= exponential_base
-            
-            raise Exception(f"Max retries ({max_retries}) exceeded")
-        
-        return wrapper
-    return decorator
+    is_rate_limit = type(error).__name__ in ("ResourceExhausted", "TooManyRequests")
+    for attr in ("code", "status_code"):
+        if getattr(error, attr, None) == 429:
+            is_rate_limit = True
+
+    error_str = str(error).lower()
+    if not is_rate_limit:
+        is_rate_limit = any([
+            "429" in error_str,
+            "quota" in error_str,
+            "rate limit" in error_str,
+            "resourceexhausted" in error_str
+        ])
+    if not is_rate_limit:
+        return False, None
+
+    # RetryInfo detail on google.api_core errors, e.g. retry_delay { seconds: 27 }
+    for detail in getattr(error, "details", None) or []:
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None and hasattr(delay, "seconds"):
+            return True, delay.seconds + getattr(delay, "nanos", 0) / 1e9
+
+    # Parse "retry in 27.286803409s"
+    match = _RETRY_IN.search(error_str)
+    return True, float(match.group(1)) if match else None
+
@@ -0,0 +1,168 @@
+"""
+Near-duplicate detection for short finding texts.
+
+Texts are reduced to character 3-gram shingles of their content words, hashed
+into MinHash signatures with NumPy, and bucketed with LSH banding, so only
+texts sharing a band are compared. Candidates are confirmed with exact Jaccard
+similarity on the shingle sets and merged with union-find. Everything runs
+offline and stays roughly linear in the number of texts.
+"""
+
+import re
+import zlib
+from typing import Optional
+import numpy as np
+from app.config import Config
+
+# Words that carry no meaning for comparing findings
+STOPWORDS = frozenset({
+    "a", "an", "the", "at", "on", "in", "of", "to", "and", "or", "is", "are", "was",
+    "were", "be", "has", "have", "with", "from", "near", "by", "for", "as", "also",
+    "observed", "seen", "noticed", "found", "noted", "visible", "level", "area", "side"
+})
+
+# A finding that negates another ("No leakage") must never merge with it
+NEGATIONS = frozenset({"no", "not", "none", "nil", "without", "absent"})
+
+_WORD = re.compile(r"[a-z0-9]+")
+_PRIME = (1 << 31) - 1
+
+
+def _stem(word: str) -> str:
+    #crude suffix stripping so dampness/damp and cracks/crack share shingles
+    for suffix in ("ness", "ing", "es", "s"):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def content_words(text: str, ignore: frozenset = frozenset()) -> list:
+    #lowercased, stemmed words without stopwords, negations or the `ignore` words
+    return [_stem(w) for w in _WORD.findall(text.lower())
+            if w not in STOPWORDS and w not in NEGATIONS and w not in ignore]
+
+
+def is_negated(text: str) -> bool:
+    return any(w in NEGATIONS for w in _WORD.findall(text.lower()))
+
+
+def words(text: str) -> frozenset:
+    #the lowercased words of a text, e.g. an area name to pass as `ignore`
+    return frozenset(_WORD.findall(text.lower()))
+
+
+def shingles(text: str, size: int = 3, ignore: frozenset = frozenset()) -> frozenset:
+    #character n-grams of each content word, padded so short words still count
+    grams = set()
+    for word in content_words(text, ignore):
+        padded = f" {word} "
+        for start in range(max(1, len(padded) - size + 1)):
+            grams.add(padded[start:start + size])
+    return frozenset(grams)
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class UnionFind:
+    #disjoint sets over 0..n-1; the smallest index is always the root
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, item: int) -> int:
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a: int, b: int):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            # Keeping the earlier index as root preserves first-seen order
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+class MinHashLSH:
+    """
+    Clusters near-duplicate texts.
+
+    num_perm hash functions are split into bands of num_perm // bands rows;
+    two texts become candidates if any band matches exactly. With the
+    defaults (64 permutations, 16 bands) pairs above ~0.5 Jaccard are very
+    likely to collide. Candidates are then checked against `threshold`.
+    """
+
+    # Candidates checked per bucket, so one very common finding cannot make
+    # the comparison count quadratic
+    MAX_BUCKET_CHECKS = 16
+
+    def __init__(self, threshold: Optional[float] = None, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = Config.DEDUP_SIMILARITY_THRESHOLD if threshold is None else threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, grams: frozenset) -> np.ndarray:
+        #min over shingles of (a*h + b) mod p, for every permutation at once
+        if not grams:
+            return np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        hashes = np.fromiter((zlib.crc32(g.encode()) % _PRIME for g in grams),
+                             dtype=np.uint64, count=len(grams))
+        return ((np.outer(self._a, hashes) + self._b[:, None]) % _PRIME).min(axis=1)
+
+    def cluster(self, texts: list, ignore: Optional[list] = None) -> list:
+        """
+        Return, for each text, the index of the first-seen text in its cluster.
+
+        ignore optionally gives each text a set of words left out of the
+        comparison, e.g. the name of the area it was reported in, which all
+        findings of that area share. Texts are never merged with texts of
+        opposite polarity ("No leakage" vs "Leakage"). Identical texts after
+        normalisation always merge.
+        """
+        count = len(texts)
+        ignore = ignore or [frozenset()] * count
+        sets = UnionFind(count)
+        grams = [shingles(t, ignore=skip) for t, skip in zip(texts, ignore)]
+        negated = [is_negated(t) for t in texts]
+
+        # Exact duplicates (after normalisation) need no hashing
+        first_by_key = {}
+        unique = []
+        for index, text in enumerate(texts):
+            key = (negated[index], " ".join(content_words(text, ignore[index])))
+            if key in first_by_key:
+                sets.union(first_by_key[key], index)
+            else:
+                first_by_key[key] = index
+                unique.append(index)
+
+        buckets = {}
+        for index in unique:
+            band_values = self.signature(grams[index]).reshape(self.bands, self.rows)
+            for band, values in enumerate(band_values):
+                bucket = buckets.setdefault((band, values.tobytes()), [])
+                checked = 0
+                for other in reversed(bucket):
+                    if checked >= self.MAX_BUCKET_CHECKS:
+                        break
+                    if sets.find(other) == sets.find(index):
+                        continue
+                    checked += 1
+                    if negated[other] == negated[index] and jaccard(grams[other], grams[index]) >= self.threshold:
+                        sets.union(other, index)
+                bucket.append(index)
+
+        return [sets.find(index) for index in range(count)]
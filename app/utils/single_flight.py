@@ -0,0 +1,60 @@
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key within a process.
+
+    The first caller for a key becomes the leader and does the work; callers
+    arriving while it runs get the leader's Future and share its result (or
+    its exception). The key is forgotten as soon as the leader finishes, so
+    later calls start fresh; caching results is the caller's job.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.shared = 0
+
+    def join(self, key: str) -> tuple:
+        #(future, is_leader); a leader must call finish() exactly once
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.shared += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self.leaders += 1
+            return future, True
+
+    def finish(self, key: str, future: Future, result: Any = None, error: BaseException = None):
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: str, fn: Callable) -> tuple:
+        #(result, shared): runs fn once per key however many threads ask concurrently
+        future, leader = self.join(key)
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, future, error=e)
+            raise
+        self.finish(key, future, result=result)
+        return result, False
+
+    def stats(self) -> dict:
+        """Return how many calls led and how many shared a leader's result."""
+        with self._lock:
+            return {"leaders": self.leaders, "shared": self.shared, "in_flight": len(self._calls)}
@@ -0,0 +1,315 @@
+"""
+Lightweight span tracing for the DDR pipeline.
+
+Spans record wall time, thread CPU time and free-form attributes (input and
+output sizes, prompt/response characters, cache hits). They nest through a
+context variable, so a stage span started inside a pipeline span becomes its
+child, including across PipelineRunner worker threads.
+
+Tracing is off unless Config.TRACING_ENABLED is set. When it is off, span()
+returns a shared no-op object and traced() calls straight through, so the
+instrumentation costs one attribute lookup per call.
+"""
+
+import contextvars
+import inspect
+import json
+import os
+import threading
+import time
+from functools import wraps
+from typing import Callable, Optional
+from app.config import Config
+
+_current_span = contextvars.ContextVar("ddr_current_span", default=None)
+
+
+class Span:
+    """One timed unit of work. Use via Tracer.span() as a context manager."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attributes", "status",
+                 "start_time_ns", "end_time_ns", "wall_seconds", "cpu_seconds",
+                 "_activate", "_token", "_wall_start", "_cpu_start")
+
+    def __init__(self, name: str, attributes: dict, activate: bool = True):
+        parent = _current_span.get()
+        self.name = name
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.status = "ok"
+        self.start_time_ns = 0
+        self.end_time_ns = 0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self._activate = activate
+        self._token = None
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        if self._activate:
+            self._token = _current_span.set(self)
+        self.start_time_ns = time.time_ns()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # thread_time only counts this thread; work fanned out to other
+        # threads shows up in their own spans
+        self.cpu_seconds = time.thread_time() - self._cpu_start
+        self.wall_seconds = time.perf_counter() - self._wall_start
+        self.end_time_ns = time.time_ns()
+
+        if exc_type is not None and not issubclass(exc_type, GeneratorExit):
+            self.status = "error"
+            self.attributes["error"] = f"{exc_type.__name__}: {exc}"
+
+        if self._token is not None:
+            try:
+                _current_span.reset(self._token)
+            except ValueError:
+                pass  # closed from another context (e.g. an abandoned generator)
+
+        Tracer.export(self)
+        return False
+
+    def to_dict(self) -> dict:
+        #otel-shaped record
+        return {
+            "name": self.name,
+            "context": {"trace_id": self.trace_id, "span_id": self.span_id},
+            "parent_id": self.parent_id,
+            "start_time": self.start_time_ns,
+            "end_time": self.end_time_ns,
+            "wall_seconds": self.wall_seconds,
+            "cpu_seconds": self.cpu_seconds,
+            "status": self.status,
+            "attributes": self.attributes
+        }
+
+
+class _NoopSpan:
+    #returned while tracing is disabled
+
+    __slots__ = ()
+
+    def set(self, key: str, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class JSONLinesExporter:
+    """Appends one JSON object per finished span to a file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+class InMemorySpanExporter:
+    """
+    Keeps finished spans in memory, in the same shape as OpenTelemetry's
+    in-memory exporter (get_finished_spans / clear).
+    """
+
+    def __init__(self):
+        self._spans = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        with self._lock:
+            self._spans.append(span.to_dict())
+
+    def get_finished_spans(self) -> list:
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self):
+        with self._lock:
+            self._spans = []
+
+    def summary(self) -> dict:
+        """Per span name: call count and total wall/CPU seconds."""
+        totals = {}
+        for span in self.get_finished_spans():
+            entry = totals.setdefault(span["name"], {"count": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0})
+            entry["count"] += 1
+            entry["wall_seconds"] += span["wall_seconds"]
+            entry["cpu_seconds"] += span["cpu_seconds"]
+        return totals
+
+
+class OpenTelemetryExporter:
+    """
+    Forwards finished spans to the OpenTelemetry SDK, if installed.
+
+    Spans are re-created on the global tracer provider with their original
+    timestamps and attributes, so any configured OTel exporter picks them up.
+    """
+
+    def __init__(self):
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            raise ImportError("opentelemetry-api is required for TRACING_EXPORTER = 'otel'")
+        self._tracer = trace.get_tracer("ddr_assistant")
+
+    def export(self, span: Span):
+        attributes = {k: v for k, v in span.attributes.items() if isinstance(v, (str, bool, int, float))}
+        attributes["ddr.cpu_seconds"] = span.cpu_seconds
+        attributes["ddr.span_id"] = span.span_id
+        if span.parent_id:
+            attributes["ddr.parent_id"] = span.parent_id
+
+        otel_span = self._tracer.start_span(span.name, start_time=span.start_time_ns, attributes=attributes)
+        otel_span.end(end_time=span.end_time_ns)
+
+
+class Tracer:
+    """
+    Process-wide entry point for spans.
+
+    The exporter is built from Config on first use (TRACING_EXPORTER:
+    "jsonl", "memory" or "otel"), or can be set explicitly with set_exporter().
+    """
+
+    _exporter = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def enabled() -> bool:
+        return Config.TRACING_ENABLED
+
+    @staticmethod
+    def span(name: str, activate: bool = True, **attributes):
+        #context manager; activate=False records the span without making it
+        #the parent of spans opened while it is running (for generators)
+        if not Config.TRACING_ENABLED:
+            return _NOOP_SPAN
+        return Span(name, attributes, activate)
+
+    @staticmethod
+    def current():
+        #the innermost active span, or a no-op span
+        return _current_span.get() or _NOOP_SPAN
+
+    @staticmethod
+    def set_attribute(key: str, value):
+        span = _current_span.get()
+        if span is not None:
+            span.set(key, value)
+
+    @classmethod
+    def set_exporter(cls, exporter):
+        with cls._lock:
+            cls._exporter = exporter
+
+    @classmethod
+    def get_exporter(cls):
+        with cls._lock:
+            if cls._exporter is None:
+                cls._exporter = cls._create_exporter()
+            return cls._exporter
+
+    @staticmethod
+    def _create_exporter():
+        exporter_type = Config.TRACING_EXPORTER.lower()
+
+        if exporter_type == "jsonl":
+            return JSONLinesExporter(Config.TRACING_PATH)
+        elif exporter_type == "memory":
+            return InMemorySpanExporter()
+        elif exporter_type == "otel":
+            return OpenTelemetryExporter()
+        else:
+            raise ValueError(
+                f"Unknown tracing exporter: {exporter_type}. "
+                f"Supported: 'jsonl', 'memory', 'otel'"
+            )
+
+    @classmethod
+    def export(cls, span: Span):
+        try:
+            cls.get_exporter().export(span)
+        except Exception as e:
+            # Tracing must never break the pipeline
+            print(f"⚠ Span export error: {e}")
+
+
+def _size_attributes(prefix: str, value) -> dict:
+    if isinstance(value, str):
+        return {f"{prefix}.chars": len(value)}
+    if isinstance(value, (bytes, bytearray)):
+        return {f"{prefix}.bytes": len(value)}
+    if isinstance(value, (list, tuple, dict, set)):
+        return {f"{prefix}.items": len(value)}
+    return {}
+
+
+def traced(name: Optional[str] = None, input_size: bool = True, output_size: bool = True) -> Callable:
+    """
+    Decorator that runs the function inside a span.
+
+    The size of the first sized argument and of the return value are recorded
+    (chars for str, bytes, or item count for containers) unless disabled, e.g.
+    for functions whose first argument is a file path.
+    Coroutine functions are supported; generator functions should open their
+    own span with activate=False instead.
+    """
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        def _input_attributes(args):
+            if not input_size:
+                return {}
+            for arg in args:
+                found = _size_attributes("input", arg)
+                if found:
+                    return found
+            return {}
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not Config.TRACING_ENABLED:
+                    return await func(*args, **kwargs)
+                with Span(span_name, _input_attributes(args)) as span:
+                    result = await func(*args, **kwargs)
+                    if output_size:
+                        span.attributes.update(_size_attributes("output", result))
+                    return result
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not Config.TRACING_ENABLED:
+                return func(*args, **kwargs)
+            with Span(span_name, _input_attributes(args)) as span:
+                result = func(*args, **kwargs)
+                if output_size:
+                    span.attributes.update(_size_attributes("output", result))
+                return result
+
+        return wrapper
+    return decorator
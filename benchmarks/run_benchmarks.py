@@ -0,0 +1,202 @@
+"""
+Pipeline benchmark harness.
+
+Generates synthetic reports, runs every pipeline stage against the
+deterministic fake LLM provider, and writes machine-readable results.
+
+Usage:
+    python -m benchmarks.run_benchmarks --areas 50 --findings 4 --images 200 \\
+        --latency 0.2 --output bench_results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from app.config import Config
+from benchmarks.synthetic import make_inspection_pdf, make_thermal_pdf
+
+
+def _configure(args):
+    # Measure the work itself: no caches, fake provider with controlled cost
+    Config.USE_MOCK = False
+    Config.ENABLE_CACHE = False
+    Config.ENABLE_DOCUMENT_CACHE = False
+    Config.LLM_PROVIDER = "fake"
+    Config.FAKE_LLM_LATENCY = args.latency
+    Config.FAKE_LLM_SECONDS_PER_CHAR = args.seconds_per_char
+    Config.FAKE_LLM_OUTPUT_CHARS = args.output_chars
+    if args.chunk_tokens:
+        Config.EXTRACTION_CHUNK_TOKENS = args.chunk_tokens
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _measure(fn, repeat: int) -> tuple:
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return result, {
+        "runs": repeat,
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "max_s": max(timings)
+    }
+
+
+def run(args) -> dict:
+    _configure(args)
+
+    # Imported after configuration so clients pick up the fake provider
+    from app.processing.pdf_parser import PDFParser
+    from app.processing.layout_parser import LayoutParser
+    from app.processing.text_cleaner import TextCleaner
+    from app.processing.section_segmenter import SectionSegmenter
+    from app.extraction.chunker import TextChunker
+    from app.extraction.inspection_extractor import InspectionExtractor
+    from app.extraction.thermal_extractor import ThermalExtractor
+    from app.intelligence.data_normalizer import DataNormalizer
+    from app.intelligence.deduplicator import Deduplicator
+    from app.intelligence.area_linker import AreaLinker
+    from app.intelligence.thermal_analytics import ThermalAnalytics
+    from app.intelligence.conflict_detector import ConflictDetector
+    from app.intelligence.missing_detector import MissingDetector
+    from app.reporting.ddr_builder import DDRBuilder
+    from app.reporting.markdown_renderer import MarkdownRenderer
+    from app.pipeline import run_ddr_pipeline
+
+    stages = {}
+    sizes = {}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        inspection_path = make_inspection_pdf(
+            os.path.join(workdir, "inspection.pdf"), args.areas, args.findings
+        )
+        thermal_path = make_thermal_pdf(os.path.join(workdir, "thermal.pdf"), args.images)
+
+        raw_inspection, stages["parse_inspection"] = _measure(
+            lambda: PDFParser.extract_text(inspection_path), args.repeat)
+        raw_thermal, stages["parse_thermal"] = _measure(
+            lambda: PDFParser.extract_text(thermal_path), args.repeat)
+
+        inspection_text, stages["clean_segment_inspection"] = _measure(
+            lambda: SectionSegmenter.extract_relevant_sections(raw_inspection), args.repeat)
+        thermal_text, stages["clean_thermal"] = _measure(
+            lambda: TextCleaner.clean(raw_thermal), args.repeat)
+
+        _, stages["parse_layout_inspection"] = _measure(
+            lambda: LayoutParser.parse(inspection_path), args.repeat)
+
+        inspection_data, stages["extract_inspection"] = _measure(
+            lambda: InspectionExtractor().extract(inspection_text), args.repeat)
+        thermal_data, stages["extract_thermal"] = _measure(
+            lambda: ThermalExtractor().extract(thermal_text), args.repeat)
+
+        # Intelligence stages mutate their input, so each run starts from a fresh copy
+        def intelligence():
+            data = DataNormalizer.normalize(
+                json.loads(json.dumps(inspection_data)), json.loads(json.dumps(thermal_data)))
+            data = Deduplicator.deduplicate(data)
+            data = AreaLinker.link(data)
+            data = ThermalAnalytics.analyze(data)
+            return data, ConflictDetector.detect(data), MissingDetector.detect(data)
+
+        (normalized, conflicts, missing), stages["intelligence"] = _measure(intelligence, args.repeat)
+
+        ddr_sections, stages["build_ddr"] = _measure(
+            lambda: DDRBuilder().build(normalized, conflicts, missing), args.repeat)
+        markdown, stages["render_markdown"] = _measure(
+            lambda: MarkdownRenderer.render(ddr_sections), args.repeat)
+
+        try:
+            from app.reporting.pdf_renderer import PDFRenderer
+            pdf_path = os.path.join(workdir, "ddr.pdf")
+            _, stages["render_pdf"] = _measure(
+                lambda: PDFRenderer.render(markdown, pdf_path), args.repeat)
+        except ImportError:
+            pass
+
+        _, stages["pipeline_end_to_end"] = _measure(
+            lambda: run_ddr_pipeline(inspection_path, thermal_path), args.repeat)
+
+        sizes = {
+            "inspection_pdf_bytes": os.path.getsize(inspection_path),
+            "thermal_pdf_bytes": os.path.getsize(thermal_path),
+            "inspection_raw_chars": len(raw_inspection),
+            "inspection_segmented_chars": len(inspection_text),
+            "thermal_clean_chars": len(thermal_text),
+            "extraction_chunks": len(TextChunker.split(inspection_text)),
+            "areas_extracted": len(inspection_data.get("areas", [])),
+            "thermal_readings_extracted": len(thermal_data.get("thermal_readings", [])),
+            "conflicts": len(conflicts),
+            "markdown_chars": len(markdown)
+        }
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "params": {
+            "areas": args.areas,
+            "findings": args.findings,
+            "images": args.images,
+            "latency": args.latency,
+            "seconds_per_char": args.seconds_per_char,
+            "output_chars": args.output_chars,
+            "chunk_tokens": Config.EXTRACTION_CHUNK_TOKENS,
+            "repeat": args.repeat
+        },
+        "sizes": sizes,
+        "stages": stages
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every DDR pipeline stage.")
+    parser.add_argument("--areas", type=int, default=20, help="Impacted areas in the inspection PDF")
+    parser.add_argument("--findings", type=int, default=3, help="Findings per side per area")
+    parser.add_argument("--images", type=int, default=30, help="Thermal images in the thermal PDF")
+    parser.add_argument("--latency", type=float, default=0.0, help="Fake LLM seconds per call")
+    parser.add_argument("--seconds-per-char", type=float, default=0.0,
+                        help="Fake LLM seconds per output character")
+    parser.add_argument("--output-chars", type=int, default=0, help="Extra fake LLM output size")
+    parser.add_argument("--chunk-tokens", type=int, default=None,
+                        help="Override EXTRACTION_CHUNK_TOKENS")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write results")
+    args = parser.parse_args()
+
+    results = run(args)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    width = max(len(name) for name in results["stages"])
+    for name, stats in results["stages"].items():
+        print(f"  {name.ljust(width)}  median {stats['median_s'] * 1000:9.2f} ms")
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Synthetic inspection and thermal PDFs that mirror the layout of real reports.
+"""
+
+import random
+import fitz  # PyMuPDF
+
+
+ROOMS = ["Hall", "Bedroom", "Kitchen", "Master Bedroom", "Parking Area",
+         "Common Bathroom", "Balcony", "Living Room", "Hallway", "Terrace"]
+
+NEGATIVE = ["Skirting level Dampness", "wall dampness observed", "Ceiling seepage",
+            "Dampness & efflorescence on wall", "outlet Leakage", "paint peeling due to damp"]
+
+POSITIVE = ["tile hollowness", "tile joint open", "plumbing issue below WC",
+            "External wall crack", "Loose plumbing joints", "No leakage observed"]
+
+
+class _PageWriter:
+    #writes lines top to bottom, starting a new page when the current one is full
+
+    def __init__(self, document: fitz.Document, font_size: float = 9, line_height: float = 13):
+        self.document = document
+        self.font_size = font_size
+        self.line_height = line_height
+        self.page = None
+        self.y = 0
+
+    def new_page(self):
+        self.page = self.document.new_page()
+        self.y = 50
+
+    def line(self, text: str):
+        if self.page is None or self.y > self.page.rect.height - 50:
+            self.new_page()
+        self.page.insert_text((50, self.y), text, fontsize=self.font_size)
+        self.y += self.line_height
+
+
+def make_inspection_pdf(path: str, areas: int, findings: int, seed: int = 1) -> str:
+    """Write an inspection report with `areas` areas of `findings` findings per side."""
+    rng = random.Random(seed)
+    document = fitz.open()
+    writer = _PageWriter(document)
+
+    writer.line("Inspection Form")
+    writer.line("Customer Name")
+    writer.line("Property Type: Flat")
+    writer.line("Impacted Areas/Rooms")
+
+    photo = 1
+    for index in range(1, areas + 1):
+        room = rng.choice(ROOMS)
+        writer.line(f"Impacted Area {index}")
+        writer.line("Negative side Description")
+        for _ in range(findings):
+            writer.line(f"{room} {rng.choice(NEGATIVE)}")
+        writer.line("Negative side photographs")
+        for _ in range(3):
+            writer.line(f"Photo {photo}")
+            photo += 1
+        writer.line("Positive side Description")
+        for _ in range(findings):
+            writer.line(f"{room} {rng.choice(POSITIVE)}")
+        writer.line("Positive side photographs")
+
+    document.save(path)
+    document.close()
+    return path
+
+
+def make_thermal_pdf(path: str, images: int, seed: int = 2) -> str:
+    """Write a thermal report with one page per thermal image."""
+    rng = random.Random(seed)
+    document = fitz.open()
+    writer = _PageWriter(document)
+
+    for index in range(1, images + 1):
+        writer.new_page()
+        hot = round(rng.uniform(24.0, 36.0), 1)
+        cold = round(hot - rng.uniform(1.0, 9.0), 1)
+        writer.line(f"{hot} °C")
+        writer.line(f"{cold} °C")
+        writer.line("27/09/22")
+        writer.line("Hotspot :")
+        writer.line(f"{hot} °C")
+        writer.line("Coldspot :")
+        writer.line(f"{cold} °C")
+        writer.line("Emissivity :")
+        writer.line("0.94")
+        writer.line("Reflected temperature :")
+        writer.line("23 °C")
+        writer.line(f"Thermal image : {rng.choice(ROOMS).replace(' ', '_')}_IR{index:05d}.JPG")
+        writer.line("Device : GTC 400 C Professional")
+        writer.line(str(index))
+
+    document.save(path)
+    document.close()
+    return path
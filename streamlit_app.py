@@ -1,21 +1,10 @@
 import streamlit as st
-import tempfile
 import os
 from pathlib import Path
 
 # Import backend components
-from app.processing.pdf_parser import PDFParser
-from app.processing.text_cleaner import TextCleaner
-from app.extraction.inspection_extractor import InspectionExtractor
-from app.extraction.thermal_extractor import ThermalExtractor
-from app.intelligence.data_normalizer import DataNormalizer
-from app.intelligence.deduplicator import Deduplicator
-from app.intelligence.area_linker import AreaLinker
-from app.intelligence.conflict_detector import ConflictDetector
-from app.intelligence.missing_detector import MissingDetector
-from app.reporting.ddr_builder import DDRBuilder
-from app.reporting.markdown_renderer import MarkdownRenderer
-from app.processing.section_segmenter import SectionSegmenter
+from app.config import Config
+from app.jobs import JobQueue, QueueFullError, WorkerPool
 
 
 # Page configuration
@@ -78,52 +67,58 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+@st.cache_resource
+def get_job_queue():
+    """
+    Job queue shared by every session of this server; starts the worker
+    processes once (JOB_WORKERS = 0 expects `python -m app.jobs worker`).
+    """
+    queue = JobQueue()
+    if Config.JOB_WORKERS:
+        WorkerPool(Config.JOB_WORKERS).start()
+    return queue
+
+
 def process_reports(inspection_file, thermal_file):
     """
-    Process uploaded inspection and thermal reports to generate DDR.
+    Submit uploaded inspection and thermal reports as a job and follow it until the DDR is ready.
     """
     try:
-        # Create temporary directory for uploaded files
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Save uploaded files
-            inspection_path = os.path.join(temp_dir, "inspection.pdf")
-            thermal_path = os.path.join(temp_dir, "thermal.pdf")
-            
-            with open(inspection_path, "wb") as f:
-                f.write(inspection_file.getvalue())
-            
-            with open(thermal_path, "wb") as f:
-                f.write(thermal_file.getvalue())
-            
-            # Process files through the pipeline
-            with st.spinner("📄 Extracting text from PDFs..."):
-                raw_inspection_text = TextCleaner.clean(
-                    PDFParser.extract_text(inspection_path)
-                )
-                inspection_text = SectionSegmenter.extract_relevant_sections(
-                    raw_inspection_text
-                )
-                thermal_text = TextCleaner.clean(
-                    PDFParser.extract_text(thermal_path)
-                )
-            
-            with st.spinner("🤖 Extracting structured data with AI..."):
-                inspection_data = InspectionExtractor().extract(inspection_text)
-                thermal_data = ThermalExtractor().extract(thermal_text)
-            
-            with st.spinner("🔄 Processing and analyzing data..."):
-                normalized_data = DataNormalizer.normalize(inspection_data, thermal_data)
-                normalized_data = Deduplicator.deduplicate(normalized_data)
-                normalized_data = AreaLinker.link(normalized_data)
-                conflicts = ConflictDetector.detect(normalized_data)
-                missing = MissingDetector.detect(normalized_data)
-            
-            with st.spinner("📝 Generating Detailed Diagnostic Report..."):
-                ddr_sections = DDRBuilder().build(normalized_data, conflicts, missing)
-                final_markdown = MarkdownRenderer.render(ddr_sections)
-            
-            return final_markdown, None
-            
+        queue = get_job_queue()
+
+        # Identical reports already in progress are joined, not run twice
+        job_id, joined = queue.submit(inspection_file.getvalue(), thermal_file.getvalue())
+
+        status = st.status("🤖 Generating Detailed Diagnostic Report...", expanded=False)
+        if joined:
+            status.write("🔗 Same reports are already being processed; following that job")
+
+        # Workers run the pipeline; this session only polls for progress
+        for message in queue.follow(job_id, timeout=Config.JOB_UI_TIMEOUT):
+            status.write(message)
+
+        job = queue.get(job_id)
+        if job["status"] == "queued":
+            status.update(label="❌ No worker picked up the job", state="error")
+            return None, (f"The job was still queued after {Config.JOB_UI_TIMEOUT}s. "
+                          f"With JOB_WORKERS = 0, start a worker with `python -m app.jobs worker`.")
+        if job["status"] == "running":
+            status.update(label="❌ Pipeline is taking too long", state="error")
+            return None, (f"The job is still running after {Config.JOB_UI_TIMEOUT}s; "
+                          f"it keeps running, and resubmitting the same reports follows it again.")
+        if job["status"] != "done":
+            status.update(label="❌ Pipeline failed", state="error")
+            return None, job["error"]
+
+        status.update(
+            label=f"✅ Pipeline finished in {job['timings']['total']:.1f}s",
+            state="complete"
+        )
+
+        return job["result"], None
+
+    except QueueFullError as e:
+        return None, f"Too many reports are being processed right now ({e})"
     except Exception as e:
         return None, str(e)
 